@@ -0,0 +1,194 @@
+"""
+Request Pipeline Benchmarks
+~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Measures requests/second, p50/p95/p99 latency & peak memory of the core
+request path (API.get_resource) against a local MockBattleNetServer, so
+results are reproducible & don't use any API quota.
+
+Usage::
+
+    python benchmarks/bench_request_pipeline.py
+    python benchmarks/bench_request_pipeline.py --quick
+    python benchmarks/bench_request_pipeline.py --json results.json
+
+:copyright: (c) 2021-Present Adalyia
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import time
+import tracemalloc
+from typing import List, Dict, Any, Optional
+
+from aiowowapi import WowApi, MemoryCache
+from aiowowapi.testing import MockBattleNetServer
+
+
+PARALLEL_REQUESTS = (1, 10, 50, 100)
+PAYLOAD_SIZES = (1024, 100 * 1024, 1024 ** 2, 10 * 1024 ** 2,
+                 50 * 1024 ** 2)
+CONTEXT_MANAGER = (True, False)
+CACHE = (False, True)
+
+# Upper bound of bytes transferred per scenario, keeps the large payload
+# scenarios from running for minutes
+BYTES_PER_SCENARIO = 256 * 1024 ** 2
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Returns the q-th percentile (0 - 100) using the nearest rank method
+    """
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1,
+                      math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+async def run_scenario(server: MockBattleNetServer,
+                       parallel: int,
+                       payload_size: int,
+                       context_manager: bool,
+                       cache: bool,
+                       requests: int,
+                       trace_memory: bool) -> Dict[str, Any]:
+    """Runs a single benchmark scenario and returns its results
+    """
+    server.payload_size = payload_size
+    client = WowApi('<client_id>', '<client_secret>', 'us',
+                    max_parallel_requests=parallel,
+                    request_debugging=False,
+                    # Auctions live in a dynamic namespace, which isn't
+                    # cached by default
+                    cache=MemoryCache() if cache else None,
+                    cache_ttl={'dynamic-': 3600},
+                    **server.get_client_kwargs())
+    latencies: List[float] = []
+    errors = 0
+
+    async def timed_request(realm_id: int) -> None:
+        nonlocal errors
+        started = time.perf_counter()
+        data = await client.Retail.GameData.get_auctions(realm_id)
+        latencies.append(time.perf_counter() - started)
+        if data is None:
+            errors += 1
+
+    # Warm up, this fetches the access token & builds the synthetic payload
+    # on the server (and fills the cache) so none of it is part of the
+    # measurement
+    async with client:
+        await client.Retail.GameData.get_auctions(1)
+
+    async def run_requests() -> float:
+        started = time.perf_counter()
+        if context_manager:
+            async with client:
+                await asyncio.gather(
+                    *(timed_request(1) for _ in range(requests)))
+        else:
+            await asyncio.gather(*(timed_request(1) for _ in range(requests)))
+        return time.perf_counter() - started
+
+    elapsed = await run_requests()
+    timings, failed = latencies[:], errors
+
+    # Peak memory is measured in a second pass, tracemalloc slows down every
+    # allocation and would otherwise skew the timings
+    peak_memory: Optional[int] = None
+    if trace_memory:
+        tracemalloc.start()
+        await run_requests()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        'parallel': parallel,
+        'payload_size': payload_size,
+        'context_manager': context_manager,
+        'cache': cache,
+        'requests': requests,
+        'errors': failed,
+        'requests_per_second': requests / elapsed,
+        'p50': percentile(timings, 50),
+        'p95': percentile(timings, 95),
+        'p99': percentile(timings, 99),
+        'peak_memory': peak_memory,
+    }
+
+
+def format_size(size: Optional[float]) -> str:
+    if size is None:
+        return '-'
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f'{size:.0f} {unit}'
+        size /= 1024
+    return f'{size:.1f} GB'
+
+
+async def main(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    parallel_requests = (1, 10) if args.quick else PARALLEL_REQUESTS
+    payload_sizes = PAYLOAD_SIZES[:2] if args.quick else PAYLOAD_SIZES
+    results = []
+
+    print(f'{"parallel":>8} {"payload":>9} {"ctx":>5} {"cache":>5} '
+          f'{"reqs":>5} '
+          f'{"err":>4} {"req/s":>9} {"p50 ms":>8} {"p95 ms":>8} '
+          f'{"p99 ms":>8} {"peak mem":>9}')
+
+    async with MockBattleNetServer(latency=args.latency,
+                                   compression=args.compression) as server:
+        for parallel, payload_size, context_manager, cache in \
+                itertools.product(parallel_requests, payload_sizes,
+                                  CONTEXT_MANAGER, CACHE):
+            requests = max(5, min(args.requests,
+                                  BYTES_PER_SCENARIO // payload_size))
+            result = await run_scenario(server, parallel, payload_size,
+                                        context_manager, cache, requests,
+                                        not args.no_memory)
+            results.append(result)
+
+            print(f'{parallel:>8} {format_size(payload_size):>9} '
+                  f'{str(context_manager):>5} {str(cache):>5} '
+                  f'{requests:>5} '
+                  f'{result["errors"]:>4} '
+                  f'{result["requests_per_second"]:>9.1f} '
+                  f'{result["p50"] * 1000:>8.2f} '
+                  f'{result["p95"] * 1000:>8.2f} '
+                  f'{result["p99"] * 1000:>8.2f} '
+                  f'{format_size(result["peak_memory"]):>9}')
+
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--requests', type=int, default=500,
+                        help='Requests per scenario (Default: 500)')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Simulated server latency in seconds')
+    parser.add_argument('--compression', choices=('gzip', 'deflate', 'br'),
+                        help='Have the server compress response bodies')
+    parser.add_argument('--quick', action='store_true',
+                        help='Only run the small scenarios')
+    parser.add_argument('--no-memory', action='store_true',
+                        help="Don't measure peak memory, skips the second "
+                             "(traced) pass of every scenario")
+    parser.add_argument('--json', metavar='PATH',
+                        help='Also write the results to a JSON file')
+    arguments = parser.parse_args()
+
+    output = asyncio.run(main(arguments))
+
+    if arguments.json:
+        with open(arguments.json, 'w') as f:
+            json.dump(output, f, indent=2)
@@ -10,5 +10,13 @@ An asynchronous wrapper for the World of Warcraft API
 """
 
 from .api import *
+from .cache import *
+from .circuit import *
+from .columnar import *
+from .hooks import *
+from .metrics import *
+from .ratelimit import *
 from .regions import *
+from .tokens import *
+from .transport import *
 from .wowapi import *
@@ -1,11 +1,106 @@
 import asyncio
+import json
+import time
+import uuid
+from concurrent.futures import Executor
 from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
 from types import TracebackType
-from typing import Union, Optional, Type, Dict, Any
+from typing import Union, Optional, Type, Dict, Any, List, Callable, \
+    Tuple
 
 import aiohttp
+from multidict import CIMultiDict
 
+from .cache import CacheBackend, CacheEntry, DEFAULT_CACHE_TTL, \
+    CACHED_HEADERS, cache_key, get_cache_ttl
+from .circuit import CircuitBreaker, get_circuit_key
+from .hooks import RequestHooks, RequestContext
+from .ratelimit import RateLimiter
 from .regions import APIRegion
+from .tokens import TokenStore
+from .transport import Transport, AiohttpTransport, decompress_body
+
+
+def decode_json(body: bytes,
+                transform: Optional[Callable[[Any], Any]] = None,
+                content_encoding: Optional[str] = None) -> Any:
+    """Decompresses & decodes a JSON response body then optionally applies
+    a transform to the result, this is what runs inside the decode executor
+    for large bodies
+
+    :param body: The response body
+    :type body: bytes
+    :param transform: A callable applied to the decoded JSON,
+        defaults to None
+    :type transform: Callable, optional
+    :param content_encoding: The Content-Encoding of the body,
+        defaults to None
+    :type content_encoding: str, optional
+    :return: The decoded (and transformed) response body
+    :rtype: Any
+    """
+    return _decode_body(body, transform, content_encoding)[0]
+
+
+def _decode_body(body: bytes,
+                 transform: Optional[Callable[[Any], Any]],
+                 content_encoding: Optional[str]) -> Tuple[Any, int]:
+    # Also returns the decompressed size of the body, for our metrics
+    body = decompress_body(body, content_encoding)
+    data = json.loads(body)
+
+    if transform is not None:
+        data = transform(data)
+
+    return data, len(body)
+
+
+class APIResponse:
+    """A completed API response, as returned by API.get_resource_response
+
+    :param status: The HTTP status of the response
+    :type status: int
+    :param headers: The response headers
+    :type headers: CIMultiDict
+    :param data: The decoded (and transformed) response body, None unless
+        the status is 200
+    :type data: Any
+    """
+
+    __slots__ = ('status', 'headers', 'data')
+
+    def __init__(self, status: int, headers: CIMultiDict, data: Any):
+        """Constructor method
+        """
+        self.status: int = status
+        self.headers: CIMultiDict = headers
+        self.data: Any = data
+
+    @property
+    def not_modified(self) -> bool:
+        """Whether the server answered a conditional request with 304 Not
+        Modified
+
+        :rtype: bool
+        """
+        return self.status == 304
+
+    @property
+    def last_modified(self) -> Optional[datetime]:
+        """The parsed Last-Modified header of the response
+
+        :return: The time the resource was last modified, None if unknown
+        :rtype: datetime, none
+        """
+        value = self.headers.get('Last-Modified')
+        if value is None:
+            return None
+
+        try:
+            return parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
 
 
 class API:
@@ -17,7 +112,20 @@ class API:
                  max_parallel_requests: Optional[int] = None,
                  max_request_retries: Optional[int] = None,
                  request_retry_delay: Optional[int] = None,
-                 request_debugging: Optional[bool] = None):
+                 request_debugging: Optional[bool] = None,
+                 hooks: Optional[List[RequestHooks]] = None,
+                 api_hostname: Optional[str] = None,
+                 oauth_hostname: Optional[str] = None,
+                 transport: Optional[Transport] = None,
+                 decode_offload_threshold: Optional[int] = None,
+                 decode_executor: Optional[Executor] = None,
+                 decompress_offload_threshold: Optional[int] = 1024 * 1024,
+                 cache: Optional[CacheBackend] = None,
+                 cache_ttl: Optional[Dict[str, float]] = None,
+                 token_store: Optional[TokenStore] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 stale_while_revalidate: Optional[float] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None):
         """A class with methods for interacting with Battle.net's various APIs
 
         :param client_id: Battle.net Project Client ID -
@@ -41,6 +149,63 @@ class API:
         :param request_debugging: Whether aiohttp request exceptions are
             or return None (Default: False)
         :type request_debugging: bool, optional
+        :param hooks: Request lifecycle hooks, e.g. a MetricsCollector
+            (Default: None)
+        :type hooks: List[RequestHooks], optional
+        :param api_hostname: Overrides the region's Game API hostname, e.g.
+            to point the client at aiowowapi.testing.MockBattleNetServer
+            (Default: None)
+        :type api_hostname: str, optional
+        :param oauth_hostname: Overrides the region's OAuth API hostname
+            (Default: None)
+        :type oauth_hostname: str, optional
+        :param transport: The transport used to send requests, e.g. a
+            RecordingTransport or ReplayTransport
+            (Default: AiohttpTransport())
+        :type transport: Transport, optional
+        :param decode_offload_threshold: Response bodies of at least this
+            many bytes are decoded in the decode executor instead of on the
+            event loop, None keeps all decoding inline (Default: None)
+        :type decode_offload_threshold: int, optional
+        :param decode_executor: The executor used for decoding large
+            response bodies, None uses the event loop's default executor.
+            JSON decoding holds the GIL, so to keep the event loop responsive
+            use a ProcessPoolExecutor, ideally along with a transform which
+            shrinks the result (e.g. to_auction_columns) (Default: None)
+        :type decode_executor: concurrent.futures.Executor, optional
+        :param decompress_offload_threshold: Compressed response bodies of at
+            least this many bytes are decompressed in the event loop's
+            default executor, None keeps decompression inline. Bodies handed
+            to the decode executor are decompressed there (Default: 1 MiB)
+        :type decompress_offload_threshold: int, optional
+        :param cache: Where successful GET responses are cached, e.g. a
+            MemoryCache or a SQLiteCache shared by several processes, None
+            disables caching (Default: None)
+        :type cache: CacheBackend, optional
+        :param cache_ttl: How long responses are cached for in seconds, by
+            namespace prefix, the longest matching prefix wins & responses
+            without a match aren't cached
+            (Default: {'static-': 604800})
+        :type cache_ttl: dict, optional
+        :param token_store: Shares access tokens with other API instances,
+            e.g. a SQLiteTokenStore shared by every worker process on a node,
+            so only one of them fetches a new token when it expires
+            (Default: None)
+        :type token_store: TokenStore, optional
+        :param rate_limiter: Paces requests to stay within the API quota,
+            e.g. a SQLiteRateLimiter shared by every process using the same
+            credentials. max_parallel_requests only limits concurrency
+            (Default: None)
+        :type rate_limiter: RateLimiter, optional
+        :param stale_while_revalidate: Seconds past their TTL for which
+            cached responses are still served, immediately, while a single
+            background request refreshes them. None always waits for a fresh
+            response once the TTL has passed (Default: None)
+        :type stale_while_revalidate: float, optional
+        :param circuit_breaker: Fails requests to a degraded host & endpoint
+            family fast instead of retrying them, serving cached responses
+            however stale they are when there's one (Default: None)
+        :type circuit_breaker: CircuitBreaker, optional
         """
 
         # Required Params
@@ -50,27 +215,63 @@ class API:
         self.__client_locale: str = \
             self.__client_region.value['supported_locales'][0]
 
+        # Hostname overrides, these take precedence over the region's own
+        self.__api_hostname: Optional[str] = api_hostname
+        self.__oauth_hostname: Optional[str] = oauth_hostname
+
         # Access Tokens
         self.__access_tokens: Dict[str, Dict[str, Any]] = {}
+        self.__access_token_lock: asyncio.Lock = asyncio.Lock()
+        self.__token_store: Optional[TokenStore] = token_store
+        self.__token_owner: str = uuid.uuid4().hex
 
         # Optional Params
+        self.__max_parallel_requests: int = max_parallel_requests if \
+            (max_parallel_requests is not None) else 50
+
         self.__semaphore: asyncio.Semaphore = asyncio.Semaphore(
-            max_parallel_requests if max_parallel_requests is not None else 50
+            self.__max_parallel_requests
         )
 
+        # The number of requests currently holding a semaphore slot
+        self.__active_requests: int = 0
+
         self.__max_request_retries: int = max_request_retries if \
-            (max_request_retries is not None) and (max_request_retries > 1) \
+            (max_request_retries is not None) and (max_request_retries >= 1) \
             else 3
 
         self.__request_retry_delay: int = request_retry_delay if \
-            (request_retry_delay is not None) and (request_retry_delay > 0) \
+            (request_retry_delay is not None) and (request_retry_delay >= 0) \
             else 1
 
         self.__request_debugging: bool = request_debugging if \
             (request_debugging is not None) else True
 
+        self.__hooks: List[RequestHooks] = list(hooks) if \
+            (hooks is not None) else []
+
+        self.__rate_limiter: Optional[RateLimiter] = rate_limiter
+        self.__circuit_breaker: Optional[CircuitBreaker] = circuit_breaker
+
+        self.__decode_offload_threshold: Optional[int] = \
+            decode_offload_threshold
+        self.__decode_executor: Optional[Executor] = decode_executor
+        self.__decompress_offload_threshold: Optional[int] = \
+            decompress_offload_threshold
+
+        # Response Caching
+        self.__cache: Optional[CacheBackend] = cache
+        self.__cache_ttl: Dict[str, float] = dict(cache_ttl) if \
+            (cache_ttl is not None) else dict(DEFAULT_CACHE_TTL)
+        self.__stale_while_revalidate: Optional[float] = \
+            stale_while_revalidate
+
+        # Background refreshes of stale cache entries, by cache key
+        self.__revalidations: Dict[str, asyncio.Task] = {}
+
         # HTTP Client Stuff
-        self.__session: Optional[aiohttp.ClientSession] = None
+        self.__transport: Transport = transport if \
+            (transport is not None) else AiohttpTransport()
 
         self.__is_context_manager: bool = False
 
@@ -88,21 +289,30 @@ class API:
         # Flag for if we're using a context manager
         self.__is_context_manager = True
 
-        # Create the aiohttp session
-        if self.__session is None or self.__session.closed is True:
-            self.__session = aiohttp.ClientSession()
+        # Open the transport (creates the aiohttp session)
+        if self.__transport.closed:
+            await self.__transport.open()
 
         return self
 
     async def __aexit__(self, exc_type: Optional[Type[BaseException]],
                         exc_val: Optional[BaseException],
                         exc_tb: Optional[TracebackType]) -> None:
+        # Let background refreshes finish while the transport is still open
+        if self.__revalidations:
+            await asyncio.gather(*self.__revalidations.values(),
+                                 return_exceptions=True)
+
         # Flag for if we're using a context manager
         self.__is_context_manager = False
 
-        # Close the aiohttp session
-        if self.__session is not None and self.__session.closed is False:
-            await self.__session.close()
+        # Close the transport (closes the aiohttp session)
+        if not self.__transport.closed:
+            await self.__transport.close()
+
+        # Persist any buffered cache writes
+        if self.__cache is not None:
+            await self.__cache.flush()
 
     def get_region(self) -> str:
         """Returns the current region being used for API requests
@@ -173,12 +383,64 @@ class API:
                     locale, self.__client_region.name,
                     self.__client_region.value['supported_locales']))
 
+    def add_hook(self, hook: RequestHooks) -> None:
+        """Registers a request lifecycle hook
+
+        :param hook: The hook to register
+        :type hook: RequestHooks
+        """
+        self.__hooks.append(hook)
+
+    def get_hooks(self) -> List[RequestHooks]:
+        """Returns the registered request lifecycle hooks
+
+        :return: The registered request lifecycle hooks
+        :rtype: List[RequestHooks]
+        """
+        return self.__hooks
+
+    def get_cache(self) -> Optional[CacheBackend]:
+        """Returns the response cache, if any
+
+        :return: The response cache
+        :rtype: CacheBackend, none
+        """
+        return self.__cache
+
+    def get_rate_limiter(self) -> Optional[RateLimiter]:
+        """Returns the rate limiter, if any
+
+        :return: The rate limiter
+        :rtype: RateLimiter, none
+        """
+        return self.__rate_limiter
+
+    def get_circuit_breaker(self) -> Optional[CircuitBreaker]:
+        """Returns the circuit breaker used for requests
+
+        :return: The circuit breaker, None if there's none
+        :rtype: CircuitBreaker, none
+        """
+        return self.__circuit_breaker
+
+    def get_available_request_slots(self) -> int:
+        """Returns the number of requests which can be started right now
+        without waiting for a free slot
+
+        :return: The number of free request slots
+        :rtype: int
+        """
+        return self.__max_parallel_requests - self.__active_requests
+
     def get_hostname(self) -> str:
         """Returns the current region's hostname for Game API requests
 
         :return: The current region's hostname for Game API requests
         :rtype: str
         """
+        if self.__api_hostname is not None:
+            return self.__api_hostname
+
         return self.__client_region.value['game_api_hostname']
 
     def get_oauth_hostname(self) -> str:
@@ -187,6 +449,9 @@ class API:
         :return: The current region's hostname for OAuth API requests
         :rtype: str
         """
+        if self.__oauth_hostname is not None:
+            return self.__oauth_hostname
+
         return self.__client_region.value['oauth_api_hostname']
 
     async def get_access_token(self) -> str:
@@ -200,41 +465,109 @@ class API:
         """
 
         # If we have an access token and it's not expired, return it
-        # Otherwise, generate a new one
+        token = self.__get_cached_access_token()
+        if token is not None:
+            return token
+
+        # Otherwise, generate a new one. Only one request at a time does so,
+        # the others wait for it & reuse its token
+        async with self.__access_token_lock:
+            token = self.__get_cached_access_token()
+            if token is not None:
+                return token
+
+            token_store = self.__token_store
+            if token_store is None:
+                return await self.__request_access_token()
+
+            return await self.__get_shared_access_token(token_store)
+
+    def __get_cached_access_token(self) -> Optional[str]:
+        # The token cached by this instance, if it hasn't expired
         if self.__client_region.name in self.__access_tokens and \
                 self.__access_tokens[self.__client_region.name][
                     'Expires'] > datetime.now():
             return self.__access_tokens[self.__client_region.name]['Token']
-        else:
-            endpoint = f"/oauth/token"
 
-            hostname = self.get_oauth_hostname()
+        return None
+
+    async def __get_shared_access_token(self, token_store: TokenStore
+                                        ) -> str:
+        # Tokens are shared per client id & region, only whoever holds the
+        # refresh lease fetches a new one while the others wait for it
+        key = f"{self.__client_id}:{self.__client_region.name}"
+        give_up_at = time.monotonic() + 30
+
+        while True:
+            token = await self.__get_stored_access_token(token_store, key)
+            if token is not None:
+                return token
+
+            if await token_store.acquire_refresh(
+                    key, self.__token_owner, 30) or \
+                    time.monotonic() >= give_up_at:
+                break
+
+            await asyncio.sleep(0.1)
+
+        try:
+            # The previous lease holder may have stored a token between our
+            # last look & us acquiring the lease
+            token = await self.__get_stored_access_token(token_store, key)
+            if token is not None:
+                return token
+
+            token = await self.__request_access_token()
+            expires = self.__access_tokens[self.__client_region.name][
+                'Expires']
+            await token_store.set(key, token, expires.timestamp() + 60)
+            return token
+        finally:
+            await token_store.release_refresh(key, self.__token_owner)
+
+    async def __get_stored_access_token(self, token_store: TokenStore,
+                                        key: str) -> Optional[str]:
+        stored = await token_store.get(key)
+
+        # Tokens are considered expired a minute early, like our own
+        if stored is None or stored[1] - 60 <= time.time():
+            return None
+
+        self.__access_tokens[self.__client_region.name] = {
+            'Token': stored[0],
+            'Expires': datetime.fromtimestamp(stored[1] - 60)}
+        return stored[0]
 
-            params = {'grant_type': 'client_credentials'}
+    async def __request_access_token(self) -> str:
+        endpoint = f"/oauth/token"
 
-            # Make the POST request to the OAuth API
-            data = await self.get_resource(hostname, endpoint, params,
-                                           auth=aiohttp.BasicAuth(
-                                               self.__client_id,
-                                               self.__client_secret),
-                                           method="POST")
+        hostname = self.get_oauth_hostname()
 
-            # If we got None as a response, raise an exception
-            if data is None:
-                raise AccessTokenException(
-                    'Failed to retrieve an access token, verify your '
-                    'credentials & internet connectivity.')
+        params = {'grant_type': 'client_credentials'}
 
-            # Calculate the new token expiry time, to be safe we'll subtract
-            # 1 minute from the expiry time returned by the API
-            expires = datetime.now() + timedelta(
-                seconds=data['expires_in'] - 60)
+        # Make the POST request to the OAuth API
+        data = await self.get_resource(hostname, endpoint, params,
+                                       auth=aiohttp.BasicAuth(
+                                           self.__client_id,
+                                           self.__client_secret),
+                                       method="POST")
 
-            # Store the new token in our dictionary
-            self.__access_tokens[self.__client_region.name] = {
-                'Token': data['access_token'], 'Expires': expires}
+        # If we got None as a response, raise an exception
+        if data is None:
+            raise AccessTokenException(
+                'Failed to retrieve an access token, verify your '
+                'credentials & internet connectivity.')
 
-            return self.__access_tokens[self.__client_region.name]['Token']
+        # Calculate the new token expiry time, to be safe we'll subtract
+        # 1 minute from the expiry time returned by the API
+        expires = datetime.now() + timedelta(
+            seconds=data['expires_in'] - 60)
+
+        # Store the new token in our dictionary
+        self.__access_tokens[self.__client_region.name] = {
+            'Token': data['access_token'], 'Expires': expires}
+
+        return self.__access_tokens[self.__client_region.name]['Token']
 
     @staticmethod
     async def multi_request(requests: list) -> Optional[Union[tuple, list]]:
@@ -259,7 +592,8 @@ class API:
                            headers: Optional[dict] = None,
                            auth: Optional[aiohttp.BasicAuth] = None,
                            method: Optional[str] = "GET",
-                           ) -> Optional[dict]:
+                           transform: Optional[Callable[[Any], Any]] = None
+                           ) -> Optional[Any]:
         """Make an API request and return the response as a JSON dictionary
 
         :param hostname: The hostname to make the request to
@@ -278,87 +612,393 @@ class API:
         :param method: The HTTP method to use for the request,
             defaults to "GET"
         :type method: str, optional
+        :param transform: A callable applied to the decoded JSON, it runs in
+            the decode executor along with decoding for large bodies so it
+            must be picklable when using a ProcessPoolExecutor,
+            defaults to None
+        :type transform: Callable, optional
         :raises RequestMethodException: Raised when an invalid HTTP request
             method is selected.
         :raises RequestException: Raised when we encounter an issue when making
             an aiohttp request.
-        :return: The response from the API as a JSON dictionary
+        :return: The response from the API as a JSON dictionary, or the
+            result of transform
         :rtype: dict, none
         """
+        response = await self.get_resource_response(hostname, api_endpoint,
+                                                    params, headers, auth,
+                                                    method, transform)
+
+        return response.data if response is not None else None
+
+    async def get_resource_response(self,
+                                    hostname: str, api_endpoint: str,
+                                    params: Optional[dict] = None,
+                                    headers: Optional[dict] = None,
+                                    auth: Optional[aiohttp.BasicAuth] = None,
+                                    method: Optional[str] = "GET",
+                                    transform: Optional[
+                                        Callable[[Any], Any]] = None,
+                                    not_found_ok: bool = False
+                                    ) -> Optional[APIResponse]:
+        """Make an API request and return the response's status, headers &
+        decoded body. Unlike get_resource this exposes non-error responses
+        without a body, e.g. 304 Not Modified for conditional requests.
+
+        :param hostname: The hostname to make the request to
+        :type hostname: str
+        :param api_endpoint: The API endpoint following the regional hostname
+            we wish to send a request to.
+        :type api_endpoint: str
+        :param params: The additional arguments/parameters we need to send with
+            the request, defaults to None
+        :type params: dict, optional
+        :param headers: Any header information to send with our request
+        :type headers: dict, optional
+        :param auth: The aiohttp BasicAuth object to use for authentication,
+            defaults to None
+        :type auth: aiohttp.BasicAuth, optional
+        :param method: The HTTP method to use for the request,
+            defaults to "GET"
+        :type method: str, optional
+        :param transform: A callable applied to the decoded JSON, it runs in
+            the decode executor along with decoding for large bodies so it
+            must be picklable when using a ProcessPoolExecutor,
+            defaults to None
+        :type transform: Callable, optional
+        :param not_found_ok: Return 404 Not Found as a response (with no
+            data), without retrying, instead of treating it as a failure,
+            defaults to False
+        :type not_found_ok: bool, optional
+        :raises RequestMethodException: Raised when an invalid HTTP request
+            method is selected.
+        :raises RequestException: Raised when we encounter an issue when making
+            an aiohttp request.
+        :raises CircuitOpenException: Raised when the request's circuit is
+            open & there's no cached response to fall back to.
+        :return: The response, None if the request failed
+        :rtype: APIResponse, none
+        """
+        method = method if (method is not None) else "GET"
+
+        # The request context is shared with any registered hooks
+        context = RequestContext(method, hostname, api_endpoint)
+
+        # Only successful GET requests are cached, and only for namespaces
+        # with a TTL
+        key: Optional[str] = None
+        ttl = 0.0
+        fallback: Optional[CacheEntry] = None
+        if self.__cache is not None and method.upper() == "GET":
+            ttl = get_cache_ttl(params, self.__cache_ttl)
+            if ttl > 0:
+                key = cache_key(api_endpoint, params)
+                entry = fallback = await self.__cache.get(key)
+                stale = entry is not None and entry.expired
+                if entry is not None and stale and \
+                        (self.__stale_while_revalidate is None or
+                         time.time() > entry.expires_at +
+                         self.__stale_while_revalidate):
+                    entry = None
+
+                if entry is not None:
+                    cached = await self.__serve_cached(context, key, entry,
+                                                       transform)
+                    if cached is not None:
+                        if stale:
+                            self.__revalidate(key, ttl, hostname,
+                                              api_endpoint, params, headers,
+                                              auth, method)
+                        return cached
+
+        # While a circuit is open its requests fail fast, falling back to
+        # whatever we have cached
+        if self.__circuit_breaker is not None and \
+                not self.__circuit_breaker.allow(
+                    get_circuit_key(hostname, api_endpoint, params)):
+            if key is not None and fallback is not None:
+                cached = await self.__serve_cached(context, key, fallback,
+                                                   transform)
+                if cached is not None:
+                    return cached
+
+            if self.__request_debugging:
+                raise CircuitOpenException(
+                    'Circuit open for {}, not sending the request'.format(
+                        hostname.format(api_endpoint=api_endpoint)))
+            return None
+
+        return await self.__send(context, hostname, api_endpoint, params,
+                                 headers, auth, method, transform, key, ttl,
+                                 not_found_ok)
+
+    def __revalidate(self, key: str, ttl: float,
+                     hostname: str, api_endpoint: str,
+                     params: Optional[dict],
+                     headers: Optional[dict],
+                     auth: Optional[aiohttp.BasicAuth],
+                     method: str) -> None:
+        # Refreshes a stale cache entry in the background, at most one
+        # refresh runs per entry however many callers were served it
+        if key in self.__revalidations:
+            return
+
+        async def revalidate() -> None:
+            try:
+                # The stale entry is good enough while the circuit is open
+                if self.__circuit_breaker is not None and \
+                        not self.__circuit_breaker.allow(get_circuit_key(
+                            hostname, api_endpoint, params)):
+                    return
+
+                context = RequestContext(method, hostname, api_endpoint)
+                # The response is only wanted for the cache, so the
+                # caller's transform isn't applied
+                await self.__send(context, hostname, api_endpoint, params,
+                                  headers, auth, method, None, key, ttl)
+            except (aiohttp.ClientError, ApiException):
+                # The stale entry keeps being served until a refresh works
+                pass
+            finally:
+                self.__revalidations.pop(key, None)
+
+        self.__revalidations[key] = asyncio.ensure_future(revalidate())
+
+    async def __send(self, context: RequestContext,
+                     hostname: str, api_endpoint: str,
+                     params: Optional[dict],
+                     headers: Optional[dict],
+                     auth: Optional[aiohttp.BasicAuth],
+                     method: str,
+                     transform: Optional[Callable[[Any], Any]],
+                     key: Optional[str],
+                     ttl: float,
+                     not_found_ok: bool = False) -> Optional[APIResponse]:
+        queued_at = time.perf_counter()
 
         # Use a semaphore to limit the number of concurrent requests
         async with self.__semaphore:
+            context.queue_wait = time.perf_counter() - queued_at
+            self.__active_requests += 1
+            self.__dispatch_hook('on_request_start', context)
+
+            try:
+                return await self.__make_request(context, hostname,
+                                                 api_endpoint, params,
+                                                 headers, auth, method,
+                                                 transform, key, ttl,
+                                                 not_found_ok)
+            finally:
+                self.__active_requests -= 1
+
+                # If the user is not using a context manager, we'll close
+                # the transport once the last in-flight request is done
+                # with it
+                if (self.__is_context_manager is False and
+                        self.__active_requests == 0 and
+                        not self.__transport.closed):
+                    await self.__transport.close()
+
+                self.__dispatch_hook('on_request_end', context)
+
+    async def __serve_cached(self, context: RequestContext, key: str,
+                             entry: CacheEntry,
+                             transform: Optional[Callable[[Any], Any]]
+                             ) -> Optional[APIResponse]:
+        # A corrupt entry is dropped & the request goes to the network
+        try:
+            data, _ = await self.__decode(
+                entry.body, entry.headers.get('Content-Encoding'), transform)
+        except (ValueError, aiohttp.ClientPayloadError):
+            cache = self.__cache
+            if cache is not None:
+                await cache.delete(key)
+            return None
 
-            # This is for counting the num of retries to a failed request
-            current_attempt: int = 1
-
-            # If the user isn't using a context manager, we'll need to create
-            # an aiohttp session for them
-            if (self.__session is None or self.__session.closed is True) and \
-                    self.__is_context_manager is False:
-                self.__session = aiohttp.ClientSession()
-
-            # Our result variable, we'll use this to store the response from
-            # the API
-            result: Optional[Dict] = None
-
-            # This while loop handles the retry logic for failed requests
-            while (current_attempt <= self.__max_request_retries) and \
-                    (result is None):
-                try:
-                    # Since parts of the API require a different HTTP method
-                    # we'll handle that here with the optional method kwarg
-                    supported_methods = {
-                        "GET": self.__session.get,
-                        "POST": self.__session.post,
-                    }
-
-                    # If the user has selected an invalid HTTP method, we'll
-                    # raise an exception
-                    if method.upper() not in supported_methods:
-                        raise RequestMethodException(
-                            'Invalid HTTP request method {}, supported '
-                            'methods are {}'.format(
-                                method, list(supported_methods.keys())))
-
-                    # Make the request
-                    async with supported_methods[method](
-                            hostname.format(api_endpoint=api_endpoint),
-                            params=params,
-                            auth=auth,
-                            headers=headers
-                    ) as response:
-
-                        # If the response is successful, we'll return the
-                        # response as a JSON dictionary
-                        if response.status == 200:
-                            result = await response.json()
-
-                        response.raise_for_status()
-
-                    # If the user is not using a context manager, we'll close
-                    # the session
-                    if (self.__session is not None and
-                            self.__is_context_manager is False and
-                            self.__session.closed is False):
-                        await self.__session.close()
-
-                except aiohttp.ClientError:
-                    # If we encounter an aiohttp exception, we'll increment
-                    # the current attempt and try again
-                    if current_attempt == self.__max_request_retries:
-                        # If the user enabled debugging we'll raise the
-                        # exception after the nth attempt, and otherwise
-                        # we'll just return None
-                        if self.__request_debugging:
-                            raise
-                        return result
-
-                    current_attempt += 1
-
-                    await asyncio.sleep(self.__request_retry_delay)
-
-            return result
+        # Cache hits don't need a request slot, but still go through the
+        # request lifecycle hooks
+        context.status = 200
+        context.cached = True
+        self.__dispatch_hook('on_request_start', context)
+        self.__dispatch_hook('on_cache_hit', context)
+        self.__dispatch_hook('on_request_end', context)
+
+        return APIResponse(200, CIMultiDict(entry.headers), data)
+
+    def __dispatch_hook(self, name: str, context: RequestContext) -> None:
+        # Calls the named hook on every registered hook object
+        for hook in self.__hooks:
+            getattr(hook, name)(context)
+
+    async def __make_request(self,
+                             context: RequestContext,
+                             hostname: str, api_endpoint: str,
+                             params: Optional[dict],
+                             headers: Optional[dict],
+                             auth: Optional[aiohttp.BasicAuth],
+                             method: str,
+                             transform: Optional[Callable[[Any], Any]],
+                             key: Optional[str] = None,
+                             ttl: float = 0.0,
+                             not_found_ok: bool = False
+                             ) -> Optional[APIResponse]:
+        # If the user isn't using a context manager, we'll need to open
+        # the transport (aiohttp session) for them
+        if self.__transport.closed and self.__is_context_manager is False:
+            await self.__transport.open()
+
+        # Our result variable, we'll use this to store the response from
+        # the API
+        result: Optional[APIResponse] = None
+
+        circuit_breaker = self.__circuit_breaker
+        circuit = get_circuit_key(hostname, api_endpoint, params) if \
+            (circuit_breaker is not None) else None
+
+        # This while loop handles the retry logic for failed requests, the
+        # context keeps count of the current attempt
+        while (context.attempt <= self.__max_request_retries) and \
+                (result is None):
+            try:
+                # Since parts of the API require a different HTTP method
+                # we'll handle that here with the optional method kwarg
+                supported_methods = ("GET", "POST")
+
+                # If the user has selected an invalid HTTP method, we'll
+                # raise an exception
+                if method.upper() not in supported_methods:
+                    raise RequestMethodException(
+                        'Invalid HTTP request method {}, supported '
+                        'methods are {}'.format(
+                            method, list(supported_methods)))
+
+                # Every attempt counts against the quota, OAuth requests
+                # (the only ones using basic auth) don't
+                if self.__rate_limiter is not None and auth is None:
+                    await self.__rate_limiter.acquire()
+
+                # Make the request
+                sent_at = time.perf_counter()
+                response = await self.__transport.request(
+                    method.upper(),
+                    hostname.format(api_endpoint=api_endpoint),
+                    params=params,
+                    headers=headers,
+                    auth=auth
+                )
+
+                context.status = response.status
+                context.latency = time.perf_counter() - sent_at
+                context.bytes_received = len(response.body)
+                context.bytes_decompressed = 0
+                context.decode_time = 0.0
+
+                # If the response is successful, we'll return the
+                # response as a JSON dictionary
+                data: Any = None
+                if response.status == 200:
+                    decode_started = time.perf_counter()
+                    try:
+                        data, context.bytes_decompressed = \
+                            await self.__decode(
+                                response.body,
+                                response.headers.get('Content-Encoding'),
+                                transform)
+                    except ValueError as e:
+                        raise aiohttp.ClientPayloadError(
+                            'Invalid JSON response body') from e
+                    context.decode_time = \
+                        time.perf_counter() - decode_started
+
+                self.__dispatch_hook('on_response', context)
+
+                # Only server errors say the API is degraded
+                if circuit_breaker is not None and circuit is not None:
+                    if response.status >= 500:
+                        circuit_breaker.record_failure(circuit)
+                    else:
+                        circuit_breaker.record_success(circuit)
+
+                if response.status == 429:
+                    self.__dispatch_hook('on_rate_limited', context)
+
+                # A 404 is a definitive answer, callers wanting to tell it
+                # apart from a failed request can ask for it as a response
+                if response.status != 404 or not not_found_ok:
+                    response.raise_for_status()
+
+                # Any other non-error status (e.g. 304) ends the request too
+                result = APIResponse(response.status, response.headers, data)
+
+                # Cache the body as received, cache hits are decoded (and
+                # transformed) just like a fresh response
+                cache = self.__cache
+                if cache is not None and key is not None and \
+                        response.status == 200:
+                    await cache.set(key, CacheEntry(
+                        response.body,
+                        {name: response.headers[name]
+                         for name in CACHED_HEADERS
+                         if name in response.headers},
+                        time.time() + ttl))
+
+            except aiohttp.ClientError as e:
+                # If we encounter an aiohttp exception, we'll increment
+                # the current attempt and try again
+                context.exception = e
+
+                # Timeouts & connection errors count against the circuit,
+                # responses were recorded above
+                if circuit_breaker is not None and circuit is not None and \
+                        not isinstance(e, aiohttp.ClientResponseError):
+                    circuit_breaker.record_failure(circuit)
+
+                # Nor will retrying while the circuit is open
+                circuit_open = circuit_breaker is not None and \
+                    circuit is not None and circuit_breaker.is_open(circuit)
+
+                if context.attempt == self.__max_request_retries or \
+                        circuit_open:
+                    # If the user enabled debugging we'll raise the
+                    # exception after the nth attempt, and otherwise
+                    # we'll just return None
+                    if self.__request_debugging:
+                        raise
+                    return result
+
+                context.attempt += 1
+                context.retries += 1
+                self.__dispatch_hook('on_retry', context)
+
+                await asyncio.sleep(self.__request_retry_delay)
+
+        return result
+
+    async def __decode(self, body: bytes,
+                       content_encoding: Optional[str],
+                       transform: Optional[Callable[[Any], Any]]
+                       ) -> Tuple[Any, int]:
+        loop = asyncio.get_running_loop()
+
+        # Small bodies are decoded inline, large ones would block the event
+        # loop for too long so they're handed to the decode executor, still
+        # compressed as that's cheaper to pass to another process
+        if self.__decode_offload_threshold is not None and \
+                len(body) >= self.__decode_offload_threshold:
+            return await loop.run_in_executor(
+                self.__decode_executor, _decode_body, body, transform,
+                content_encoding)
+
+        # zlib & brotli release the GIL, so decompressing in a thread keeps
+        # the event loop responsive even though decoding happens inline
+        if content_encoding and \
+                self.__decompress_offload_threshold is not None and \
+                len(body) >= self.__decompress_offload_threshold:
+            body = await loop.run_in_executor(
+                None, decompress_body, body, content_encoding)
+            content_encoding = None
+
+        return _decode_body(body, transform, content_encoding)
 
 
 class ApiException(Exception):
@@ -408,6 +1048,17 @@ class RequestMethodException(ApiException):
         super().__init__(message)
 
 
+class CircuitOpenException(ApiException):
+    """Exception thrown when a request is rejected by an open circuit
+
+    :param message: Description of the occurring error
+    :type message: str, optional
+    """
+
+    def __init__(self, message: str = "Circuit open, request not sent"):
+        super().__init__(message)
+
+
 class InvalidRegionException(ApiException):
     """Exception thrown when an invalid/unsupported API Region is provided
 
@@ -0,0 +1,423 @@
+import asyncio
+import json
+import sqlite3
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List, Tuple, Mapping, Hashable
+
+
+# How long responses are cached for by default, by namespace prefix. Static
+# namespaces only change with game patches, everything else isn't cached
+DEFAULT_CACHE_TTL: Dict[str, float] = {'static-': 7 * 24 * 60 * 60}
+
+# The response headers kept along with a cached body
+CACHED_HEADERS = ('Content-Encoding', 'Last-Modified')
+
+
+def _first_value(value: object) -> Optional[str]:
+    # Parts of the wrapper pass single item tuples as parameter values
+    if isinstance(value, (tuple, list)):
+        value = value[0] if value else None
+
+    return None if value is None else str(value)
+
+
+def cache_key(api_endpoint: str, params: Optional[dict] = None) -> str:
+    """Builds the key a response is cached under, from its endpoint,
+    namespace, locale & any other query parameters
+
+    :param api_endpoint: The API endpoint following the regional hostname
+    :type api_endpoint: str
+    :param params: The query parameters of the request, defaults to None
+    :type params: dict, optional
+    :return: The cache key, e.g. static-us:en_US:/data/wow/item/19019
+    :rtype: str
+    """
+    params = dict(params or {})
+    namespace = _first_value(params.pop('namespace', None)) or ''
+    locale = _first_value(params.pop('locale', None)) or ''
+
+    key = f'{namespace}:{locale}:{api_endpoint}'
+
+    others = sorted((name, _first_value(value))
+                    for name, value in params.items() if value is not None)
+    if others:
+        key += '?' + '&'.join(f'{name}={value}' for name, value in others)
+
+    return key
+
+
+def get_cache_ttl(params: Optional[dict],
+                  cache_ttl: Mapping[str, float]) -> float:
+    """Returns how long a response should be cached for, based on the
+    longest namespace prefix in cache_ttl matching its namespace
+
+    :param params: The query parameters of the request
+    :type params: dict, optional
+    :param cache_ttl: Namespace prefixes mapped to a TTL in seconds
+    :type cache_ttl: Mapping[str, float]
+    :return: The TTL in seconds, 0 if it shouldn't be cached
+    :rtype: float
+    """
+    namespace = _first_value((params or {}).get('namespace'))
+    if namespace is None:
+        return 0
+
+    matches = [prefix for prefix in cache_ttl if namespace.startswith(prefix)]
+    if not matches:
+        return 0
+
+    return cache_ttl[max(matches, key=len)] or 0
+
+
+class CacheEntry:
+    """A cached response body, as received (possibly compressed)
+
+    :param body: The response body
+    :type body: bytes
+    :param headers: The response headers listed in CACHED_HEADERS
+    :type headers: dict
+    :param expires_at: The unix timestamp after which the entry is stale
+    :type expires_at: float
+    :param stored_at: The unix timestamp the entry was stored at,
+        defaults to now
+    :type stored_at: float, optional
+    """
+
+    __slots__ = ('body', 'headers', 'expires_at', 'stored_at')
+
+    def __init__(self, body: bytes, headers: Dict[str, str],
+                 expires_at: float, stored_at: Optional[float] = None):
+        """Constructor method
+        """
+        self.body: bytes = body
+        self.headers: Dict[str, str] = headers
+        self.expires_at: float = expires_at
+        self.stored_at: float = stored_at if \
+            (stored_at is not None) else time.time()
+
+    @property
+    def expired(self) -> bool:
+        """Whether the entry's TTL has passed
+
+        :rtype: bool
+        """
+        return time.time() >= self.expires_at
+
+
+class CacheBackend:
+    """Base class for response caches used by the API class. Backends return
+    entries even once they've expired, it's up to the caller to decide
+    whether a stale entry is still of use.
+    """
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        """Returns the entry stored under a key
+
+        :param key: The cache key, see cache_key
+        :type key: str
+        :return: The entry, None if there's none
+        :rtype: CacheEntry, none
+        """
+        raise NotImplementedError
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        """Stores an entry under a key, replacing any existing one
+
+        :param key: The cache key, see cache_key
+        :type key: str
+        :param entry: The entry to store
+        :type entry: CacheEntry
+        """
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        """Removes the entry stored under a key, if any
+
+        :param key: The cache key, see cache_key
+        :type key: str
+        """
+        raise NotImplementedError
+
+    async def clear(self) -> None:
+        """Removes every entry
+        """
+        raise NotImplementedError
+
+    async def flush(self) -> None:
+        """Persists any buffered writes
+        """
+
+    async def close(self) -> None:
+        """Persists any buffered writes & releases held resources
+        """
+
+
+class NotFoundCache:
+    def __init__(self, ttl: float = 60.0, max_entries: int = 10000):
+        """Remembers resources which were confirmed not to exist (404) for a
+        short while, so they aren't requested again & again
+
+        :param ttl: Seconds a 404 is remembered for (Default: 60)
+        :type ttl: float, optional
+        :param max_entries: The maximum number of 404s remembered, the oldest
+            ones are forgotten first (Default: 10000)
+        :type max_entries: int, optional
+        """
+        self.ttl: float = ttl
+        self.max_entries: int = max_entries
+        self.__expires: 'OrderedDict[Hashable, float]' = OrderedDict()
+
+    def __contains__(self, key: Hashable) -> bool:
+        expires_at = self.__expires.get(key)
+        if expires_at is None:
+            return False
+
+        if expires_at <= time.time():
+            del self.__expires[key]
+            return False
+
+        return True
+
+    def __len__(self) -> int:
+        return len(self.__expires)
+
+    def add(self, key: Hashable) -> None:
+        """Remembers a resource as not found
+
+        :param key: Identifies the resource
+        :type key: Hashable
+        """
+        self.__expires.pop(key, None)
+        self.__expires[key] = time.time() + self.ttl
+
+        while len(self.__expires) > self.max_entries:
+            self.__expires.popitem(last=False)
+
+    def discard(self, key: Hashable) -> None:
+        """Forgets a resource was not found
+
+        :param key: Identifies the resource
+        :type key: Hashable
+        """
+        self.__expires.pop(key, None)
+
+    def clear(self) -> None:
+        """Forgets every resource which was not found
+        """
+        self.__expires.clear()
+
+
+class MemoryCache(CacheBackend):
+    def __init__(self, max_entries: int = 1024):
+        """An in-process LRU cache
+
+        :param max_entries: The maximum number of entries kept, the least
+            recently used ones are evicted first (Default: 1024)
+        :type max_entries: int, optional
+        """
+        self.max_entries: int = max_entries
+        self.__entries: 'OrderedDict[str, CacheEntry]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self.__entries.get(key)
+        if entry is not None:
+            self.__entries.move_to_end(key)
+
+        return entry
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        self.__entries[key] = entry
+        self.__entries.move_to_end(key)
+
+        while len(self.__entries) > self.max_entries:
+            self.__entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self.__entries.pop(key, None)
+
+    async def clear(self) -> None:
+        self.__entries.clear()
+
+
+class SQLiteCache(CacheBackend):
+    def __init__(self, path: str,
+                 *,
+                 batch_size: int = 100,
+                 flush_interval: float = 1.0,
+                 compression_level: int = 6):
+        """A persistent cache stored in an SQLite database, which can be
+        shared by several processes.
+
+        The database runs in WAL mode so readers never block on a writer, and
+        writes are buffered then committed in batches of up to batch_size,
+        at most flush_interval seconds after they were made. Bodies which
+        weren't compressed by the server are zlib compressed. All database
+        access happens on a dedicated thread.
+
+        :param path: The database file, created if it doesn't exist
+        :type path: str
+        :param batch_size: The number of buffered writes which triggers a
+            commit (Default: 100)
+        :type batch_size: int, optional
+        :param flush_interval: The maximum number of seconds writes are
+            buffered for (Default: 1)
+        :type flush_interval: float, optional
+        :param compression_level: The zlib compression level (Default: 6)
+        :type compression_level: int, optional
+        """
+        self.path: str = path
+        self.batch_size: int = batch_size
+        self.flush_interval: float = flush_interval
+        self.compression_level: int = compression_level
+
+        self.__executor: Optional[ThreadPoolExecutor] = None
+        self.__connection: Optional[sqlite3.Connection] = None
+        self.__pending: Dict[str, Optional[CacheEntry]] = {}
+        self.__flush_handle: Optional[asyncio.TimerHandle] = None
+
+    async def __run(self, function, *args):
+        # Every database call is made from the same thread
+        if self.__executor is None:
+            self.__executor = ThreadPoolExecutor(
+                1, thread_name_prefix='aiowowapi-cache')
+
+        return await asyncio.get_running_loop().run_in_executor(
+            self.__executor, function, *args)
+
+    def __connect(self) -> sqlite3.Connection:
+        if self.__connection is None:
+            connection = sqlite3.connect(self.path, timeout=30,
+                                         check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, '
+                'body BLOB NOT NULL, '
+                'compressed INTEGER NOT NULL, '
+                'headers TEXT NOT NULL, '
+                'stored_at REAL NOT NULL, '
+                'expires_at REAL NOT NULL)')
+            connection.commit()
+            self.__connection = connection
+
+        return self.__connection
+
+    def __read(self, key: str) -> Optional[CacheEntry]:
+        row = self.__connect().execute(
+            'SELECT body, compressed, headers, stored_at, expires_at '
+            'FROM responses WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+
+        body, compressed, headers, stored_at, expires_at = row
+        if compressed:
+            body = zlib.decompress(body)
+
+        return CacheEntry(body, json.loads(headers), expires_at, stored_at)
+
+    def __write(self, batch: List[Tuple[str, Optional[CacheEntry]]]) -> None:
+        connection = self.__connect()
+        rows = []
+        deleted = []
+        for key, entry in batch:
+            if entry is None:
+                deleted.append((key,))
+                continue
+
+            # Don't compress bodies twice
+            compressed = 'Content-Encoding' not in entry.headers
+            body = zlib.compress(entry.body, self.compression_level) \
+                if compressed else entry.body
+            rows.append((key, body, int(compressed),
+                         json.dumps(entry.headers), entry.stored_at,
+                         entry.expires_at))
+
+        with connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+                rows)
+            connection.executemany('DELETE FROM responses WHERE key = ?',
+                                   deleted)
+
+    def __clear(self) -> None:
+        with self.__connect() as connection:
+            connection.execute('DELETE FROM responses')
+
+    def __purge(self, before: float) -> int:
+        with self.__connect() as connection:
+            return connection.execute(
+                'DELETE FROM responses WHERE expires_at < ?',
+                (before,)).rowcount
+
+    def __close(self) -> None:
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+
+    def __schedule_flush(self) -> None:
+        if self.__flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self.__flush_handle = loop.call_later(
+                self.flush_interval,
+                lambda: asyncio.ensure_future(self.flush()))
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        # Buffered writes haven't reached the database yet
+        if key in self.__pending:
+            return self.__pending[key]
+
+        return await self.__run(self.__read, key)
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        self.__pending[key] = entry
+
+        if len(self.__pending) >= self.batch_size:
+            await self.flush()
+        else:
+            self.__schedule_flush()
+
+    async def delete(self, key: str) -> None:
+        # None marks a buffered delete
+        self.__pending[key] = None
+        self.__schedule_flush()
+
+    async def clear(self) -> None:
+        self.__pending.clear()
+        await self.__run(self.__clear)
+
+    async def purge(self, max_stale: float = 0) -> int:
+        """Removes entries which expired over max_stale seconds ago
+
+        :param max_stale: How long in seconds expired entries are kept,
+            defaults to 0
+        :type max_stale: float, optional
+        :return: The number of entries removed
+        :rtype: int
+        """
+        await self.flush()
+        return await self.__run(self.__purge, time.time() - max_stale)
+
+    async def flush(self) -> None:
+        if self.__flush_handle is not None:
+            self.__flush_handle.cancel()
+            self.__flush_handle = None
+
+        if self.__pending:
+            batch = list(self.__pending.items())
+            self.__pending.clear()
+            await self.__run(self.__write, batch)
+
+    async def close(self) -> None:
+        await self.flush()
+
+        if self.__executor is not None:
+            await self.__run(self.__close)
+            self.__executor.shutdown()
+            self.__executor = None
@@ -0,0 +1,180 @@
+import time
+from typing import Optional, Dict, Tuple
+from urllib.parse import urlsplit
+
+
+# Circuit states
+CIRCUIT_CLOSED = 'closed'
+CIRCUIT_OPEN = 'open'
+CIRCUIT_HALF_OPEN = 'half-open'
+
+# Namespace prefixes & the endpoint family they belong to
+_NAMESPACE_FAMILIES = (('profile-', 'profile'), ('dynamic-', 'dynamic'),
+                       ('static-', 'static'))
+
+
+def get_circuit_key(hostname: str, api_endpoint: str,
+                    params: Optional[dict] = None) -> Tuple[str, str]:
+    """Returns the circuit a request belongs to: its host & endpoint family
+    (profile, dynamic, static or oauth), so an outage of e.g. the profile
+    API doesn't stop requests to static game data
+
+    :param hostname: The hostname template of the request, e.g.
+        https://us.api.blizzard.com{api_endpoint}
+    :type hostname: str
+    :param api_endpoint: The API endpoint of the request
+    :type api_endpoint: str
+    :param params: The request parameters, defaults to None
+    :type params: dict, optional
+    :return: (host, family)
+    :rtype: Tuple[str, str]
+    """
+    host = urlsplit(hostname.format(api_endpoint='')).netloc
+
+    namespace = (params or {}).get('namespace')
+    # Namespaces are sent as one element tuples by the endpoint classes
+    if isinstance(namespace, (tuple, list)):
+        namespace = namespace[0] if namespace else None
+
+    if isinstance(namespace, str):
+        for prefix, family in _NAMESPACE_FAMILIES:
+            if namespace.startswith(prefix):
+                return host, family
+
+    if api_endpoint.startswith('/oauth/'):
+        return host, 'oauth'
+    if api_endpoint.startswith('/profile/'):
+        return host, 'profile'
+
+    return host, 'other'
+
+
+class _Circuit:
+    # The state of a single circuit
+
+    __slots__ = ('state', 'failures', 'opened_at', 'probes')
+
+    def __init__(self) -> None:
+        self.state: str = CIRCUIT_CLOSED
+        self.failures: int = 0
+        self.opened_at: float = 0.0
+        self.probes: int = 0
+
+
+class CircuitBreaker:
+    def __init__(self,
+                 failure_threshold: int = 5,
+                 reset_timeout: float = 30.0,
+                 half_open_requests: int = 1):
+        """Stops sending requests to a degraded host & endpoint family.
+
+        A circuit opens after failure_threshold consecutive failures (server
+        errors, timeouts & connection errors). While open, requests fail
+        immediately instead of being retried, leaving the request slots to
+        healthy endpoints, and callers with a cached response are served it
+        however stale it is. After reset_timeout the circuit turns half-open
+        & lets half_open_requests probe requests through: a success closes
+        it, a failure opens it again.
+
+        :param failure_threshold: Consecutive failures opening a circuit
+            (Default: 5)
+        :type failure_threshold: int, optional
+        :param reset_timeout: Seconds a circuit stays open before probing
+            (Default: 30)
+        :type reset_timeout: float, optional
+        :param half_open_requests: Probe requests let through while half-open
+            (Default: 1)
+        :type half_open_requests: int, optional
+        """
+        self.failure_threshold: int = failure_threshold
+        self.reset_timeout: float = reset_timeout
+        self.half_open_requests: int = half_open_requests
+
+        self.__circuits: Dict[Tuple[str, str], _Circuit] = {}
+
+    def allow(self, key: Tuple[str, str]) -> bool:
+        """Whether a request may be sent on a circuit, counts as a probe
+        when the circuit is half-open
+
+        :param key: The circuit, see get_circuit_key
+        :type key: Tuple[str, str]
+        :rtype: bool
+        """
+        circuit = self.__circuits.get(key)
+        if circuit is None or circuit.state == CIRCUIT_CLOSED:
+            return True
+
+        now = time.monotonic()
+        if now - circuit.opened_at < self.reset_timeout:
+            if circuit.state == CIRCUIT_OPEN or \
+                    circuit.probes >= self.half_open_requests:
+                return False
+        else:
+            # Probes which never reported back (e.g. were cancelled) don't
+            # keep the circuit half-open forever
+            circuit.state = CIRCUIT_HALF_OPEN
+            circuit.opened_at = now
+            circuit.probes = 0
+
+        circuit.probes += 1
+        return True
+
+    def is_open(self, key: Tuple[str, str]) -> bool:
+        """Whether a circuit is rejecting requests, unlike allow this
+        doesn't take a probe
+
+        :param key: The circuit, see get_circuit_key
+        :type key: Tuple[str, str]
+        :rtype: bool
+        """
+        circuit = self.__circuits.get(key)
+        return circuit is not None and circuit.state == CIRCUIT_OPEN and \
+            time.monotonic() - circuit.opened_at < self.reset_timeout
+
+    def record_success(self, key: Tuple[str, str]) -> None:
+        """Records a successful request, closing the circuit
+
+        :param key: The circuit, see get_circuit_key
+        :type key: Tuple[str, str]
+        """
+        circuit = self.__circuits.get(key)
+        if circuit is not None:
+            circuit.state = CIRCUIT_CLOSED
+            circuit.failures = 0
+            circuit.probes = 0
+
+    def record_failure(self, key: Tuple[str, str]) -> None:
+        """Records a failed request, opening the circuit once there were
+        failure_threshold in a row or if it was half-open
+
+        :param key: The circuit, see get_circuit_key
+        :type key: Tuple[str, str]
+        """
+        circuit = self.__circuits.setdefault(key, _Circuit())
+        circuit.failures += 1
+
+        if circuit.state == CIRCUIT_HALF_OPEN or \
+                circuit.failures >= self.failure_threshold:
+            circuit.state = CIRCUIT_OPEN
+            circuit.opened_at = time.monotonic()
+            circuit.probes = 0
+
+    def get_state(self, key: Tuple[str, str]) -> str:
+        """Returns the state of a circuit
+
+        :param key: The circuit, see get_circuit_key
+        :type key: Tuple[str, str]
+        :return: closed, open or half-open
+        :rtype: str
+        """
+        circuit = self.__circuits.get(key)
+        return circuit.state if circuit is not None else CIRCUIT_CLOSED
+
+    def get_states(self) -> Dict[Tuple[str, str], str]:
+        """Returns the state of every circuit which has seen a failure
+
+        :return: (host, family) mapped to closed, open or half-open
+        :rtype: dict
+        """
+        return {key: circuit.state
+                for key, circuit in self.__circuits.items()}
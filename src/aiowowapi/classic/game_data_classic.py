@@ -1,4 +1,4 @@
-from typing import Union, Optional
+from typing import Union, Optional, Callable
 
 
 class GameData:
@@ -17,7 +17,8 @@ class GameData:
     async def get_game_api_resource(self,
                                     namespace: str,
                                     endpoint: str,
-                                    params: dict = None
+                                    params: dict = None,
+                                    transform: Optional[Callable] = None
                                     ) -> Union[dict, None]:
         """Generic method for retrieving data from a Game Data API endpoint
 
@@ -27,6 +28,9 @@ class GameData:
         :type endpoint: str
         :param params: Parameters to send with the request, defaults to None
         :type params: dict, optional
+        :param transform: A callable applied to the decoded response, see
+            API.get_resource, defaults to None
+        :type transform: Callable, optional
         :return: The result of the API request (Warning: Can be None/Null)
         :rtype: dict
         """
@@ -46,7 +50,8 @@ class GameData:
         headers = {"Authorization": f"Bearer {token}"}
 
 
-        return await self.api.get_resource(hostname, endpoint, params, headers)
+        return await self.api.get_resource(hostname, endpoint, params, headers,
+                                           transform=transform)
 
 # region Auction House API
 
@@ -71,7 +76,8 @@ See the Connected Realm API for information about retrieving a list of connected
 
     async def get_auctions(self,
                            connected_realm_id: int,
-                           auction_house_id: int
+                           auction_house_id: int,
+                           transform: Optional[Callable] = None
                            ):
         """Returns all active auctions for a specific auction house on a connected realm.
 
@@ -85,6 +91,9 @@ Depending on the number of active auctions on the specified connected realm, the
         :type connected_realm_id: int
         :param auction_house_id: The ID of the auction house.
         :type auction_house_id: int
+        :param transform: A callable applied to the decoded response, e.g.
+            to_auction_columns, defaults to None
+        :type transform: Callable, optional
         :return: Returns all active auctions for a specific auction house on a connected realm.
         :rtype: dict
         """
@@ -93,7 +102,8 @@ Depending on the number of active auctions on the specified connected realm, the
 
         return await self.get_game_api_resource(
                                                 namespace, 
-                                                endpoint)
+                                                endpoint,
+                                                transform=transform)
 
 # endregion
 # region Connected Realm API
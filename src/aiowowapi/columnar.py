@@ -0,0 +1,218 @@
+from array import array
+from typing import Dict, Any, Tuple
+
+
+# Auction time left values, stored as small integer codes
+TIME_LEFT = ('SHORT', 'MEDIUM', 'LONG', 'VERY_LONG')
+_TIME_LEFT_CODES = {value: code for code, value in enumerate(TIME_LEFT)}
+
+# PvP leaderboard factions, stored as small integer codes
+FACTIONS = ('ALLIANCE', 'HORDE')
+_FACTION_CODES = {value: code for code, value in enumerate(FACTIONS)}
+
+
+class AuctionColumns:
+    """A compact, columnar representation of an auctions response. Every
+    column is an array of the same length, row i of each column describes
+    the i-th auction. Prices are in copper, 0 where the auction has none.
+
+    Pickling an instance is far cheaper than pickling the decoded JSON, which
+    makes it a good transform for decoding in a ProcessPoolExecutor.
+    """
+
+    __slots__ = ('id', 'item_id', 'quantity', 'buyout', 'bid',
+                 'unit_price', 'time_left')
+
+    def __init__(self) -> None:
+        """Constructor method
+        """
+        self.id: array = array('q')
+        self.item_id: array = array('q')
+        self.quantity: array = array('q')
+        self.buyout: array = array('q')
+        self.bid: array = array('q')
+        self.unit_price: array = array('q')
+        self.time_left: array = array('b')
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def __getstate__(self) -> Dict[str, array]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state: Dict[str, array]) -> None:
+        for name, column in state.items():
+            setattr(self, name, column)
+
+    def get_row(self, index: int) -> Dict[str, Any]:
+        """Returns a single auction as a dictionary
+
+        :param index: The row to return
+        :type index: int
+        :return: The auction's columns, time_left as its API name
+        :rtype: dict
+        """
+        row = {name: getattr(self, name)[index] for name in self.__slots__}
+        row['time_left'] = TIME_LEFT[row['time_left']] \
+            if row['time_left'] >= 0 else None
+
+        return row
+
+
+def to_auction_columns(data: Dict[str, Any]) -> AuctionColumns:
+    """Converts a decoded get_auctions / get_commodities response into
+    AuctionColumns, for use as a get_resource transform
+
+    :param data: The decoded auctions response
+    :type data: dict
+    :return: The auctions in columnar form
+    :rtype: AuctionColumns
+    """
+    columns = AuctionColumns()
+
+    for auction in data.get('auctions', ()):
+        columns.id.append(auction['id'])
+        columns.item_id.append(auction['item']['id'])
+        columns.quantity.append(auction.get('quantity', 1))
+        columns.buyout.append(auction.get('buyout', 0))
+        columns.bid.append(auction.get('bid', 0))
+        columns.unit_price.append(auction.get('unit_price', 0))
+        columns.time_left.append(
+            _TIME_LEFT_CODES.get(auction.get('time_left'), -1))
+
+    return columns
+
+
+class PvPLeaderboardColumns:
+    """A compact, columnar representation of a PvP leaderboard response.
+    Every column is an array of the same length, row i of each column
+    describes the i-th entry. Wins & losses are the season's match
+    statistics.
+    """
+
+    __slots__ = ('character_id', 'rating', 'rank', 'wins', 'losses',
+                 'faction')
+
+    def __init__(self) -> None:
+        """Constructor method
+        """
+        self.character_id: array = array('q')
+        self.rating: array = array('l')
+        self.rank: array = array('l')
+        self.wins: array = array('l')
+        self.losses: array = array('l')
+        self.faction: array = array('b')
+
+    def __len__(self) -> int:
+        return len(self.character_id)
+
+    def __getstate__(self) -> Dict[str, array]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state: Dict[str, array]) -> None:
+        for name, column in state.items():
+            setattr(self, name, column)
+
+    def get_row(self, index: int) -> Dict[str, Any]:
+        """Returns a single entry as a dictionary
+
+        :param index: The row to return
+        :type index: int
+        :return: The entry's columns, faction as its API name
+        :rtype: dict
+        """
+        row = {name: getattr(self, name)[index] for name in self.__slots__}
+        row['faction'] = FACTIONS[row['faction']] \
+            if row['faction'] >= 0 else None
+
+        return row
+
+
+def to_pvp_leaderboard_columns(data: Dict[str, Any]
+                               ) -> PvPLeaderboardColumns:
+    """Converts a decoded get_pvp_leaderboard response into
+    PvPLeaderboardColumns, for use as a get_resource transform
+
+    :param data: The decoded PvP leaderboard response
+    :type data: dict
+    :return: The leaderboard in columnar form
+    :rtype: PvPLeaderboardColumns
+    """
+    columns = PvPLeaderboardColumns()
+
+    for entry in data.get('entries', ()):
+        statistics = entry.get('season_match_statistics') or {}
+        columns.character_id.append(entry['character']['id'])
+        columns.rating.append(entry.get('rating', 0))
+        columns.rank.append(entry.get('rank', 0))
+        columns.wins.append(statistics.get('won', 0))
+        columns.losses.append(statistics.get('lost', 0))
+        columns.faction.append(
+            _FACTION_CODES.get((entry.get('faction') or {}).get('type', ''),
+                               -1))
+
+    return columns
+
+
+class PvPLeaderboardDiff:
+    """The changes between two fetches of a PvP leaderboard. The
+    character_id, rating_delta, rank_delta, wins_delta & losses_delta
+    columns describe the characters ranked in both fetches whose rating or
+    record changed, joined & dropped hold the ids of the characters newly
+    ranked & no longer ranked.
+    """
+
+    __slots__ = ('character_id', 'rating_delta', 'rank_delta',
+                 'wins_delta', 'losses_delta', 'joined', 'dropped')
+
+    def __init__(self) -> None:
+        """Constructor method
+        """
+        self.character_id: array = array('q')
+        self.rating_delta: array = array('l')
+        self.rank_delta: array = array('l')
+        self.wins_delta: array = array('l')
+        self.losses_delta: array = array('l')
+        self.joined: array = array('q')
+        self.dropped: array = array('q')
+
+    def __len__(self) -> int:
+        return len(self.character_id)
+
+
+def diff_pvp_leaderboards(old: PvPLeaderboardColumns,
+                          new: PvPLeaderboardColumns) -> PvPLeaderboardDiff:
+    """Compares two fetches of the same PvP leaderboard in a single pass
+    over each
+
+    :param old: The earlier fetch
+    :type old: PvPLeaderboardColumns
+    :param new: The later fetch
+    :type new: PvPLeaderboardColumns
+    :return: The rating changes, newly ranked & dropped characters
+    :rtype: PvPLeaderboardDiff
+    """
+    diff = PvPLeaderboardDiff()
+    previous: Dict[int, Tuple[int, int, int, int]] = dict(zip(
+        old.character_id, zip(old.rating, old.rank, old.wins, old.losses)))
+
+    for character_id, rating, rank, wins, losses in zip(
+            new.character_id, new.rating, new.rank, new.wins, new.losses):
+        row = previous.pop(character_id, None)
+        if row is None:
+            diff.joined.append(character_id)
+            continue
+
+        old_rating, old_rank, old_wins, old_losses = row
+        if rating != old_rating or wins != old_wins or \
+                losses != old_losses:
+            diff.character_id.append(character_id)
+            diff.rating_delta.append(rating - old_rating)
+            diff.rank_delta.append(rank - old_rank)
+            diff.wins_delta.append(wins - old_wins)
+            diff.losses_delta.append(losses - old_losses)
+
+    # Whoever is left wasn't in the new fetch
+    diff.dropped.extend(previous)
+
+    return diff
@@ -0,0 +1,134 @@
+import re
+from typing import Optional
+
+
+# Patterns used to collapse concrete API endpoints into endpoint templates,
+# this keeps the number of distinct endpoints we track metrics for bounded
+_ENDPOINT_PATTERNS = (
+    (re.compile(r"^/profile/wow/character/[^/]+/[^/]+"),
+     "/profile/wow/character/{realm}/{name}"),
+    (re.compile(r"^/data/wow/guild/[^/]+/[^/]+"),
+     "/data/wow/guild/{realm}/{name}"),
+    (re.compile(r"^/data/wow/realm/(?!index$)[^/]+$"),
+     "/data/wow/realm/{realm}"),
+    (re.compile(r"/\d+(?=/|$)"), "/{id}"),
+)
+
+
+def endpoint_template(api_endpoint: str) -> str:
+    """Collapses a concrete API endpoint into its endpoint template, e.g.
+    /data/wow/item/19019 becomes /data/wow/item/{id}
+
+    :param api_endpoint: The API endpoint following the regional hostname
+    :type api_endpoint: str
+    :return: The endpoint template
+    :rtype: str
+    """
+    for pattern, replacement in _ENDPOINT_PATTERNS:
+        api_endpoint = pattern.sub(replacement, api_endpoint)
+
+    return api_endpoint
+
+
+class RequestContext:
+    """Describes a single call to API.get_resource, an instance is passed to
+    every hook fired during the lifetime of that call
+
+    :param method: The HTTP method used for the request
+    :type method: str
+    :param hostname: The hostname the request is sent to
+    :type hostname: str
+    :param api_endpoint: The API endpoint following the regional hostname
+    :type api_endpoint: str
+    """
+
+    __slots__ = ('method', 'hostname', 'api_endpoint', 'template',
+                 'attempt', 'queue_wait', 'status', 'latency',
+                 'decode_time', 'bytes_received', 'bytes_decompressed',
+                 'retries', 'exception', 'cached')
+
+    def __init__(self, method: str, hostname: str, api_endpoint: str):
+        """Constructor method
+        """
+        self.method: str = method.upper()
+        self.hostname: str = hostname
+        self.api_endpoint: str = api_endpoint
+        self.template: str = endpoint_template(api_endpoint)
+
+        # The current attempt, starting at 1
+        self.attempt: int = 1
+
+        # Seconds spent waiting for a free request slot (semaphore)
+        self.queue_wait: float = 0.0
+
+        # Populated once a response has been received
+        self.status: Optional[int] = None
+        self.latency: float = 0.0
+        self.decode_time: float = 0.0
+
+        # Body sizes as received (possibly compressed) & once decompressed
+        self.bytes_received: int = 0
+        self.bytes_decompressed: int = 0
+
+        # Retry bookkeeping
+        self.retries: int = 0
+        self.exception: Optional[BaseException] = None
+
+        # Whether the response was served from the cache, without taking a
+        # request slot
+        self.cached: bool = False
+
+
+class RequestHooks:
+    """Base class for request lifecycle hooks, subclass it and override the
+    methods you're interested in then pass an instance to the API class via
+    the hooks keyword argument.
+
+    Hooks are called synchronously from inside the request path, so they
+    should be cheap & must not block.
+    """
+
+    def on_request_start(self, context: RequestContext) -> None:
+        """Called once a request slot has been acquired, before the first
+        attempt is made
+
+        :param context: The context of the current request
+        :type context: RequestContext
+        """
+
+    def on_response(self, context: RequestContext) -> None:
+        """Called for every HTTP response received, including error responses
+        which will later be retried
+
+        :param context: The context of the current request
+        :type context: RequestContext
+        """
+
+    def on_retry(self, context: RequestContext) -> None:
+        """Called when a failed attempt is about to be retried, the exception
+        responsible is available as context.exception
+
+        :param context: The context of the current request
+        :type context: RequestContext
+        """
+
+    def on_cache_hit(self, context: RequestContext) -> None:
+        """Called when a request is served without touching the network
+
+        :param context: The context of the current request
+        :type context: RequestContext
+        """
+
+    def on_rate_limited(self, context: RequestContext) -> None:
+        """Called when a request is rate limited (HTTP 429)
+
+        :param context: The context of the current request
+        :type context: RequestContext
+        """
+
+    def on_request_end(self, context: RequestContext) -> None:
+        """Called once a request has finished, whether it succeeded or not
+
+        :param context: The context of the current request
+        :type context: RequestContext
+        """
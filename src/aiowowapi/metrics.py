@@ -0,0 +1,298 @@
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, List, Any, Optional
+
+from .api import API
+from .hooks import RequestHooks, RequestContext
+
+
+# Upper bounds (in seconds) of the buckets used for our timing histograms
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0)
+
+
+class Histogram:
+    """A fixed bucket histogram, cheap enough to update on every request
+
+    :param buckets: The upper bounds of the histogram buckets,
+        defaults to DEFAULT_BUCKETS
+    :type buckets: Iterable[float], optional
+    """
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        """Constructor method
+        """
+        self.buckets: tuple = tuple(sorted(buckets))
+
+        # One counter per bucket plus a trailing +Inf bucket
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.count: int = 0
+        self.sum: float = 0.0
+
+    def observe(self, value: float) -> None:
+        """Records a single value
+
+        :param value: The value to record
+        :type value: float
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Returns an estimate of the given quantile, the upper bound of the
+        bucket the quantile falls into
+
+        :param q: The quantile to estimate (0 - 1)
+        :type q: float
+        :return: The estimated quantile, 0.0 if nothing has been recorded
+        :rtype: float
+        """
+        if self.count == 0:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                if i < len(self.buckets):
+                    return self.buckets[i]
+                break
+
+        return float('inf')
+
+
+class EndpointMetrics:
+    """Metrics recorded for a single endpoint template
+    """
+
+    def __init__(self) -> None:
+        """Constructor method
+        """
+        self.requests: int = 0
+        self.statuses: Counter = Counter()
+        self.latency: Histogram = Histogram()
+        self.queue_wait: Histogram = Histogram()
+        self.decode_time: Histogram = Histogram()
+        self.bytes_received: int = 0
+        self.bytes_decompressed: int = 0
+        self.retries: int = 0
+        self.rate_limited: int = 0
+        self.cache_hits: int = 0
+
+
+class MetricsCollector(RequestHooks):
+    """Built-in hooks which record per-endpoint latency, queue wait & JSON
+    decoding histograms along with bytes received, retries & status codes.
+
+    Pass an instance to the API class via the hooks keyword argument.
+    """
+
+    def __init__(self) -> None:
+        """Constructor method
+        """
+        self.endpoints: Dict[str, EndpointMetrics] = {}
+        self.in_flight: int = 0
+        self.token_refreshes: int = 0
+
+    def get_endpoint(self, template: str) -> EndpointMetrics:
+        """Returns the metrics for an endpoint template, creating them if
+        needed
+
+        :param template: The endpoint template
+        :type template: str
+        :return: The metrics recorded for the endpoint template
+        :rtype: EndpointMetrics
+        """
+        metrics = self.endpoints.get(template)
+        if metrics is None:
+            metrics = self.endpoints[template] = EndpointMetrics()
+
+        return metrics
+
+    def on_request_start(self, context: RequestContext) -> None:
+        self.in_flight += 1
+
+        # Cache hits never wait for a request slot, counting them would
+        # drag the queue wait quantiles towards 0
+        if not context.cached:
+            self.get_endpoint(context.template).queue_wait.observe(
+                context.queue_wait)
+
+    def on_response(self, context: RequestContext) -> None:
+        metrics = self.get_endpoint(context.template)
+        metrics.statuses[context.status] += 1
+        metrics.latency.observe(context.latency)
+        metrics.bytes_received += context.bytes_received
+        metrics.bytes_decompressed += context.bytes_decompressed
+
+        if context.decode_time:
+            metrics.decode_time.observe(context.decode_time)
+
+    def on_retry(self, context: RequestContext) -> None:
+        self.get_endpoint(context.template).retries += 1
+
+    def on_cache_hit(self, context: RequestContext) -> None:
+        self.get_endpoint(context.template).cache_hits += 1
+
+    def on_rate_limited(self, context: RequestContext) -> None:
+        self.get_endpoint(context.template).rate_limited += 1
+
+    def on_request_end(self, context: RequestContext) -> None:
+        self.in_flight -= 1
+        self.get_endpoint(context.template).requests += 1
+
+        if context.template == '/oauth/token' and context.status == 200:
+            self.token_refreshes += 1
+
+    def get_cache_hit_ratio(self) -> float:
+        """Returns the share of requests which were served from a cache
+
+        :return: The cache hit ratio (0 - 1)
+        :rtype: float
+        """
+        requests = sum(m.requests for m in self.endpoints.values())
+        if requests == 0:
+            return 0.0
+
+        return sum(m.cache_hits for m in self.endpoints.values()) / requests
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Returns a summary of the recorded metrics keyed by endpoint
+        template
+
+        :return: The recorded metrics as a dictionary
+        :rtype: dict
+        """
+        result = {}
+        for template, metrics in self.endpoints.items():
+            result[template] = {
+                'requests': metrics.requests,
+                'statuses': dict(metrics.statuses),
+                'bytes_received': metrics.bytes_received,
+                'bytes_decompressed': metrics.bytes_decompressed,
+                'retries': metrics.retries,
+                'rate_limited': metrics.rate_limited,
+                'cache_hits': metrics.cache_hits,
+                'latency_p50': metrics.latency.quantile(0.5),
+                'latency_p95': metrics.latency.quantile(0.95),
+                'latency_p99': metrics.latency.quantile(0.99),
+                'queue_wait_p95': metrics.queue_wait.quantile(0.95),
+                'decode_time_p95': metrics.decode_time.quantile(0.95),
+            }
+
+        return result
+
+
+def _escape_label(value: Any) -> str:
+    # Label values are quoted, so escape anything that would break that
+    return str(value).replace('\\', '\\\\').replace('"', '\\"') \
+        .replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _render_histogram(lines: List[str], name: str, template: str,
+                      histogram: Histogram) -> None:
+    endpoint = _escape_label(template)
+    cumulative = 0
+    for bound, bucket_count in zip(histogram.buckets + (float('inf'),),
+                                   histogram.counts):
+        cumulative += bucket_count
+        lines.append('{}_bucket{{endpoint="{}",le="{}"}} {}'.format(
+            name, endpoint, _format_value(bound), cumulative))
+    lines.append('{}_sum{{endpoint="{}"}} {}'.format(
+        name, endpoint, _format_value(histogram.sum)))
+    lines.append('{}_count{{endpoint="{}"}} {}'.format(
+        name, endpoint, histogram.count))
+
+
+def render_prometheus(collector: MetricsCollector,
+                      api: Optional[API] = None,
+                      prefix: str = 'aiowowapi') -> str:
+    """Renders the metrics recorded by a MetricsCollector in the Prometheus
+    text exposition format
+
+    :param collector: The collector registered with the API client
+    :type collector: MetricsCollector
+    :param api: The API client, used for client state such as the number of
+        free request slots, defaults to None
+    :type api: API, optional
+    :param prefix: The prefix used for every metric name,
+        defaults to "aiowowapi"
+    :type prefix: str, optional
+    :return: The metrics in the Prometheus text format
+    :rtype: str
+    """
+    lines: List[str] = []
+    endpoints = sorted(collector.endpoints.items())
+
+    name = f'{prefix}_responses_total'
+    lines.append(f'# HELP {name} HTTP responses by endpoint and status.')
+    lines.append(f'# TYPE {name} counter')
+    for template, metrics in endpoints:
+        for status, count in sorted(metrics.statuses.items()):
+            lines.append('{}{{endpoint="{}",status="{}"}} {}'.format(
+                name, _escape_label(template), status, count))
+
+    for attribute, help_text in (
+            ('latency', 'HTTP request latency in seconds.'),
+            ('queue_wait', 'Time spent waiting for a request slot.'),
+            ('decode_time', 'Time spent decoding response bodies.')):
+        name = f'{prefix}_{attribute}_seconds'
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for template, metrics in endpoints:
+            _render_histogram(lines, name, template,
+                              getattr(metrics, attribute))
+
+    for attribute, help_text in (
+            ('bytes_received', 'Response body bytes received.'),
+            ('bytes_decompressed', 'Response body bytes once decompressed.'),
+            ('retries', 'Request retries.'),
+            ('rate_limited', 'Rate limited (HTTP 429) responses.'),
+            ('cache_hits', 'Requests served from a cache.')):
+        name = f'{prefix}_{attribute}_total'
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for template, metrics in endpoints:
+            lines.append('{}{{endpoint="{}"}} {}'.format(
+                name, _escape_label(template), getattr(metrics, attribute)))
+
+    gauges = [
+        ('requests_in_flight', 'Requests currently in flight.',
+         collector.in_flight),
+        ('cache_hit_ratio', 'Share of requests served from a cache.',
+         collector.get_cache_hit_ratio()),
+    ]
+    if api is not None:
+        gauges.append(('request_slots_available',
+                       'Request slots available without waiting.',
+                       api.get_available_request_slots()))
+
+        # Only exported when there's a rate limiter which knows its tokens
+        rate_limiter = api.get_rate_limiter()
+        tokens = rate_limiter.get_tokens_remaining() \
+            if rate_limiter is not None else None
+        if tokens is not None:
+            gauges.append(('rate_limiter_tokens_remaining',
+                           'Requests the rate limiter allows without '
+                           'waiting.', tokens))
+
+    for metric, help_text, value in gauges:
+        name = f'{prefix}_{metric}'
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} gauge')
+        lines.append(f'{name} {_format_value(value)}')
+
+    name = f'{prefix}_token_refreshes_total'
+    lines.append(f'# HELP {name} OAuth access token refreshes.')
+    lines.append(f'# TYPE {name} counter')
+    lines.append(f'{name} {collector.token_refreshes}')
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,187 @@
+import asyncio
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Tuple
+
+
+# Battle.net's API quota, per client id
+DEFAULT_REQUESTS_PER_SECOND = 100
+DEFAULT_REQUESTS_PER_HOUR = 36000
+
+
+def _take(buckets: List[List[float]],
+          limits: List[Tuple[float, float]],
+          now: float) -> float:
+    # Refills every bucket then takes a token from each of them if they all
+    # have one, buckets are [tokens, updated_at] & limits (capacity, period).
+    # Returns 0 once a token was taken, else the seconds until one will be
+    for bucket, (capacity, period) in zip(buckets, limits):
+        bucket[0] = min(capacity, bucket[0] +
+                        (now - bucket[1]) * capacity / period)
+        bucket[1] = now
+
+    if all(bucket[0] >= 1 for bucket in buckets):
+        for bucket in buckets:
+            bucket[0] -= 1
+        return 0.0
+
+    return max((1 - bucket[0]) * period / capacity
+               for bucket, (capacity, period) in zip(buckets, limits)
+               if bucket[0] < 1)
+
+
+class RateLimiter:
+    """Base class for rate limiters used by the API class, acquire is called
+    before every request sent to the Game Data & Profile APIs
+    """
+
+    async def acquire(self) -> None:
+        """Waits until a request may be sent
+        """
+        raise NotImplementedError
+
+    def get_tokens_remaining(self) -> Optional[float]:
+        """Returns the number of requests which could be sent right now, as
+        of the last acquire
+
+        :return: The requests remaining, None if unknown
+        :rtype: float, none
+        """
+        return None
+
+    async def close(self) -> None:
+        """Releases any resources held by the rate limiter
+        """
+
+
+class LocalRateLimiter(RateLimiter):
+    def __init__(self,
+                 per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+                 per_hour: float = DEFAULT_REQUESTS_PER_HOUR):
+        """Token bucket rate limiter enforcing a per second & per hour
+        budget for a single process
+
+        :param per_second: Requests allowed per second (Default: 100)
+        :type per_second: float, optional
+        :param per_hour: Requests allowed per hour (Default: 36000)
+        :type per_hour: float, optional
+        """
+        self.__limits: List[Tuple[float, float]] = [(per_second, 1.0),
+                                                    (per_hour, 3600.0)]
+        now = time.time()
+        self.__buckets: List[List[float]] = [[capacity, now]
+                                             for capacity, _ in self.__limits]
+
+    async def acquire(self) -> None:
+        while True:
+            wait = _take(self.__buckets, self.__limits, time.time())
+            if wait == 0:
+                return
+            await asyncio.sleep(wait)
+
+    def get_tokens_remaining(self) -> Optional[float]:
+        return min(bucket[0] for bucket in self.__buckets)
+
+
+class SQLiteRateLimiter(RateLimiter):
+    def __init__(self, path: str, key: str,
+                 per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+                 per_hour: float = DEFAULT_REQUESTS_PER_HOUR):
+        """Token bucket rate limiter whose buckets live in an SQLite
+        database, enforcing one per second & per hour budget across every
+        process using the same database & key
+
+        :param path: The database file, created if it doesn't exist
+        :type path: str
+        :param key: The budget to draw from, e.g. the client id
+        :type key: str
+        :param per_second: Requests allowed per second (Default: 100)
+        :type per_second: float, optional
+        :param per_hour: Requests allowed per hour (Default: 36000)
+        :type per_hour: float, optional
+        """
+        self.path: str = path
+        self.key: str = key
+
+        self.__limits: List[Tuple[float, float]] = [(per_second, 1.0),
+                                                    (per_hour, 3600.0)]
+        self.__tokens_remaining: Optional[float] = None
+        self.__executor: Optional[ThreadPoolExecutor] = None
+        self.__connection: Optional[sqlite3.Connection] = None
+
+    def __connect(self) -> sqlite3.Connection:
+        if self.__connection is None:
+            connection = sqlite3.connect(self.path, timeout=30,
+                                         isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS rate_limits ('
+                'key TEXT NOT NULL, '
+                'period REAL NOT NULL, '
+                'tokens REAL NOT NULL, '
+                'updated_at REAL NOT NULL, '
+                'PRIMARY KEY (key, period))')
+            self.__connection = connection
+
+        return self.__connection
+
+    def __take(self) -> float:
+        connection = self.__connect()
+
+        # BEGIN IMMEDIATE takes the write lock up front, so reading &
+        # updating the buckets happens atomically across processes
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            now = time.time()
+            buckets = []
+            for capacity, period in self.__limits:
+                row = connection.execute(
+                    'SELECT tokens, updated_at FROM rate_limits '
+                    'WHERE key = ? AND period = ?',
+                    (self.key, period)).fetchone()
+                buckets.append(list(row) if row else [capacity, now])
+
+            wait = _take(buckets, self.__limits, now)
+
+            connection.executemany(
+                'INSERT OR REPLACE INTO rate_limits VALUES (?, ?, ?, ?)',
+                [(self.key, period, tokens, updated_at)
+                 for (tokens, updated_at), (_, period)
+                 in zip(buckets, self.__limits)])
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+        self.__tokens_remaining = min(bucket[0] for bucket in buckets)
+        return wait
+
+    async def acquire(self) -> None:
+        # Every database call is made from the same thread
+        if self.__executor is None:
+            self.__executor = ThreadPoolExecutor(
+                1, thread_name_prefix='aiowowapi-ratelimit')
+
+        loop = asyncio.get_running_loop()
+        while True:
+            wait = await loop.run_in_executor(self.__executor, self.__take)
+            if wait == 0:
+                return
+            await asyncio.sleep(wait)
+
+    def get_tokens_remaining(self) -> Optional[float]:
+        return self.__tokens_remaining
+
+    def __close(self) -> None:
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+
+    async def close(self) -> None:
+        if self.__executor is not None:
+            await asyncio.get_running_loop().run_in_executor(
+                self.__executor, self.__close)
+            self.__executor.shutdown()
+            self.__executor = None
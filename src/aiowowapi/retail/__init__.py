@@ -11,3 +11,10 @@ Module containing endpoint access methods for the Retail World of Warcraft API.
 
 from .game_data import *
 from .profile import *
+from .auctions import *
+from .items import *
+from .characters import *
+from .realms import *
+from .connected_realms import *
+from .leaderboards import *
+from .token import *
@@ -0,0 +1,265 @@
+import asyncio
+import statistics
+import time
+from collections import deque
+from email.utils import formatdate
+from typing import Optional, Dict, Iterable, Tuple, Any, Callable, \
+    AsyncIterator, Deque
+
+import aiohttp
+
+from ..api import ApiException
+from .game_data import GameData, parse_connected_realm_ids
+
+
+class _RealmSchedule:
+    # Polling state for a single connected realm
+
+    __slots__ = ('last_modified', 'intervals', 'next_fetch', 'retry_delay',
+                 'in_flight')
+
+    def __init__(self, next_fetch: float, retry_delay: float):
+        self.last_modified: Optional[float] = None
+        self.intervals: Deque[float] = deque(maxlen=5)
+        self.next_fetch: float = next_fetch
+        self.retry_delay: float = retry_delay
+        self.in_flight: bool = False
+
+
+class AuctionPoller:
+    def __init__(self,
+                 game_data: GameData,
+                 connected_realm_ids: Optional[Iterable[int]] = None,
+                 *,
+                 max_concurrency: int = 4,
+                 max_requests_per_second: float = 10.0,
+                 update_interval: float = 3600.0,
+                 update_delay: float = 30.0,
+                 retry_delay: float = 60.0,
+                 max_retry_delay: float = 600.0,
+                 transform: Optional[Callable] = None):
+        """Polls connected realm auction houses, fetching each one just after
+        it's expected to have refreshed.
+
+        Every realm's refresh time & interval are learned from the
+        Last-Modified header of its auctions. Fetches are conditional
+        (If-Modified-Since), so polling a realm which hasn't refreshed yet
+        costs a cheap 304 instead of the whole auction house. Fetches are
+        paced to stay within max_requests_per_second.
+
+        :param game_data: The GameData endpoints to fetch auctions with
+        :type game_data: GameData
+        :param connected_realm_ids: The connected realms to poll, every
+            connected realm in the region if None (Default: None)
+        :type connected_realm_ids: Iterable[int], optional
+        :param max_concurrency: The maximum number of auction houses being
+            downloaded at once (Default: 4)
+        :type max_concurrency: int, optional
+        :param max_requests_per_second: The maximum rate at which fetches
+            are started (Default: 10)
+        :type max_requests_per_second: float, optional
+        :param update_interval: The assumed refresh interval in seconds, until
+            one has been observed for a realm (Default: 3600)
+        :type update_interval: float, optional
+        :param update_delay: Seconds to wait after a realm's expected refresh
+            before fetching it (Default: 30)
+        :type update_delay: float, optional
+        :param retry_delay: Seconds to wait before polling a realm again when
+            it hadn't refreshed yet or the request failed, doubles on every
+            consecutive miss (Default: 60)
+        :type retry_delay: float, optional
+        :param max_retry_delay: The upper bound of retry_delay
+            (Default: 600)
+        :type max_retry_delay: float, optional
+        :param transform: A callable applied to each decoded auctions
+            response, e.g. to_auction_columns (Default: None)
+        :type transform: Callable, optional
+        """
+        self.game_data: GameData = game_data
+        self.max_concurrency: int = max_concurrency
+        self.max_requests_per_second: float = max_requests_per_second
+        self.update_interval: float = update_interval
+        self.update_delay: float = update_delay
+        self.retry_delay: float = retry_delay
+        self.max_retry_delay: float = max_retry_delay
+        self.transform: Optional[Callable] = transform
+
+        self.__schedules: Dict[int, _RealmSchedule] = {}
+        self.__running: bool = False
+        self.__results: Optional[asyncio.Queue] = None
+
+        if connected_realm_ids is not None:
+            self.add_realms(connected_realm_ids)
+
+    def add_realms(self, connected_realm_ids: Iterable[int]) -> None:
+        """Adds connected realms to the schedule, their first fetches are
+        spread out according to max_requests_per_second
+
+        :param connected_realm_ids: The connected realms to poll
+        :type connected_realm_ids: Iterable[int]
+        """
+        start = time.time()
+        spacing = 1 / self.max_requests_per_second
+        for connected_realm_id in connected_realm_ids:
+            if connected_realm_id not in self.__schedules:
+                self.__schedules[connected_realm_id] = _RealmSchedule(
+                    start + len(self.__schedules) * spacing,
+                    self.retry_delay)
+
+    def get_schedule(self) -> Dict[int, float]:
+        """Returns when each connected realm will next be fetched
+
+        :return: Connected realm ids mapped to unix timestamps
+        :rtype: dict
+        """
+        return {realm: schedule.next_fetch
+                for realm, schedule in self.__schedules.items()}
+
+    def get_update_interval(self, connected_realm_id: int) -> float:
+        """Returns the refresh interval learned for a connected realm
+
+        :param connected_realm_id: The ID of the connected realm
+        :type connected_realm_id: int
+        :return: The refresh interval in seconds
+        :rtype: float
+        """
+        schedule = self.__schedules.get(connected_realm_id)
+        if schedule is None or not schedule.intervals:
+            return self.update_interval
+
+        return statistics.median(schedule.intervals)
+
+    async def fetch(self, connected_realm_id: int) -> Optional[Any]:
+        """Fetches a connected realm's auctions if they changed since the last
+        fetch & reschedules the realm
+
+        :param connected_realm_id: The ID of the connected realm
+        :type connected_realm_id: int
+        :return: The auctions, None if they're unchanged or the request failed
+        :rtype: dict
+        """
+        if connected_realm_id not in self.__schedules:
+            self.add_realms([connected_realm_id])
+        schedule = self.__schedules[connected_realm_id]
+
+        headers = {}
+        if schedule.last_modified is not None:
+            headers['If-Modified-Since'] = formatdate(
+                schedule.last_modified, usegmt=True)
+
+        try:
+            response = await self.game_data.get_game_api_response(
+                "dynamic-{region}",
+                f"/data/wow/connected-realm/{connected_realm_id}/auctions",
+                headers=headers,
+                transform=self.transform)
+        except (aiohttp.ClientError, ApiException):
+            # Failed requests (e.g. a 404 or exhausted retries) back off
+            # like any other miss
+            response = None
+
+        last_modified = response.last_modified \
+            if response is not None else None
+
+        # Not refreshed yet (or the request failed), back off & try again
+        if response is None or response.not_modified or \
+                last_modified is None:
+            schedule.next_fetch = time.time() + schedule.retry_delay
+            schedule.retry_delay = min(schedule.retry_delay * 2,
+                                       self.max_retry_delay)
+            return None if response is None or response.not_modified \
+                else response.data
+
+        modified = last_modified.timestamp()
+        if schedule.last_modified is not None and \
+                modified > schedule.last_modified:
+            schedule.intervals.append(modified - schedule.last_modified)
+
+        schedule.last_modified = modified
+        schedule.retry_delay = self.retry_delay
+
+        # The next refresh is expected one interval after this one, if we
+        # fell behind (e.g. missed refreshes) just poll again shortly
+        schedule.next_fetch = max(
+            modified + self.get_update_interval(connected_realm_id) +
+            self.update_delay,
+            time.time() + 1 / self.max_requests_per_second)
+
+        return response.data
+
+    async def poll(self) -> AsyncIterator[Tuple[int, Any]]:
+        """Polls the scheduled connected realms until stop is called,
+        yielding each auction house as soon as it has been downloaded
+
+        :return: An async iterator of (connected_realm_id, auctions)
+        :rtype: AsyncIterator[Tuple[int, dict]]
+        """
+        if not self.__schedules:
+            index = await self.game_data.get_connected_realms_index()
+            if index:
+                self.add_realms(parse_connected_realm_ids(index))
+
+        results: asyncio.Queue = asyncio.Queue()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks = set()
+
+        async def fetch_into_queue(connected_realm_id: int) -> None:
+            try:
+                data = await self.fetch(connected_realm_id)
+                if data is not None:
+                    await results.put((connected_realm_id, data))
+            finally:
+                self.__schedules[connected_realm_id].in_flight = False
+                semaphore.release()
+
+        self.__results = results
+        self.__running = True
+        try:
+            while self.__running:
+                if not results.empty():
+                    result = results.get_nowait()
+                    if result is not None:
+                        yield result
+                    continue
+
+                # Wait until the next realm is due, handing out results as
+                # they come in
+                pending = [(schedule.next_fetch, realm)
+                           for realm, schedule in self.__schedules.items()
+                           if not schedule.in_flight]
+                due, connected_realm_id = min(pending) if pending \
+                    else (time.time() + 1, None)
+                delay = due - time.time()
+                if delay > 0 or connected_realm_id is None:
+                    try:
+                        result = await asyncio.wait_for(results.get(),
+                                                        max(delay, 0))
+                    except asyncio.TimeoutError:
+                        continue
+
+                    # None is put on the queue by stop to wake us up
+                    if result is not None:
+                        yield result
+                    continue
+
+                await semaphore.acquire()
+                self.__schedules[connected_realm_id].in_flight = True
+                task = asyncio.ensure_future(
+                    fetch_into_queue(connected_realm_id))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+                # Pace requests to stay within our rate limit
+                await asyncio.sleep(1 / self.max_requests_per_second)
+        finally:
+            self.__running = False
+            self.__results = None
+            for task in tasks:
+                task.cancel()
+
+    def stop(self) -> None:
+        """Stops a running poll loop
+        """
+        self.__running = False
+        if self.__results is not None:
+            self.__results.put_nowait(None)
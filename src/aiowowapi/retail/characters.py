@@ -0,0 +1,196 @@
+import time
+from collections import Counter
+from typing import Optional, Dict, Any, Iterable, MutableMapping, Tuple
+
+import aiohttp
+
+from ..api import ApiException
+from .profile import Profile, DEFAULT_CHARACTER_BUNDLE_PARTS
+
+
+# Blizzard asks for stored character data to be revalidated every 30 days
+DEFAULT_CHARACTER_RETENTION = 30 * 24 * 60 * 60
+
+
+class CharacterCache:
+    def __init__(self,
+                 profile: Profile,
+                 store: Optional[MutableMapping[str, Any]] = None,
+                 *,
+                 parts: Optional[Iterable[str]] = None,
+                 retention: float = DEFAULT_CHARACTER_RETENTION):
+        """Keeps character profiles (bundles of the chosen parts) & only
+        refetches them when they've changed hands.
+
+        Every character is stored with its id & the time it was last
+        validated. Once retention has passed, the character is revalidated
+        with the light profile status request rather than refetched: if it
+        no longer exists or is no longer valid it's evicted, if its id
+        changed (e.g. it was deleted & the name reused) it's refetched, and
+        otherwise it's kept for another retention period.
+
+        :param profile: The Profile endpoints to fetch characters with
+        :type profile: Profile
+        :param store: Where characters are kept, keyed by realm/name. Any
+            mutable mapping will do, e.g. a shelve.Shelf to keep them across
+            restarts, defaults to a dict
+        :type store: MutableMapping[str, Any], optional
+        :param parts: The parts stored for each character, see
+            Profile.get_character_bundle, defaults to
+            DEFAULT_CHARACTER_BUNDLE_PARTS
+        :type parts: Iterable[str], optional
+        :param retention: Seconds before a character is revalidated
+            (Default: 30 days)
+        :type retention: float, optional
+        """
+        self.profile: Profile = profile
+        self.store: MutableMapping[str, Any] = store if \
+            (store is not None) else {}
+        self.parts: Tuple[str, ...] = tuple(parts) if \
+            (parts is not None) else DEFAULT_CHARACTER_BUNDLE_PARTS
+        self.retention: float = retention
+
+        # Number of full fetches, status revalidations & evictions
+        self.stats: Counter = Counter()
+
+    @staticmethod
+    def get_key(realm_slug: str, character_name: str) -> str:
+        """Returns the key a character is stored under
+
+        :param realm_slug: The slug of the realm.
+        :type realm_slug: str
+        :param character_name: The name of the character.
+        :type character_name: str
+        :rtype: str
+        """
+        return f"{realm_slug.lower()}/{character_name.lower()}"
+
+    async def get(self, realm_slug: str,
+                  character_name: str) -> Optional[Dict[str, Any]]:
+        """Returns a character's parts, from the store when possible
+
+        :param realm_slug: The slug of the realm.
+        :type realm_slug: str
+        :param character_name: The lowercase name of the character.
+        :type character_name: str
+        :return: The character's parts, None if it doesn't exist or
+            couldn't be fetched
+        :rtype: dict
+        """
+        entry = self.store.get(self.get_key(realm_slug, character_name))
+        if entry is None:
+            return await self.fetch(realm_slug, character_name)
+
+        if time.time() - entry['validated_at'] < self.retention:
+            return entry['parts']
+
+        return await self.revalidate(realm_slug, character_name)
+
+    async def fetch(self, realm_slug: str,
+                    character_name: str) -> Optional[Dict[str, Any]]:
+        """Fetches & stores a character's parts, replacing any stored ones
+
+        :param realm_slug: The slug of the realm.
+        :type realm_slug: str
+        :param character_name: The lowercase name of the character.
+        :type character_name: str
+        :return: The character's parts, None if it doesn't exist or
+            couldn't be fetched
+        :rtype: dict
+        """
+        self.stats['fetches'] += 1
+        bundle = await self.profile.get_character_bundle(
+            realm_slug, character_name, self.parts)
+
+        if bundle.not_found:
+            self.evict(realm_slug, character_name)
+            return None
+
+        # Partial bundles are handed out but not kept
+        character_id = (bundle.status or {}).get('id')
+        if bundle.complete and character_id is not None:
+            now = time.time()
+            self.store[self.get_key(realm_slug, character_name)] = {
+                'id': character_id,
+                'fetched_at': now,
+                'validated_at': now,
+                'parts': bundle.parts,
+            }
+
+        return bundle.parts
+
+    async def revalidate(self, realm_slug: str,
+                         character_name: str) -> Optional[Dict[str, Any]]:
+        """Checks a stored character with its profile status, keeping,
+        refetching or evicting it accordingly
+
+        :param realm_slug: The slug of the realm.
+        :type realm_slug: str
+        :param character_name: The lowercase name of the character.
+        :type character_name: str
+        :return: The character's parts, None if it doesn't exist anymore
+        :rtype: dict
+        """
+        key = self.get_key(realm_slug, character_name)
+        entry = self.store.get(key)
+        if entry is None:
+            return await self.fetch(realm_slug, character_name)
+
+        self.stats['revalidations'] += 1
+        try:
+            status = await self.profile.get_character_profile_status(
+                realm_slug, character_name)
+        except (aiohttp.ClientError, ApiException):
+            status = None
+
+        if status is None:
+            if self.profile.is_not_found(realm_slug, character_name):
+                self.evict(realm_slug, character_name)
+                return None
+
+            # Couldn't check, keep serving what we have & try again later
+            return entry['parts']
+
+        if status.get('is_valid') is False:
+            self.evict(realm_slug, character_name)
+            return None
+
+        if status.get('id') != entry['id']:
+            self.evict(realm_slug, character_name)
+            return await self.fetch(realm_slug, character_name)
+
+        entry['validated_at'] = time.time()
+        # Written back so persistent stores (e.g. shelve) see the change
+        self.store[key] = entry
+
+        return entry['parts']
+
+    async def revalidate_expired(self) -> int:
+        """Revalidates every stored character whose retention has passed,
+        e.g. from a daily job
+
+        :return: The number of characters revalidated
+        :rtype: int
+        """
+        now = time.time()
+        expired = [key for key, entry in list(self.store.items())
+                   if now - entry['validated_at'] >= self.retention]
+
+        for key in expired:
+            realm_slug, character_name = key.split('/', 1)
+            await self.revalidate(realm_slug, character_name)
+
+        return len(expired)
+
+    def evict(self, realm_slug: str, character_name: str) -> None:
+        """Removes a character from the store, if present
+
+        :param realm_slug: The slug of the realm.
+        :type realm_slug: str
+        :param character_name: The name of the character.
+        :type character_name: str
+        """
+        key = self.get_key(realm_slug, character_name)
+        if key in self.store:
+            del self.store[key]
+            self.stats['evictions'] += 1
@@ -0,0 +1,248 @@
+import asyncio
+import time
+from email.utils import formatdate
+from typing import Optional, Dict, List, Tuple, Union
+
+from .game_data import GameData
+
+
+# How long an index is used before checking the search pages for changes
+DEFAULT_CONNECTED_REALM_INDEX_TTL = 60 * 60
+
+
+class ConnectedRealm:
+    # A connected realm & the realms it's made of
+
+    __slots__ = ('id', 'realm_ids', 'realm_slugs')
+
+    def __init__(self, connected_realm_id: int,
+                 realm_ids: Tuple[int, ...],
+                 realm_slugs: Tuple[str, ...]):
+        self.id: int = connected_realm_id
+        self.realm_ids: Tuple[int, ...] = realm_ids
+        self.realm_slugs: Tuple[str, ...] = realm_slugs
+
+    def __repr__(self) -> str:
+        return f'<ConnectedRealm id={self.id} realms={self.realm_slugs}>'
+
+
+class _SearchPage:
+    # A page of connected realm search results & when it last changed
+
+    __slots__ = ('last_modified', 'connected_realms')
+
+    def __init__(self, last_modified: Optional[float],
+                 connected_realms: List[ConnectedRealm]):
+        self.last_modified: Optional[float] = last_modified
+        self.connected_realms: List[ConnectedRealm] = connected_realms
+
+
+class _RegionIndex:
+    # The search pages & realm lookups of a single region
+
+    __slots__ = ('pages', 'page_count', 'realms', 'checked_at')
+
+    def __init__(self) -> None:
+        self.pages: Dict[int, _SearchPage] = {}
+        self.page_count: int = 1
+        self.realms: Dict[Union[int, str], ConnectedRealm] = {}
+        self.checked_at: float = 0.0
+
+
+def _realm_key(realm: Union[int, str]) -> Union[int, str]:
+    # Realms are looked up by id or lowercase slug
+    if isinstance(realm, str):
+        return int(realm) if realm.isdigit() else realm.lower()
+
+    return realm
+
+
+def parse_connected_realms(search: dict) -> List[ConnectedRealm]:
+    """Extracts the connected realms from a connected realms search response
+
+    :param search: The response of GameData.get_connected_realms_search
+    :type search: dict
+    :return: The connected realms
+    :rtype: List[ConnectedRealm]
+    """
+    connected_realms = []
+    for result in search.get('results', ()):
+        data = result.get('data', {})
+        if 'id' not in data:
+            continue
+
+        realms = data.get('realms', ())
+        connected_realms.append(ConnectedRealm(
+            int(data['id']),
+            tuple(int(realm['id']) for realm in realms if 'id' in realm),
+            tuple(realm['slug'] for realm in realms if 'slug' in realm)))
+
+    return connected_realms
+
+
+class ConnectedRealmIndex:
+    def __init__(self, game_data: GameData,
+                 ttl: float = DEFAULT_CONNECTED_REALM_INDEX_TTL,
+                 page_size: int = 100):
+        """Maps realm slugs & ids to their connected realm, per region.
+
+        The index is built by paging the connected realms search once. After
+        ttl has passed the pages are requested again with If-Modified-Since,
+        so an unchanged index costs a 304 per page rather than the realms
+        being fetched again. Should a refresh fail, the previous index keeps
+        being used.
+
+        :param game_data: The GameData endpoints to search with
+        :type game_data: GameData
+        :param ttl: Seconds before the pages are checked for changes
+            (Default: 1 hour)
+        :type ttl: float, optional
+        :param page_size: The number of connected realms per search page
+            (Default: 100, the maximum)
+        :type page_size: int, optional
+        """
+        self.game_data: GameData = game_data
+        self.ttl: float = ttl
+        self.page_size: int = page_size
+
+        self.__regions: Dict[str, _RegionIndex] = {}
+        self.__locks: Dict[str, asyncio.Lock] = {}
+
+    async def refresh(self, force: bool = False) -> bool:
+        """Checks the search pages of the client's current region for changes
+        & rebuilds the index if needed
+
+        :param force: Check even if ttl hasn't passed yet, defaults to False
+        :type force: bool, optional
+        :return: Whether the index changed
+        :rtype: bool
+        """
+        region = self.game_data.api.get_region()
+        index = self.__regions.setdefault(region, _RegionIndex())
+        if not force and index.pages and \
+                time.time() - index.checked_at < self.ttl:
+            return False
+
+        # Only one caller pages the search, the others wait for it
+        lock = self.__locks.setdefault(region, asyncio.Lock())
+        async with lock:
+            if not force and index.pages and \
+                    time.time() - index.checked_at < self.ttl:
+                return False
+
+            # Unchanged pages don't tell us the page count, so until a page
+            # says otherwise it's assumed to be the same as last time
+            page_count = index.page_count
+            pages: Dict[int, _SearchPage] = {}
+            page_number = 1
+            while page_number <= page_count:
+                previous = index.pages.get(page_number)
+                try:
+                    response = await self.__get_page(page_number, previous)
+                except Exception:
+                    # A stale index beats none at all
+                    if not index.pages:
+                        raise
+                    response = None
+
+                if response is not None and response.not_modified and \
+                        previous is not None:
+                    pages[page_number] = previous
+                elif response is not None and response.data:
+                    last_modified = response.last_modified
+                    pages[page_number] = _SearchPage(
+                        last_modified.timestamp()
+                        if last_modified is not None else None,
+                        parse_connected_realms(response.data))
+                    page_count = int(response.data.get('pageCount', 1))
+                else:
+                    # Keep what we have (a partial index would be worse) &
+                    # try again once ttl has passed
+                    if index.pages:
+                        index.checked_at = time.time()
+                    return False
+
+                page_number += 1
+
+            changed = pages.keys() != index.pages.keys() or any(
+                page is not index.pages[number]
+                for number, page in pages.items())
+
+            if changed:
+                index.pages = pages
+                index.page_count = page_count
+                index.realms = {}
+                for page in pages.values():
+                    for connected_realm in page.connected_realms:
+                        for realm_id in connected_realm.realm_ids:
+                            index.realms[realm_id] = connected_realm
+                        for slug in connected_realm.realm_slugs:
+                            index.realms[slug] = connected_realm
+
+            index.checked_at = time.time()
+
+        return changed
+
+    async def __get_page(self, page_number: int,
+                         previous: Optional[_SearchPage]):
+        headers = {}
+        if previous is not None and previous.last_modified is not None:
+            headers['If-Modified-Since'] = formatdate(
+                previous.last_modified, usegmt=True)
+
+        return await self.game_data.get_game_api_response(
+            "dynamic-{region}",
+            "/data/wow/search/connected-realm",
+            {'orderby': 'id', '_page': page_number,
+             '_pageSize': self.page_size},
+            headers=headers)
+
+    async def get_connected_realm(self, realm: Union[int, str]
+                                  ) -> Optional[ConnectedRealm]:
+        """Returns the connected realm a realm belongs to
+
+        :param realm: The realm's slug or id
+        :type realm: Union[int, str]
+        :return: The connected realm, None if the realm isn't known
+        :rtype: ConnectedRealm
+        """
+        await self.refresh()
+
+        index = self.__regions.get(self.game_data.api.get_region())
+        if index is None:
+            return None
+
+        return index.realms.get(_realm_key(realm))
+
+    async def get_connected_realm_id(self, realm: Union[int, str]
+                                     ) -> Optional[int]:
+        """Returns the id of the connected realm a realm belongs to, e.g. for
+        GameData.get_auctions
+
+        :param realm: The realm's slug or id
+        :type realm: Union[int, str]
+        :return: The connected realm's id, None if the realm isn't known
+        :rtype: int
+        """
+        connected_realm = await self.get_connected_realm(realm)
+        return connected_realm.id if connected_realm is not None else None
+
+    async def get_sibling_realms(self, realm: Union[int, str]
+                                 ) -> List[str]:
+        """Returns the slugs of the other realms connected to a realm
+
+        :param realm: The realm's slug or id
+        :type realm: Union[int, str]
+        :return: The connected realms' slugs, empty if there are none or the
+            realm isn't known
+        :rtype: List[str]
+        """
+        connected_realm = await self.get_connected_realm(realm)
+        if connected_realm is None:
+            return []
+
+        key = _realm_key(realm)
+        own: Dict[Union[int, str], str] = dict(
+            zip(connected_realm.realm_ids, connected_realm.realm_slugs))
+        return [slug for slug in connected_realm.realm_slugs
+                if slug != key and own.get(key) != slug]
@@ -1,4 +1,30 @@
-from typing import Union, Optional
+import asyncio
+import re
+from typing import Union, Optional, Callable, Iterable, List, Tuple, Any, \
+    AsyncIterator, Dict
+
+from ..api import APIResponse
+
+
+# Pulls a connected realm's id out of its href in the connected realms index
+_CONNECTED_REALM_HREF = re.compile(r"/connected-realm/(\d+)")
+
+
+def parse_connected_realm_ids(index: dict) -> List[int]:
+    """Extracts the connected realm ids from a connected realms index response
+
+    :param index: The response of GameData.get_connected_realms_index
+    :type index: dict
+    :return: The connected realm ids
+    :rtype: List[int]
+    """
+    ids = []
+    for connected_realm in index.get('connected_realms', ()):
+        found = _CONNECTED_REALM_HREF.search(connected_realm.get('href', ''))
+        if found:
+            ids.append(int(found.group(1)))
+
+    return ids
 
 
 class GameData:
@@ -17,7 +43,8 @@ class GameData:
     async def get_game_api_resource(self,
                                     namespace: str,
                                     endpoint: str,
-                                    params: dict = None
+                                    params: dict = None,
+                                    transform: Optional[Callable] = None
                                     ) -> Union[dict, None]:
         """Generic method for retrieving data from a Game Data API endpoint
 
@@ -27,9 +54,43 @@ class GameData:
         :type endpoint: str
         :param params: Parameters to send with the request, defaults to None
         :type params: dict, optional
+        :param transform: A callable applied to the decoded response, see
+            API.get_resource, defaults to None
+        :type transform: Callable, optional
         :return: The result of the API request (Warning: Can be None/Null)
         :rtype: dict
         """
+        response = await self.get_game_api_response(namespace, endpoint,
+                                                    params,
+                                                    transform=transform)
+
+        return response.data if response is not None else None
+
+    async def get_game_api_response(self,
+                                    namespace: str,
+                                    endpoint: str,
+                                    params: Optional[dict] = None,
+                                    headers: Optional[dict] = None,
+                                    transform: Optional[Callable] = None
+                                    ) -> Optional[APIResponse]:
+        """Generic method for retrieving a full response (status, headers &
+        data) from a Game Data API endpoint, e.g. for conditional requests
+
+        :param namespace: The namespace of the resource we're trying to access
+        :type namespace: str
+        :param endpoint: The endpoint of the resource we're trying to access
+        :type endpoint: str
+        :param params: Parameters to send with the request, defaults to None
+        :type params: dict, optional
+        :param headers: Additional request headers, e.g. If-Modified-Since,
+            defaults to None
+        :type headers: dict, optional
+        :param transform: A callable applied to the decoded response, see
+            API.get_resource, defaults to None
+        :type transform: Callable, optional
+        :return: The API response (Warning: Can be None/Null)
+        :rtype: APIResponse
+        """
         region = self.api.get_region()
         locale = self.api.get_locale()
         hostname = self.api.get_hostname()
@@ -43,10 +104,11 @@ class GameData:
 
         # Thank you to https://github.com/karlsbjorn and https://github.com/mty22
         # https://github.com/Adalyia/aiowowapi/pull/2
-        headers = {"Authorization": f"Bearer {token}"}
+        headers = dict(headers or {}, Authorization=f"Bearer {token}")
 
-
-        return await self.api.get_resource(hostname, endpoint, params, headers)
+        return await self.api.get_resource_response(hostname, endpoint,
+                                                    params, headers,
+                                                    transform=transform)
 
 # region Achievement API
 
@@ -131,7 +193,8 @@ class GameData:
 # region Auction House API
 
     async def get_auctions(self,
-                           connected_realm_id: int
+                           connected_realm_id: int,
+                           transform: Optional[Callable] = None
                            ):
         """Returns all active auctions for a connected realm.
 
@@ -143,6 +206,9 @@ Depending on the number of active auctions on the specified connected realm, the
         
         :param connected_realm_id: The ID of the connected realm.
         :type connected_realm_id: int
+        :param transform: A callable applied to the decoded response, e.g.
+            to_auction_columns, defaults to None
+        :type transform: Callable, optional
         :return: Returns all active auctions for a connected realm.
         :rtype: dict
         """
@@ -151,15 +217,86 @@ Depending on the number of active auctions on the specified connected realm, the
 
         return await self.get_game_api_resource(
                                                 namespace, 
-                                                endpoint)
-
-    async def get_commodities(self):
+                                                endpoint,
+                                                transform=transform)
+
+    async def iter_all_auctions(self,
+                                connected_realm_ids: Optional[
+                                    Iterable[int]] = None,
+                                max_concurrency: int = 4,
+                                transform: Optional[Callable] = None
+                                ) -> AsyncIterator[Tuple[int, Any]]:
+        """Fetches the auctions of many connected realms concurrently,
+        yielding each realm's auctions as soon as they've been downloaded.
+
+        At most max_concurrency auction houses are in flight or waiting to be
+        consumed at any time, so memory use is bounded by max_concurrency
+        rather than by the number of realms. Realms whose auctions couldn't
+        be fetched are skipped.
+
+        :param connected_realm_ids: The connected realms to fetch, every
+            connected realm in the region if None, defaults to None
+        :type connected_realm_ids: Iterable[int], optional
+        :param max_concurrency: The maximum number of auction houses being
+            downloaded at once, defaults to 4
+        :type max_concurrency: int, optional
+        :param transform: A callable applied to each decoded response, e.g.
+            to_auction_columns, defaults to None
+        :type transform: Callable, optional
+        :return: An async iterator of (connected_realm_id, auctions)
+        :rtype: AsyncIterator[Tuple[int, dict]]
+        """
+        if connected_realm_ids is None:
+            index = await self.get_connected_realms_index()
+            connected_realm_ids = parse_connected_realm_ids(index or {})
+
+        remaining = iter(connected_realm_ids)
+        pending: Dict[asyncio.Future, int] = {}
+
+        try:
+            while True:
+                # Top up the in flight requests, we only start a new one once
+                # a previous result has been handed to the caller
+                while len(pending) < max_concurrency:
+                    connected_realm_id = next(remaining, None)
+                    if connected_realm_id is None:
+                        break
+                    pending[asyncio.ensure_future(self.get_auctions(
+                        connected_realm_id, transform))] = connected_realm_id
+
+                if not pending:
+                    break
+
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                while done:
+                    # Drop every reference to a realm's auctions once handed
+                    # out, so they can be freed while the next ones download
+                    finished = done.pop()
+                    connected_realm_id = pending.pop(finished)
+                    if finished.exception() is not None:
+                        continue
+                    data = finished.result()
+                    del finished
+                    if data is not None:
+                        yield connected_realm_id, data
+                    del data
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def get_commodities(self,
+                              transform: Optional[Callable] = None
+                              ):
         """Returns all active auctions for commodity items for the entire game region.
 
 Auction house data updates at a set interval. The value was initially set at 1 hour; however, it might change over time without notice.
 
 Depending on the number of active auctions on the specified connected realm, the response from this endpoint may be rather large, sometimes exceeding 10 MB.
         
+        :param transform: A callable applied to the decoded response, e.g.
+            to_auction_columns, defaults to None
+        :type transform: Callable, optional
         :return: Returns all active auctions for commodity items for the entire game region.
         :rtype: dict
         """
@@ -168,7 +305,8 @@ Depending on the number of active auctions on the specified connected realm, the
 
         return await self.get_game_api_resource(
                                                 namespace, 
-                                                endpoint)
+                                                endpoint,
+                                                transform=transform)
 
 # endregion
 # region Azerite Essence API
@@ -1650,7 +1788,8 @@ Depending on the number of active auctions on the specified connected realm, the
 
     async def get_pvp_leaderboard(self,
                                   pvp_season_id: int,
-                                  pvp_bracket: str
+                                  pvp_bracket: str,
+                                  transform: Optional[Callable] = None
                                   ):
         """Returns the PvP leaderboard of a specific PvP bracket for a PvP season.
         
@@ -1658,6 +1797,9 @@ Depending on the number of active auctions on the specified connected realm, the
         :type pvp_season_id: int
         :param pvp_bracket: The PvP bracket type.
         :type pvp_bracket: str
+        :param transform: A callable applied to the decoded response, e.g.
+            to_pvp_leaderboard_columns, defaults to None
+        :type transform: Callable, optional
         :return: Returns the PvP leaderboard of a specific PvP bracket for a PvP season.
         :rtype: dict
         """
@@ -1666,7 +1808,8 @@ Depending on the number of active auctions on the specified connected realm, the
 
         return await self.get_game_api_resource(
                                                 namespace, 
-                                                endpoint)
+                                                endpoint,
+                                                transform=transform)
 
     async def get_pvp_rewards_index(self,
                                     pvp_season_id: int
@@ -0,0 +1,144 @@
+import asyncio
+from typing import Optional, Dict, Any, Iterable, Set, MutableMapping, Union
+
+from .game_data import GameData
+from ..columnar import AuctionColumns
+
+
+def get_item_metadata(item: dict) -> Dict[str, Any]:
+    """Trims a get_item response down to the fields used for enrichment
+
+    :param item: The response of GameData.get_item
+    :type item: dict
+    :return: The item's id, name, quality, class, subclass & level
+    :rtype: dict
+    """
+    return {
+        'id': item.get('id'),
+        'name': item.get('name'),
+        'quality': (item.get('quality') or {}).get('type'),
+        'item_class': (item.get('item_class') or {}).get('id'),
+        'item_subclass': (item.get('item_subclass') or {}).get('id'),
+        'level': item.get('level'),
+    }
+
+
+def collect_item_ids(snapshot: Union[dict, AuctionColumns]) -> Set[int]:
+    """Returns the distinct item ids of an auctions snapshot
+
+    :param snapshot: A get_auctions / get_commodities response, decoded or
+        as AuctionColumns
+    :type snapshot: Union[dict, AuctionColumns]
+    :return: The distinct item ids
+    :rtype: Set[int]
+    """
+    if isinstance(snapshot, AuctionColumns):
+        return set(snapshot.item_id)
+
+    return {auction['item']['id']
+            for auction in snapshot.get('auctions', ())}
+
+
+class ItemEnricher:
+    def __init__(self,
+                 game_data: GameData,
+                 store: Optional[MutableMapping[str, Any]] = None,
+                 *,
+                 max_concurrency: int = 8):
+        """Looks up item metadata (name, quality, class...) for auction
+        snapshots, fetching each distinct item only once.
+
+        Metadata is kept in store, keyed by the item id as a string. Any
+        mutable mapping will do, e.g. a shelve.Shelf to keep it across
+        restarts, so an enrichment pass only fetches items never seen
+        before.
+
+        :param game_data: The GameData endpoints to fetch items with
+        :type game_data: GameData
+        :param store: Where item metadata is kept, defaults to a dict
+        :type store: MutableMapping[str, Any], optional
+        :param max_concurrency: The maximum number of get_item requests in
+            flight at once (Default: 8)
+        :type max_concurrency: int, optional
+        """
+        self.game_data: GameData = game_data
+        self.store: MutableMapping[str, Any] = store if \
+            (store is not None) else {}
+        self.max_concurrency: int = max_concurrency
+
+        # Items currently being fetched, so concurrent enrichment passes
+        # share requests instead of repeating them
+        self.__in_flight: Dict[int, asyncio.Future] = {}
+
+    async def get_items(self,
+                        item_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Returns the metadata of the given items, fetching only those
+        missing from the store. Items which couldn't be fetched are left out.
+
+        :param item_ids: The item ids to look up
+        :type item_ids: Iterable[int]
+        :return: Item ids mapped to their metadata
+        :rtype: dict
+        """
+        items: Dict[int, Dict[str, Any]] = {}
+        misses = []
+        for item_id in set(item_ids):
+            metadata = self.store.get(str(item_id))
+            if metadata is not None:
+                items[item_id] = metadata
+            else:
+                misses.append(item_id)
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch(item_id: int) -> Optional[Dict[str, Any]]:
+            try:
+                async with semaphore:
+                    item = await self.game_data.get_item(str(item_id))
+            finally:
+                self.__in_flight.pop(item_id, None)
+
+            if item is None:
+                return None
+
+            metadata = get_item_metadata(item)
+            self.store[str(item_id)] = metadata
+            return metadata
+
+        futures = []
+        for item_id in misses:
+            if item_id not in self.__in_flight:
+                self.__in_flight[item_id] = asyncio.ensure_future(
+                    fetch(item_id))
+            futures.append(self.__in_flight[item_id])
+
+        for item_id, metadata in zip(
+                misses, await asyncio.gather(*futures,
+                                             return_exceptions=True)):
+            if isinstance(metadata, dict):
+                items[item_id] = metadata
+
+        return items
+
+    async def enrich(self, snapshot: Union[dict, AuctionColumns]
+                     ) -> Dict[int, Dict[str, Any]]:
+        """Looks up the metadata of every distinct item in an auctions
+        snapshot. Decoded snapshots are enriched in place, the metadata is
+        added to the item of each auction. AuctionColumns are left as is,
+        join them with the returned mapping on item_id.
+
+        :param snapshot: A get_auctions / get_commodities response, decoded
+            or as AuctionColumns
+        :type snapshot: Union[dict, AuctionColumns]
+        :return: Item ids mapped to their metadata
+        :rtype: dict
+        """
+        items = await self.get_items(collect_item_ids(snapshot))
+
+        if not isinstance(snapshot, AuctionColumns):
+            for auction in snapshot.get('auctions', ()):
+                metadata = items.get(auction['item']['id'])
+                if metadata is not None:
+                    auction['item'].update(metadata)
+
+        return items
@@ -0,0 +1,488 @@
+import asyncio
+import time
+from array import array
+from collections import Counter
+from email.utils import formatdate
+from typing import Optional, Dict, Any, Iterable, List, Tuple, \
+    MutableMapping, AsyncIterator, Hashable
+
+from .game_data import GameData, parse_connected_realm_ids
+
+
+class MythicLeaderboardCrawler:
+    def __init__(self,
+                 game_data: GameData,
+                 store: Optional[MutableMapping[str, Any]] = None,
+                 *,
+                 max_concurrency: int = 8):
+        """Crawls the Mythic Keystone leaderboards of every dungeon of every
+        connected realm for a period.
+
+        Leaderboards are kept in store. Those of finished periods can't
+        change anymore, so they're kept for good & never requested again.
+        Those of the current period are refetched on every crawl, with
+        If-Modified-Since so unchanged leaderboards cost a 304.
+
+        :param game_data: The GameData endpoints to crawl with
+        :type game_data: GameData
+        :param store: Where leaderboards are kept, keyed by
+            region/connected realm/dungeon/period. Any mutable mapping will
+            do, e.g. a shelve.Shelf to keep them across restarts, defaults
+            to a dict
+        :type store: MutableMapping[str, Any], optional
+        :param max_concurrency: The maximum number of requests in flight at
+            once (Default: 8)
+        :type max_concurrency: int, optional
+        """
+        self.game_data: GameData = game_data
+        self.store: MutableMapping[str, Any] = store if \
+            (store is not None) else {}
+        self.max_concurrency: int = max_concurrency
+
+        # Leaderboards fetched, answered with a 304 & served from the store
+        self.stats: Counter = Counter()
+
+        # The current period & when it ends, per region
+        self.__periods: Dict[str, Tuple[int, float]] = {}
+
+    async def get_current_period(self) -> Optional[int]:
+        """Returns the current Mythic Keystone period of the client's region,
+        only asking for it again once the period has ended
+
+        :return: The current period's id, None if it couldn't be fetched
+        :rtype: int
+        """
+        region = self.game_data.api.get_region()
+        current = self.__periods.get(region)
+        if current is not None and time.time() < current[1]:
+            return current[0]
+
+        # The current period is listed by the periods index, the mythic
+        # keystone index only links to seasons & dungeons
+        index = await self.game_data.get_mythic_keystone_periods_index()
+        period_id = ((index or {}).get('current_period') or {}).get('id')
+        if period_id is None:
+            return current[0] if current is not None else None
+
+        period = await self.game_data.get_mythic_keystone_period(period_id)
+        end_timestamp = (period or {}).get('end_timestamp')
+
+        # Without an end, check again on the next crawl
+        self.__periods[region] = (
+            period_id,
+            end_timestamp / 1000 if end_timestamp is not None else 0.0)
+
+        return period_id
+
+    async def get_dungeon_ids(self, connected_realm_id: int,
+                              period: int, finished: bool) -> List[int]:
+        """Returns the ids of the dungeons with a leaderboard on a connected
+        realm. The dungeons of finished periods are kept in the store.
+
+        :param connected_realm_id: The ID of the connected realm.
+        :type connected_realm_id: int
+        :param period: The leaderboard period.
+        :type period: int
+        :param finished: Whether the period has ended
+        :type finished: bool
+        :return: The dungeon ids
+        :rtype: List[int]
+        """
+        key = f"{self.game_data.api.get_region()}/{connected_realm_id}" \
+              f"/{period}"
+        dungeon_ids = self.store.get(key)
+        if dungeon_ids is not None:
+            return dungeon_ids
+
+        index = await self.game_data.get_mythic_keystone_leaderboards_index(
+            connected_realm_id)
+        dungeon_ids = [leaderboard['id'] for leaderboard in
+                       (index or {}).get('current_leaderboards', ())
+                       if 'id' in leaderboard]
+
+        if finished and dungeon_ids:
+            self.store[key] = dungeon_ids
+
+        return dungeon_ids
+
+    async def get_leaderboard(self, connected_realm_id: int,
+                              dungeon_id: int, period: int,
+                              finished: bool) -> Optional[Dict[str, Any]]:
+        """Returns a leaderboard, from the store if its period has ended &
+        it was already fetched, otherwise with a conditional request
+
+        :param connected_realm_id: The ID of the connected realm.
+        :type connected_realm_id: int
+        :param dungeon_id: The ID of the dungeon.
+        :type dungeon_id: int
+        :param period: The leaderboard period.
+        :type period: int
+        :param finished: Whether the period has ended
+        :type finished: bool
+        :return: The leaderboard, None if it couldn't be fetched
+        :rtype: dict
+        """
+        key = f"{self.game_data.api.get_region()}/{connected_realm_id}" \
+              f"/{dungeon_id}/{period}"
+        entry = self.store.get(key)
+        if entry is not None and entry['finished']:
+            self.stats['hits'] += 1
+            return entry['leaderboard']
+
+        headers = {}
+        if entry is not None and entry['last_modified'] is not None:
+            headers['If-Modified-Since'] = formatdate(
+                entry['last_modified'], usegmt=True)
+
+        response = await self.game_data.get_game_api_response(
+            "dynamic-{region}",
+            f"/data/wow/connected-realm/{connected_realm_id}"
+            f"/mythic-leaderboard/{dungeon_id}/period/{period}",
+            headers=headers)
+
+        if response is not None and response.not_modified and \
+                entry is not None:
+            self.stats['not_modified'] += 1
+            if finished:
+                # Written back so persistent stores see the change
+                entry['finished'] = True
+                self.store[key] = entry
+            return entry['leaderboard']
+
+        if response is None or not response.data:
+            # Serve what we have rather than nothing
+            return entry['leaderboard'] if entry is not None else None
+
+        self.stats['fetches'] += 1
+        last_modified = response.last_modified
+        self.store[key] = {
+            'finished': finished,
+            'last_modified': last_modified.timestamp()
+            if last_modified is not None else None,
+            'leaderboard': response.data,
+        }
+
+        return response.data
+
+    async def crawl(self,
+                    period: Optional[int] = None,
+                    connected_realm_ids: Optional[Iterable[int]] = None
+                    ) -> AsyncIterator[Tuple[int, int, Dict[str, Any]]]:
+        """Crawls the leaderboards of every dungeon of the given connected
+        realms for a period, yielding each one as soon as it's available.
+        Leaderboards which couldn't be fetched are skipped.
+
+        :param period: The leaderboard period, the current one if None,
+            defaults to None
+        :type period: int, optional
+        :param connected_realm_ids: The connected realms to crawl, every
+            connected realm in the region if None, defaults to None
+        :type connected_realm_ids: Iterable[int], optional
+        :return: An async iterator of (connected_realm_id, dungeon_id,
+            leaderboard)
+        :rtype: AsyncIterator[Tuple[int, int, dict]]
+        """
+        current_period = await self.get_current_period()
+        if period is None:
+            period = current_period
+        if period is None:
+            return
+
+        finished = current_period is not None and period < current_period
+
+        if connected_realm_ids is None:
+            index = await self.game_data.get_connected_realms_index()
+            connected_realm_ids = parse_connected_realm_ids(index or {})
+        connected_realm_ids = list(connected_realm_ids)
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def get_dungeon_ids(connected_realm_id: int) -> List[int]:
+            async with semaphore:
+                return await self.get_dungeon_ids(connected_realm_id,
+                                                  period, finished)
+
+        dungeons = await asyncio.gather(
+            *(get_dungeon_ids(i) for i in connected_realm_ids),
+            return_exceptions=True)
+
+        remaining = iter([
+            (connected_realm_id, dungeon_id)
+            for connected_realm_id, dungeon_ids in zip(connected_realm_ids,
+                                                       dungeons)
+            if isinstance(dungeon_ids, list)
+            for dungeon_id in dungeon_ids])
+        pending: Dict[asyncio.Future, Tuple[int, int]] = {}
+
+        try:
+            while True:
+                # Top up the in flight requests, we only start a new one once
+                # a previous result has been handed to the caller
+                while len(pending) < self.max_concurrency:
+                    job = next(remaining, None)
+                    if job is None:
+                        break
+                    pending[asyncio.ensure_future(self.get_leaderboard(
+                        job[0], job[1], period, finished))] = job
+
+                if not pending:
+                    break
+
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                for finished_task in done:
+                    connected_realm_id, dungeon_id = pending.pop(
+                        finished_task)
+                    if finished_task.exception() is not None:
+                        continue
+                    leaderboard = finished_task.result()
+                    if leaderboard is not None:
+                        yield connected_realm_id, dungeon_id, leaderboard
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+class LeaderboardEntry:
+    """A single leaderboard entry: a Mythic Keystone group, a PvP
+    character or a Hall of Fame guild. Members are stored as numbers into
+    the LeaderboardIndex's table of characters & guilds, so a character
+    appearing in hundreds of groups is only stored once.
+    """
+
+    __slots__ = ('leaderboard', 'rank', 'value', 'member_numbers',
+                 '_members')
+
+    def __init__(self, leaderboard: Tuple[Hashable, ...], rank: int,
+                 value: Optional[int], member_numbers: array,
+                 members: List[Tuple[str, str, str, Optional[int]]]):
+        """Constructor method
+        """
+        self.leaderboard: Tuple[Hashable, ...] = leaderboard
+        self.rank: int = rank
+        self.value: Optional[int] = value
+        self.member_numbers: array = member_numbers
+        self._members: List[Tuple[str, str, str, Optional[int]]] = members
+
+    def __repr__(self) -> str:
+        return f'<LeaderboardEntry leaderboard={self.leaderboard} ' \
+               f'rank={self.rank} value={self.value}>'
+
+    @property
+    def members(self) -> List[Tuple[str, str, str, Optional[int]]]:
+        """The entry's members
+
+        :return: (kind, realm slug, name, id) of each character or guild
+        :rtype: List[Tuple[str, str, str, int]]
+        """
+        return [self._members[number] for number in self.member_numbers]
+
+
+class LeaderboardIndex:
+    def __init__(self) -> None:
+        """An in memory index of Mythic Keystone, PvP & Mythic Raid (Hall of
+        Fame) leaderboard entries by character & guild, answering "where
+        does X appear" with a dictionary lookup rather than a scan of every
+        leaderboard.
+
+        Leaderboards are added one at a time & adding a leaderboard again
+        replaces its previous entries, so after a crawl only the
+        leaderboards which changed need to be added.
+
+        Entries keep their rank & value (keystone level, rating or Hall of
+        Fame timestamp), not the leaderboard responses themselves.
+        """
+        # Every character & guild seen, numbered in order of appearance
+        self.__members: List[Tuple[str, str, str, Optional[int]]] = []
+        self.__numbers: Dict[Tuple[Hashable, ...], int] = {}
+
+        # Member number -> leaderboard -> that member's entries
+        self.__postings: Dict[int, Dict[Tuple[Hashable, ...],
+                                        List[LeaderboardEntry]]] = {}
+        self.__leaderboards: Dict[Tuple[Hashable, ...],
+                                  List[LeaderboardEntry]] = {}
+
+    def __len__(self) -> int:
+        return len(self.__leaderboards)
+
+    def __get_number(self, kind: str, member: dict) -> Optional[int]:
+        # Interns a character or guild, returning its number
+        realm = (member.get('realm') or {}).get('slug')
+        name = member.get('name')
+        if realm is None or name is None:
+            return None
+
+        key = (kind, realm.lower(), name.lower())
+        number = self.__numbers.get(key)
+        if number is None:
+            number = len(self.__members)
+            self.__members.append((kind, realm, name, member.get('id')))
+            self.__numbers[key] = number
+            if member.get('id') is not None:
+                self.__numbers[(kind, member['id'])] = number
+
+        return number
+
+    def __add_entry(self, leaderboard: Tuple[Hashable, ...], rank: int,
+                    value: Optional[int], kind: str,
+                    members: Iterable[dict]) -> None:
+        numbers = array('l', (number for number in (
+            self.__get_number(kind, member) for member in members)
+            if number is not None))
+        entry = LeaderboardEntry(leaderboard, rank, value, numbers,
+                                 self.__members)
+
+        self.__leaderboards[leaderboard].append(entry)
+        for number in numbers:
+            self.__postings.setdefault(number, {}).setdefault(
+                leaderboard, []).append(entry)
+
+    def remove_leaderboard(self, leaderboard: Tuple[Hashable, ...]) -> bool:
+        """Removes a leaderboard's entries from the index
+
+        :param leaderboard: The leaderboard's key, e.g.
+            ('pvp', pvp_season_id, pvp_bracket)
+        :type leaderboard: Tuple
+        :return: Whether the leaderboard was indexed
+        :rtype: bool
+        """
+        entries = self.__leaderboards.pop(leaderboard, None)
+        if entries is None:
+            return False
+
+        for entry in entries:
+            for number in entry.member_numbers:
+                postings = self.__postings.get(number)
+                if postings is None:
+                    continue
+                postings.pop(leaderboard, None)
+                if not postings:
+                    del self.__postings[number]
+
+        return True
+
+    def add_mythic_keystone_leaderboard(self, connected_realm_id: int,
+                                        dungeon_id: int, period: int,
+                                        leaderboard: dict) -> int:
+        """Indexes (or re-indexes) a get_mythic_keystone_leaderboard
+        response under ('mythic-keystone', connected_realm_id, dungeon_id,
+        period). Each group is an entry valued by its keystone level.
+
+        :param connected_realm_id: The ID of the connected realm.
+        :type connected_realm_id: int
+        :param dungeon_id: The ID of the dungeon.
+        :type dungeon_id: int
+        :param period: The leaderboard period.
+        :type period: int
+        :param leaderboard: The leaderboard
+        :type leaderboard: dict
+        :return: The number of entries indexed
+        :rtype: int
+        """
+        key = ('mythic-keystone', connected_realm_id, dungeon_id, period)
+        self.remove_leaderboard(key)
+        self.__leaderboards[key] = []
+
+        for group in leaderboard.get('leading_groups', ()):
+            self.__add_entry(key, group.get('ranking', 0),
+                             group.get('keystone_level'), 'character',
+                             (member.get('profile') or {}
+                              for member in group.get('members', ())))
+
+        return len(self.__leaderboards[key])
+
+    def add_pvp_leaderboard(self, pvp_season_id: int, pvp_bracket: str,
+                            leaderboard: dict) -> int:
+        """Indexes (or re-indexes) a get_pvp_leaderboard response under
+        ('pvp', pvp_season_id, pvp_bracket). Each character is an entry
+        valued by its rating.
+
+        :param pvp_season_id: The ID of the PvP season.
+        :type pvp_season_id: int
+        :param pvp_bracket: The PvP bracket type.
+        :type pvp_bracket: str
+        :param leaderboard: The leaderboard
+        :type leaderboard: dict
+        :return: The number of entries indexed
+        :rtype: int
+        """
+        key = ('pvp', pvp_season_id, pvp_bracket)
+        self.remove_leaderboard(key)
+        self.__leaderboards[key] = []
+
+        for entry in leaderboard.get('entries', ()):
+            self.__add_entry(key, entry.get('rank', 0), entry.get('rating'),
+                             'character', (entry.get('character') or {},))
+
+        return len(self.__leaderboards[key])
+
+    def add_mythic_raid_leaderboard(self, raid: str, faction: str,
+                                    leaderboard: dict) -> int:
+        """Indexes (or re-indexes) a get_mythic_raid_leaderboard response
+        under ('mythic-raid', raid, faction). Each guild is an entry valued
+        by the timestamp of its kill.
+
+        :param raid: The raid for a leaderboard.
+        :type raid: str
+        :param faction: Player faction (alliance or horde).
+        :type faction: str
+        :param leaderboard: The leaderboard
+        :type leaderboard: dict
+        :return: The number of entries indexed
+        :rtype: int
+        """
+        key = ('mythic-raid', raid, faction)
+        self.remove_leaderboard(key)
+        self.__leaderboards[key] = []
+
+        for entry in leaderboard.get('entries', ()):
+            self.__add_entry(key, entry.get('rank', 0),
+                             entry.get('timestamp'), 'guild',
+                             (entry.get('guild') or {},))
+
+        return len(self.__leaderboards[key])
+
+    def __find(self, key: Tuple[Hashable, ...]) -> List[LeaderboardEntry]:
+        number = self.__numbers.get(key)
+        if number is None:
+            return []
+
+        return [entry for entries in self.__postings.get(number, {}).values()
+                for entry in entries]
+
+    def find_character(self, realm_slug: str,
+                       character_name: str) -> List[LeaderboardEntry]:
+        """Returns every leaderboard entry of a character
+
+        :param realm_slug: The slug of the realm.
+        :type realm_slug: str
+        :param character_name: The name of the character.
+        :type character_name: str
+        :return: The character's entries
+        :rtype: List[LeaderboardEntry]
+        """
+        return self.__find(('character', realm_slug.lower(),
+                            character_name.lower()))
+
+    def find_character_id(self, character_id: int) -> List[LeaderboardEntry]:
+        """Returns every leaderboard entry of a character, by its id
+
+        :param character_id: The ID of the character.
+        :type character_id: int
+        :return: The character's entries
+        :rtype: List[LeaderboardEntry]
+        """
+        return self.__find(('character', character_id))
+
+    def find_guild(self, realm_slug: str,
+                   guild_name: str) -> List[LeaderboardEntry]:
+        """Returns every leaderboard entry of a guild
+
+        :param realm_slug: The slug of the realm.
+        :type realm_slug: str
+        :param guild_name: The name of the guild.
+        :type guild_name: str
+        :return: The guild's entries
+        :rtype: List[LeaderboardEntry]
+        """
+        return self.__find(('guild', realm_slug.lower(), guild_name.lower()))
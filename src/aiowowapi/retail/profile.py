@@ -1,4 +1,101 @@
-from typing import Union, Optional
+import asyncio
+import re
+from typing import Union, Optional, Tuple, Dict, Any, Iterable, \
+    AsyncIterator, MutableSet, Set
+
+from ..api import RequestException
+from ..cache import NotFoundCache
+
+
+# The root resources of characters & guilds, a 404 for either (or for a
+# character's status) confirms the character / guild doesn't exist
+_CHARACTER_ENDPOINT = re.compile(r"^/profile/wow/character/([^/]+)/([^/]+)")
+_GUILD_ENDPOINT = re.compile(r"^/data/wow/guild/([^/]+)/([^/]+)")
+_CONCLUSIVE_SUFFIXES = ('', '/status')
+
+# The parts of a character bundle, mapped to the Profile methods fetching them
+CHARACTER_BUNDLE_PARTS: Dict[str, str] = {
+    'profile': 'get_character_profile_summary',
+    'achievements': 'get_character_achievements_summary',
+    'appearance': 'get_character_appearance_summary',
+    'collections': 'get_character_collections_index',
+    'dungeons': 'get_character_dungeons',
+    'encounters': 'get_character_encounters_summary',
+    'equipment': 'get_character_equipment_summary',
+    'hunter_pets': 'get_character_hunter_pets_summary',
+    'media': 'get_character_media_summary',
+    'mounts': 'get_character_mounts_collection_summary',
+    'mythic_keystone_profile': 'get_character_mythic_keystone_profile_index',
+    'pets': 'get_character_pets_collection_summary',
+    'professions': 'get_character_professions_summary',
+    'pvp_summary': 'get_character_pvp_summary',
+    'quests': 'get_character_quests',
+    'raids': 'get_character_raids',
+    'reputations': 'get_character_reputations_summary',
+    'soulbinds': 'get_character_soulbinds',
+    'specializations': 'get_character_specializations_summary',
+    'statistics': 'get_character_statistics_summary',
+    'titles': 'get_character_titles_summary',
+}
+
+# The parts fetched when none are specified, what a character page needs
+DEFAULT_CHARACTER_BUNDLE_PARTS = (
+    'profile', 'equipment', 'media', 'specializations', 'statistics',
+    'mythic_keystone_profile', 'pvp_summary', 'raids', 'professions')
+
+
+def _not_found_key(endpoint: str) -> Tuple[Optional[Tuple[str, str, str]],
+                                           bool]:
+    # Returns the negative cache key of the character / guild an endpoint
+    # belongs to, and whether the endpoint is its root resource
+    for kind, pattern in (('character', _CHARACTER_ENDPOINT),
+                          ('guild', _GUILD_ENDPOINT)):
+        found = pattern.match(endpoint)
+        if found:
+            key = (kind, found.group(1).lower(), found.group(2).lower())
+            return key, endpoint[found.end():] in _CONCLUSIVE_SUFFIXES
+
+    return None, False
+
+
+class CharacterBundle:
+    """The result of Profile.get_character_bundle, parts which couldn't be
+    fetched are None & have their exception in errors
+
+    :param realm_slug: The slug of the realm.
+    :type realm_slug: str
+    :param character_name: The lowercase name of the character.
+    :type character_name: str
+    """
+
+    __slots__ = ('realm_slug', 'character_name', 'status', 'parts',
+                 'errors', 'not_found')
+
+    def __init__(self, realm_slug: str, character_name: str):
+        """Constructor method
+        """
+        self.realm_slug: str = realm_slug
+        self.character_name: str = character_name
+
+        # The character's profile status, if it was fetched
+        self.status: Optional[dict] = None
+
+        self.parts: Dict[str, Any] = {}
+        self.errors: Dict[str, BaseException] = {}
+
+        # Whether the character doesn't exist (or is no longer valid)
+        self.not_found: bool = False
+
+    def __getitem__(self, part: str) -> Any:
+        return self.parts[part]
+
+    @property
+    def complete(self) -> bool:
+        """Whether every requested part was fetched
+
+        :rtype: bool
+        """
+        return not self.not_found and not self.errors
 
 
 class Profile:
@@ -14,12 +111,34 @@ class Profile:
         """
         self.api = api
 
+        # Characters & guilds confirmed not to exist, requests for them (or
+        # any of their sub-resources) are answered with None until the 404
+        # expires
+        self.not_found: NotFoundCache = NotFoundCache()
+
+    def is_not_found(self, realm_slug: str, name: str,
+                     kind: str = 'character') -> bool:
+        """Whether a character or guild was recently confirmed not to exist,
+        as opposed to a request for it failing
+
+        :param realm_slug: The slug of the realm.
+        :type realm_slug: str
+        :param name: The lowercase name of the character, or guild slug.
+        :type name: str
+        :param kind: character or guild, defaults to character
+        :type kind: str, optional
+        :rtype: bool
+        """
+        return (kind, realm_slug.lower(), name.lower()) in self.not_found
+
     async def get_profile_api_resource(self,
                                        namespace: str,
                                        endpoint: str,
                                        params: dict = None
                                        ) -> Union[dict, None]:
-        """Generic method for retrieving data from a Profile API endpoint
+        """Generic method for retrieving data from a Profile API endpoint.
+        Characters & guilds which don't exist (404) are remembered in
+        not_found for a short while, see is_not_found.
 
         :param namespace: The namespace of the resource we're trying to access
         :type namespace: str
@@ -30,6 +149,10 @@ class Profile:
         :return: The result of the API request (Warning: Can be None/Null)
         :rtype: dict
         """
+        key, is_root = _not_found_key(endpoint)
+        if key is not None and key in self.not_found:
+            return None
+
         region = self.api.get_region()
         locale = self.api.get_locale()
         hostname = self.api.get_hostname()
@@ -45,8 +168,19 @@ class Profile:
         # https://github.com/Adalyia/aiowowapi/pull/2
         headers = {"Authorization": f"Bearer {token}"}
 
+        response = await self.api.get_resource_response(
+            hostname, endpoint, params, headers, not_found_ok=True)
+        if response is None:
+            return None
+
+        # Sub-resources (e.g. a mythic keystone profile) can 404 for
+        # characters which do exist, only the root resource is conclusive
+        if response.status == 404:
+            if key is not None and is_root:
+                self.not_found.add(key)
+            return None
 
-        return await self.api.get_resource(hostname, endpoint, params, headers)
+        return response.data
 
 # region Character Achievements API
 
@@ -718,3 +852,199 @@ If the character is valid and the character IDs match, the client retains the da
                                                    endpoint)
 
 # endregion
+# region Character Bundle
+
+    async def get_character_bundle(self,
+                                   realm_slug: str,
+                                   character_name: str,
+                                   parts: Optional[Iterable[str]] = None,
+                                   check_status: bool = True
+                                   ) -> CharacterBundle:
+        """Fetches several parts of a character's profile concurrently, e.g.
+        everything needed to render a character page.
+
+        The character's profile status is checked first, if the character
+        doesn't exist (or is no longer valid) no part is requested. Parts
+        which fail don't fail the bundle, their exception is kept in
+        CharacterBundle.errors instead.
+
+        :param realm_slug: The slug of the realm.
+        :type realm_slug: str
+        :param character_name: The lowercase name of the character.
+        :type character_name: str
+        :param parts: The parts to fetch, see CHARACTER_BUNDLE_PARTS,
+            defaults to DEFAULT_CHARACTER_BUNDLE_PARTS
+        :type parts: Iterable[str], optional
+        :param check_status: Whether to check the character's profile status
+            before fetching any part, defaults to True
+        :type check_status: bool, optional
+        :raises ValueError: Raised when an unknown part is requested
+        :return: The fetched parts
+        :rtype: CharacterBundle
+        """
+        parts = tuple(parts) if parts is not None \
+            else DEFAULT_CHARACTER_BUNDLE_PARTS
+        unknown = [part for part in parts
+                   if part not in CHARACTER_BUNDLE_PARTS]
+        if unknown:
+            raise ValueError(f"Unknown character bundle parts {unknown}, "
+                             f"supported parts are "
+                             f"{list(CHARACTER_BUNDLE_PARTS)}")
+
+        bundle = CharacterBundle(realm_slug, character_name)
+
+        # Make sure we hold a token before fanning out, so the parts don't
+        # each wait on fetching it
+        await self.api.get_access_token()
+
+        if check_status:
+            try:
+                bundle.status = await self.get_character_profile_status(
+                    realm_slug, character_name)
+            except Exception as e:
+                # Not being able to check isn't a reason not to try the parts
+                bundle.errors['status'] = e
+
+            if self.is_not_found(realm_slug, character_name) or \
+                    (bundle.status is not None and
+                     bundle.status.get('is_valid') is False):
+                bundle.not_found = True
+                bundle.parts = {part: None for part in parts}
+                return bundle
+
+        results = await asyncio.gather(
+            *(getattr(self, CHARACTER_BUNDLE_PARTS[part])(realm_slug,
+                                                           character_name)
+              for part in parts),
+            return_exceptions=True)
+
+        for part, result in zip(parts, results):
+            if isinstance(result, BaseException):
+                bundle.parts[part] = None
+                bundle.errors[part] = result
+            else:
+                bundle.parts[part] = result
+                if result is None:
+                    bundle.errors[part] = RequestException(
+                        f"Failed to fetch the character's {part}")
+
+        # The character may have been confirmed missing by the parts
+        # themselves when its status wasn't checked
+        bundle.not_found = self.is_not_found(realm_slug, character_name)
+
+        return bundle
+
+# endregion
+# region Guild Roster Crawl
+
+    async def iter_guild_roster_bundles(self,
+                                        realm_slug: str,
+                                        name_slug: str,
+                                        parts: Optional[Iterable[str]] = None,
+                                        min_level: int = 0,
+                                        max_concurrency: int = 8,
+                                        seen: Optional[MutableSet] = None
+                                        ) -> AsyncIterator[
+                                            Tuple[dict, CharacterBundle]]:
+        """Crawls a guild's roster, fetching a character bundle for every
+        member & yielding each as soon as it's complete.
+
+        At most max_concurrency bundles are fetched (or waiting to be
+        consumed) at once, so memory use doesn't grow with the size of the
+        guild. Every bundle still makes one request per part, all of which
+        go through the client's request slots & rate limiter. Members are
+        already known to exist, so their profile status isn't checked.
+
+        Members are only deduplicated through seen, profile responses have
+        no cache TTL by default so crawling a character again fetches it
+        again. A member whose bundle can't be fetched at all doesn't end the
+        crawl, it's yielded with every part None & the exception in errors.
+
+        :param realm_slug: The slug of the realm.
+        :type realm_slug: str
+        :param name_slug: The slug of the guild.
+        :type name_slug: str
+        :param parts: The parts to fetch for each member, see
+            get_character_bundle, defaults to DEFAULT_CHARACTER_BUNDLE_PARTS
+        :type parts: Iterable[str], optional
+        :param min_level: Members below this level are skipped, defaults to 0
+        :type min_level: int, optional
+        :param max_concurrency: The maximum number of bundles being fetched
+            at once, defaults to 8
+        :type max_concurrency: int, optional
+        :param seen: (realm_slug, character_name) pairs to skip, members
+            are added to it once their bundle was fetched without errors.
+            Share one between crawls to never fetch a character twice,
+            defaults to None
+        :type seen: MutableSet, optional
+        :return: An async iterator of (roster member, bundle)
+        :rtype: AsyncIterator[Tuple[dict, CharacterBundle]]
+        """
+        parts = tuple(parts) if parts is not None \
+            else DEFAULT_CHARACTER_BUNDLE_PARTS
+        seen = seen if seen is not None else set()
+
+        roster = await self.get_guild_roster(realm_slug, name_slug)
+        if roster is None:
+            return
+
+        # Members being fetched, they only join seen once that succeeded
+        crawling: Set[Tuple[str, str]] = set()
+
+        def members():
+            for member in roster.get('members', ()):
+                character = member.get('character', {})
+                if character.get('level', 0) < min_level:
+                    continue
+
+                key = (character.get('realm', {}).get('slug', realm_slug),
+                       character['name'].lower())
+                if key in seen or key in crawling:
+                    continue
+                crawling.add(key)
+
+                yield member, key
+
+        remaining = members()
+        pending: Dict[asyncio.Future, Tuple[dict, Tuple[str, str]]] = {}
+
+        try:
+            while True:
+                # Top up the bundles in flight, we only start a new one once
+                # a previous one has been handed to the caller
+                while len(pending) < max_concurrency:
+                    found = next(remaining, None)
+                    if found is None:
+                        break
+                    member, (member_realm, member_name) = found
+                    pending[asyncio.ensure_future(self.get_character_bundle(
+                        member_realm, member_name, parts,
+                        check_status=False))] = found
+
+                if not pending:
+                    break
+
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                while done:
+                    finished = done.pop()
+                    member, key = pending.pop(finished)
+                    crawling.discard(key)
+
+                    try:
+                        bundle = finished.result()
+                    except Exception as e:
+                        # One member failing shouldn't end the crawl
+                        bundle = CharacterBundle(*key)
+                        bundle.parts = {part: None for part in parts}
+                        bundle.errors = {part: e for part in parts}
+
+                    if not bundle.errors:
+                        seen.add(key)
+
+                    yield member, bundle
+        finally:
+            for task in pending:
+                task.cancel()
+
+# endregion
@@ -0,0 +1,238 @@
+import asyncio
+import re
+import time
+from bisect import bisect_left
+from collections import Counter
+from typing import Optional, Dict, List, Set, Iterable, Tuple
+
+from .game_data import GameData
+
+
+# How long a region's realm index is used before being fetched again
+DEFAULT_REALM_INDEX_TTL = 24 * 60 * 60
+
+# How long a stale index is used after a failed refresh before trying again
+DEFAULT_REALM_INDEX_RETRY_INTERVAL = 5 * 60
+
+# Anything but letters & digits is ignored when matching realm names, so
+# "Azjol-Nerub", "azjolnerub" & "Azjol Nerub" are all the same realm
+_IGNORED_CHARACTERS = re.compile(r"[\W_]+", re.U)
+
+
+def normalize_realm_name(name: str) -> str:
+    """Normalizes a realm name, slug or user query for matching
+
+    :param name: A realm name, slug or user input
+    :type name: str
+    :return: The casefolded name with only letters & digits left
+    :rtype: str
+    """
+    return _IGNORED_CHARACTERS.sub('', str(name).casefold())
+
+
+def _trigrams(value: str) -> Set[str]:
+    # Padded so short names & their starts still produce trigrams
+    padded = f'  {value} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class RealmIndex:
+    def __init__(self, realms: Iterable[dict]):
+        """An index of a region's realms, resolving user input to realm
+        slugs without scanning every realm
+
+        :param realms: The realms of a get_realms_index response
+        :type realms: Iterable[dict]
+        """
+        self.realms: Dict[str, dict] = {}
+        self.created_at: float = time.time()
+
+        # Exact matches on the id, name, name without spaces & slug
+        self.__exact: Dict[str, str] = {}
+
+        # Sorted normalized names & slugs, for prefix matches
+        self.__keys: List[Tuple[str, str]] = []
+
+        # Normalized name & slug trigrams, for partial & fuzzy matches
+        self.__trigrams: Dict[str, Set[str]] = {}
+        self.__normalized: Dict[str, Set[str]] = {}
+
+        for realm in realms:
+            slug = realm['slug']
+            self.realms[slug] = realm
+
+            name = str(realm.get('name', slug))
+            for key in (str(realm.get('id')), name.lower(),
+                        name.replace(' ', '').lower(), slug.lower()):
+                self.__exact.setdefault(key, slug)
+
+            for key in {normalize_realm_name(name),
+                        normalize_realm_name(slug)}:
+                self.__exact.setdefault(key, slug)
+                self.__keys.append((key, slug))
+                self.__normalized.setdefault(slug, set()).add(key)
+                for trigram in _trigrams(key):
+                    self.__trigrams.setdefault(trigram, set()).add(slug)
+
+        self.__keys.sort()
+
+    def __len__(self) -> int:
+        return len(self.realms)
+
+    def resolve(self, query: str) -> Optional[str]:
+        """Returns the slug of the realm best matching a query
+
+        :param query: A realm id, name, slug, or part of one
+        :type query: str
+        :return: The matching realm's slug, None if nothing matches
+        :rtype: str
+        """
+        matches = self.search(query, limit=1)
+        return matches[0] if matches else None
+
+    def search(self, query: str, limit: int = 5) -> List[str]:
+        """Returns the slugs of the realms matching a query, best first.
+        Exact matches come first, then realms starting with the query, then
+        realms containing it, then realms with a similar name.
+
+        :param query: A realm id, name, slug, or part of one
+        :type query: str
+        :param limit: The maximum number of slugs returned, defaults to 5
+        :type limit: int, optional
+        :return: The matching realms' slugs
+        :rtype: List[str]
+        """
+        query = str(query).strip()
+        exact = self.__exact.get(query.lower())
+        normalized = normalize_realm_name(query)
+        if exact is None:
+            exact = self.__exact.get(normalized)
+        if exact is not None:
+            return [exact][:limit]
+
+        if not normalized:
+            return []
+
+        matches: List[str] = []
+
+        # Prefix matches, shortest (closest) names first
+        prefixed = []
+        position = bisect_left(self.__keys, (normalized, ''))
+        while position < len(self.__keys) and \
+                self.__keys[position][0].startswith(normalized):
+            prefixed.append(self.__keys[position])
+            position += 1
+        for _, slug in sorted(prefixed, key=lambda i: (len(i[0]), i[0])):
+            if slug not in matches:
+                matches.append(slug)
+
+        # Realms sharing trigrams with the query, ranked by similarity. A
+        # realm containing the query shares all of its trigrams but the
+        # leading ones
+        query_trigrams = _trigrams(normalized)
+        shared: Counter = Counter()
+        for trigram in query_trigrams:
+            shared.update(self.__trigrams.get(trigram, ()))
+
+        contained = []
+        similar = []
+        for slug, count in shared.items():
+            if slug in matches:
+                continue
+            keys = self.__normalized[slug]
+            if any(normalized in key for key in keys):
+                contained.append((-count, slug))
+                continue
+
+            similarity = max(
+                count / len(query_trigrams | _trigrams(key)) for key in keys)
+            if similarity >= 0.3:
+                similar.append((-similarity, slug))
+
+        matches.extend(slug for _, slug in sorted(contained))
+        matches.extend(slug for _, slug in sorted(similar))
+
+        return matches[:limit]
+
+
+class RealmResolver:
+    def __init__(self, game_data: GameData,
+                 ttl: float = DEFAULT_REALM_INDEX_TTL,
+                 retry_interval: float = DEFAULT_REALM_INDEX_RETRY_INTERVAL):
+        """Keeps a RealmIndex per region, fetching it again once ttl has
+        passed. Should fetching fail, the previous index keeps being used &
+        the refresh is only tried again after retry_interval.
+
+        :param game_data: The GameData endpoints to fetch realms with
+        :type game_data: GameData
+        :param ttl: Seconds an index is used for before being refreshed
+            (Default: 1 day)
+        :type ttl: float, optional
+        :param retry_interval: Seconds between refresh attempts once one has
+            failed (Default: 5 minutes)
+        :type retry_interval: float, optional
+        """
+        self.game_data: GameData = game_data
+        self.ttl: float = ttl
+        self.retry_interval: float = retry_interval
+
+        self.__indexes: Dict[str, RealmIndex] = {}
+        # When a region's stale index may next be refreshed, after a failure
+        self.__retry_at: Dict[str, float] = {}
+        self.__locks: Dict[str, asyncio.Lock] = {}
+
+    async def get_index(self) -> Optional[RealmIndex]:
+        """Returns the realm index of the client's current region
+
+        :return: The realm index, None if it couldn't be fetched
+        :rtype: RealmIndex
+        """
+        region = self.game_data.api.get_region()
+        index = self.__indexes.get(region)
+        if index is not None and self.__is_usable(region, index):
+            return index
+
+        # Only one caller fetches the realms, the others wait for it
+        lock = self.__locks.setdefault(region, asyncio.Lock())
+        async with lock:
+            index = self.__indexes.get(region)
+            if index is not None and self.__is_usable(region, index):
+                return index
+
+            try:
+                data = await self.game_data.get_realms_index()
+            except Exception:
+                # A stale index beats none at all
+                if index is None:
+                    raise
+                data = None
+
+            if data:
+                index = RealmIndex(data.get('realms', ()))
+                self.__indexes[region] = index
+                self.__retry_at.pop(region, None)
+            else:
+                self.__retry_at[region] = time.time() + self.retry_interval
+
+        return index
+
+    def __is_usable(self, region: str, index: RealmIndex) -> bool:
+        # Fresh, or stale but a refresh failed too recently to try again
+        now = time.time()
+        return now - index.created_at < self.ttl or \
+            now < self.__retry_at.get(region, 0.0)
+
+    async def resolve(self, query: str) -> Optional[str]:
+        """Returns the slug of the realm best matching a query in the
+        client's current region
+
+        :param query: A realm id, name, slug, or part of one
+        :type query: str
+        :return: The matching realm's slug, None if nothing matches
+        :rtype: str
+        """
+        index = await self.get_index()
+        if index is None:
+            return None
+
+        return index.resolve(query)
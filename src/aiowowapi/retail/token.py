@@ -0,0 +1,278 @@
+import asyncio
+from array import array
+from bisect import bisect_right
+from email.utils import formatdate
+from typing import Optional, Dict, Iterable, List, Tuple, Union, \
+    AsyncIterator
+
+from .game_data import GameData
+
+
+class TokenSeries:
+    def __init__(self, keyframe_interval: int = 256):
+        """A WoW Token price time series, stored as deltas in typed arrays.
+
+        Timestamps (unix seconds) & prices (copper) are stored as the
+        difference from the previous sample, with the absolute values of
+        every keyframe_interval-th sample kept aside so a range query only
+        decodes from the keyframe before it rather than from the start.
+
+        :param keyframe_interval: Samples between absolute keyframes
+            (Default: 256)
+        :type keyframe_interval: int, optional
+        """
+        self.keyframe_interval: int = keyframe_interval
+
+        self.__timestamp_deltas: array = array('i')
+        self.__price_deltas: array = array('q')
+        self.__keyframe_timestamps: array = array('q')
+        self.__keyframe_prices: array = array('q')
+        self.__last: Optional[Tuple[int, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.__timestamp_deltas)
+
+    @property
+    def last(self) -> Optional[Tuple[int, int]]:
+        """The latest sample
+
+        :return: (timestamp, price), None if the series is empty
+        :rtype: Tuple[int, int]
+        """
+        return self.__last
+
+    def append(self, timestamp: int, price: int) -> bool:
+        """Adds a sample, if it's newer than the latest one
+
+        :param timestamp: The unix timestamp of the price, in seconds
+        :type timestamp: int
+        :param price: The price in copper
+        :type price: int
+        :return: Whether the sample was added
+        :rtype: bool
+        """
+        if self.__last is None:
+            previous_timestamp, previous_price = timestamp, price
+        elif timestamp > self.__last[0]:
+            previous_timestamp, previous_price = self.__last
+        else:
+            return False
+
+        if len(self.__timestamp_deltas) % self.keyframe_interval == 0:
+            self.__keyframe_timestamps.append(timestamp)
+            self.__keyframe_prices.append(price)
+
+        self.__timestamp_deltas.append(timestamp - previous_timestamp)
+        self.__price_deltas.append(price - previous_price)
+        self.__last = (timestamp, price)
+
+        return True
+
+    def range(self, start: Optional[int] = None,
+              end: Optional[int] = None) -> List[Tuple[int, int]]:
+        """Returns the samples within a time range
+
+        :param start: The first timestamp included, defaults to the start of
+            the series
+        :type start: int, optional
+        :param end: The first timestamp excluded, defaults to the end of the
+            series
+        :type end: int, optional
+        :return: (timestamp, price) of each sample, oldest first
+        :rtype: List[Tuple[int, int]]
+        """
+        if not self.__keyframe_timestamps:
+            return []
+
+        # Start decoding at the last keyframe at or before start
+        keyframe = 0
+        if start is not None:
+            keyframe = max(bisect_right(self.__keyframe_timestamps,
+                                        start) - 1, 0)
+
+        position = keyframe * self.keyframe_interval
+        timestamp = self.__keyframe_timestamps[keyframe]
+        price = self.__keyframe_prices[keyframe]
+
+        # Deltas are read in place, slicing would copy the whole tail of
+        # the series
+        timestamp_deltas = self.__timestamp_deltas
+        price_deltas = self.__price_deltas
+        samples = []
+        while True:
+            if end is not None and timestamp >= end:
+                break
+            if start is None or timestamp >= start:
+                samples.append((timestamp, price))
+
+            position += 1
+            if position >= len(timestamp_deltas):
+                break
+            timestamp += timestamp_deltas[position]
+            price += price_deltas[position]
+
+        return samples
+
+    def downsample(self, bucket: int, start: Optional[int] = None,
+                   end: Optional[int] = None
+                   ) -> List[Tuple[int, int, int, int, int]]:
+        """Aggregates the samples within a time range into fixed buckets,
+        e.g. hourly or daily candles for a dashboard
+
+        :param bucket: The bucket size in seconds
+        :type bucket: int
+        :param start: The first timestamp included, defaults to the start of
+            the series
+        :type start: int, optional
+        :param end: The first timestamp excluded, defaults to the end of the
+            series
+        :type end: int, optional
+        :return: (bucket start, open, high, low, close) of each bucket
+            holding samples, oldest first
+        :rtype: List[Tuple[int, int, int, int, int]]
+        """
+        candles: List[Tuple[int, int, int, int, int]] = []
+        for timestamp, price in self.range(start, end):
+            bucket_start = timestamp - timestamp % bucket
+            if candles and candles[-1][0] == bucket_start:
+                _, first, high, low, _ = candles[-1]
+                candles[-1] = (bucket_start, first, max(high, price),
+                               min(low, price), price)
+            else:
+                candles.append((bucket_start, price, price, price, price))
+
+        return candles
+
+    def get_price(self, timestamp: int) -> Optional[int]:
+        """Returns the price in effect at a given time
+
+        :param timestamp: A unix timestamp, in seconds
+        :type timestamp: int
+        :return: The price of the latest sample at or before timestamp, None
+            if there's none
+        :rtype: int
+        """
+        keyframe = bisect_right(self.__keyframe_timestamps, timestamp) - 1
+        if keyframe < 0:
+            return None
+
+        samples = self.range(self.__keyframe_timestamps[keyframe],
+                             timestamp + 1)
+        return samples[-1][1] if samples else None
+
+
+class _TokenSchedule:
+    # Polling state for a single region
+
+    __slots__ = ('game_data', 'last_modified')
+
+    def __init__(self, game_data: GameData):
+        self.game_data: GameData = game_data
+        self.last_modified: Optional[float] = None
+
+
+class TokenPoller:
+    def __init__(self,
+                 game_data: Union[GameData, Iterable[GameData]],
+                 *,
+                 interval: float = 60.0,
+                 keyframe_interval: int = 256):
+        """Polls the WoW Token price of one or more regions, keeping a
+        TokenSeries per region.
+
+        Fetches are conditional (If-Modified-Since), so polling a region
+        whose price hasn't been updated yet costs a 304, and a sample is
+        only added when last_updated_timestamp advances.
+
+        :param game_data: The GameData endpoints of each region to poll, a
+            client is bound to a single region so pass one per region
+        :type game_data: Union[GameData, Iterable[GameData]]
+        :param interval: Seconds between polls of every region
+            (Default: 60)
+        :type interval: float, optional
+        :param keyframe_interval: See TokenSeries (Default: 256)
+        :type keyframe_interval: int, optional
+        """
+        if isinstance(game_data, GameData):
+            game_data = [game_data]
+
+        self.interval: float = interval
+        self.series: Dict[str, TokenSeries] = {}
+
+        self.__schedules: Dict[str, _TokenSchedule] = {}
+        for endpoints in game_data:
+            region = endpoints.api.get_region()
+            self.__schedules[region] = _TokenSchedule(endpoints)
+            self.series[region] = TokenSeries(keyframe_interval)
+
+        self.__stopped: Optional[asyncio.Event] = None
+
+    async def fetch(self, region: str) -> Optional[Tuple[int, int]]:
+        """Fetches a region's WoW Token price if it changed since the last
+        fetch & adds it to the region's series
+
+        :param region: The region, e.g. US
+        :type region: str
+        :return: (timestamp, price) of the new sample, None if the price
+            wasn't updated or the request failed
+        :rtype: Tuple[int, int]
+        """
+        schedule = self.__schedules[region]
+
+        headers = {}
+        if schedule.last_modified is not None:
+            headers['If-Modified-Since'] = formatdate(
+                schedule.last_modified, usegmt=True)
+
+        response = await schedule.game_data.get_game_api_response(
+            "dynamic-{region}", "/data/wow/token/index", headers=headers)
+        if response is None or response.not_modified or not response.data:
+            return None
+
+        last_modified = response.last_modified
+        if last_modified is not None:
+            schedule.last_modified = last_modified.timestamp()
+
+        updated = response.data.get('last_updated_timestamp')
+        price = response.data.get('price')
+        if updated is None or price is None:
+            return None
+
+        timestamp = int(updated) // 1000
+        if not self.series[region].append(timestamp, int(price)):
+            return None
+
+        return timestamp, int(price)
+
+    async def poll(self) -> AsyncIterator[Tuple[str, int, int]]:
+        """Polls every region until stop is called, yielding each new price
+        as it's added to its series
+
+        :return: An async iterator of (region, timestamp, price)
+        :rtype: AsyncIterator[Tuple[str, int, int]]
+        """
+        self.__stopped = asyncio.Event()
+        try:
+            while not self.__stopped.is_set():
+                regions = list(self.__schedules)
+                samples = await asyncio.gather(
+                    *(self.fetch(region) for region in regions),
+                    return_exceptions=True)
+
+                for region, sample in zip(regions, samples):
+                    if isinstance(sample, tuple):
+                        yield region, sample[0], sample[1]
+
+                try:
+                    await asyncio.wait_for(self.__stopped.wait(),
+                                           self.interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.__stopped = None
+
+    def stop(self) -> None:
+        """Stops a running poll loop
+        """
+        if self.__stopped is not None:
+            self.__stopped.set()
@@ -0,0 +1,347 @@
+"""
+Battle.net API Mock Server
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+A local aiohttp server mimicking the Battle.net OAuth, Game Data & Profile
+APIs, for offline tests & reproducible benchmarks.
+
+:copyright: (c) 2021-Present Adalyia
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import asyncio
+import json
+import random
+import re
+import zlib
+from collections import Counter, deque
+from email.utils import parsedate_to_datetime
+from types import TracebackType
+from typing import Optional, Type, Dict, Any, Deque, List, Tuple
+
+from aiohttp import web
+
+from .transport import brotli
+
+
+# Used to pull a numeric id out of a request path for synthetic payloads
+_ID_PATTERN = re.compile(r"/(\d+)(?=/|$)")
+
+
+class MockBattleNetServer:
+    def __init__(self,
+                 *,
+                 host: str = '127.0.0.1',
+                 port: int = 0,
+                 payload_size: int = 1024,
+                 latency: float = 0.0,
+                 error_rates: Optional[Dict[int, float]] = None,
+                 token_expires_in: int = 86399,
+                 compression: Optional[str] = None,
+                 seed: Optional[int] = None):
+        """A local server mimicking /oauth/token and the Game Data & Profile
+        API routes. Unless a payload was registered with set_response, every
+        Game Data & Profile route serves a synthetic JSON payload of roughly
+        payload_size bytes.
+
+        :param host: The interface to listen on (Default: 127.0.0.1)
+        :type host: str, optional
+        :param port: The port to listen on, 0 picks a free port (Default: 0)
+        :type port: int, optional
+        :param payload_size: The approximate size in bytes of synthetic
+            payloads (Default: 1024)
+        :type payload_size: int, optional
+        :param latency: Seconds to wait before answering each request
+            (Default: 0)
+        :type latency: float, optional
+        :param error_rates: The probability of answering a request with a
+            given error status, e.g. {429: 0.05, 503: 0.01} (Default: None)
+        :type error_rates: dict, optional
+        :param token_expires_in: The lifetime in seconds of issued access
+            tokens (Default: 86399)
+        :type token_expires_in: int, optional
+        :param compression: Compress response bodies with gzip, deflate or
+            br when the client accepts it (Default: None)
+        :type compression: str, optional
+        :param seed: Seed for the random error injection (Default: None)
+        :type seed: int, optional
+        """
+        self.host: str = host
+        self.port: int = port
+        self.payload_size: int = payload_size
+        self.latency: float = latency
+        self.error_rates: Dict[int, float] = dict(error_rates or {})
+        self.token_expires_in: int = token_expires_in
+        self.compression: Optional[str] = compression
+
+        # Bookkeeping, handy for assertions
+        self.requests: Counter = Counter()
+        self.tokens_issued: int = 0
+
+        self.__random: random.Random = random.Random(seed)
+        self.__tokens: set = set()
+        self.__responses: Dict[str, Tuple[int, bytes, Dict[str, str]]] = {}
+        self.__not_found: List[str] = []
+        self.__queued_errors: Deque[int] = deque()
+        self.__payload_cache: Dict[Tuple[str, int, Optional[str]],
+                                   bytes] = {}
+        self.__runner: Optional[web.AppRunner] = None
+
+    async def __aenter__(self) -> 'MockBattleNetServer':
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type: Optional[Type[BaseException]],
+                        exc_val: Optional[BaseException],
+                        exc_tb: Optional[TracebackType]) -> None:
+        await self.close()
+
+    @property
+    def hostname(self) -> str:
+        """The hostname template to pass to the API class, in the same
+        format as the ones found in APIRegion
+
+        :return: e.g. http://127.0.0.1:8080{api_endpoint}
+        :rtype: str
+        """
+        return f'http://{self.host}:{self.port}{{api_endpoint}}'
+
+    def get_client_kwargs(self) -> Dict[str, str]:
+        """Returns the keyword arguments pointing an API client at this
+        server
+
+        :return: {'api_hostname': ..., 'oauth_hostname': ...}
+        :rtype: dict
+        """
+        return {'api_hostname': self.hostname,
+                'oauth_hostname': self.hostname}
+
+    async def start(self) -> None:
+        """Starts listening for requests
+        """
+        app = web.Application()
+        app.router.add_post('/oauth/token', self.__handle_token)
+        app.router.add_get('/data/{tail:.*}', self.__handle_resource)
+        app.router.add_get('/profile/{tail:.*}', self.__handle_resource)
+
+        self.__runner = web.AppRunner(app, access_log=None)
+        await self.__runner.setup()
+
+        site = web.TCPSite(self.__runner, self.host, self.port)
+        await site.start()
+
+        # If we were asked for any free port, find out which one we got
+        if self.port == 0:
+            server = getattr(site, '_server')
+            self.port = server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        """Stops the server
+        """
+        if self.__runner is not None:
+            await self.__runner.cleanup()
+            self.__runner = None
+
+    def set_response(self, api_endpoint: str, payload: Any,
+                     status: int = 200,
+                     headers: Optional[Dict[str, str]] = None) -> None:
+        """Registers a fixed response for an API endpoint
+
+        :param api_endpoint: The API endpoint, e.g. /data/wow/token/index
+        :type api_endpoint: str
+        :param payload: The JSON serializable response body
+        :type payload: Any
+        :param status: The HTTP status to answer with, defaults to 200
+        :type status: int, optional
+        :param headers: Additional response headers, defaults to None
+        :type headers: dict, optional
+        """
+        self.__responses[api_endpoint] = (
+            status, json.dumps(payload).encode(), dict(headers or {}))
+
+    def add_not_found(self, api_endpoint_prefix: str) -> None:
+        """Answers every request for endpoints starting with the given prefix
+        with a 404, e.g. /profile/wow/character/illidan/nobody
+
+        :param api_endpoint_prefix: The API endpoint prefix
+        :type api_endpoint_prefix: str
+        """
+        self.__not_found.append(api_endpoint_prefix)
+
+    def fail_next(self, status: int, times: int = 1) -> None:
+        """Answers the next Game Data / Profile requests with an error status
+
+        :param status: The HTTP status to answer with, e.g. 429 or 503
+        :type status: int
+        :param times: The number of requests to fail, defaults to 1
+        :type times: int, optional
+        """
+        self.__queued_errors.extend([status] * times)
+
+    def __pick_error(self) -> Optional[int]:
+        if self.__queued_errors:
+            return self.__queued_errors.popleft()
+
+        for status, rate in self.error_rates.items():
+            if self.__random.random() < rate:
+                return status
+
+        return None
+
+    async def __handle_token(self, request: web.Request) -> web.Response:
+        self.requests[request.path] += 1
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if request.query.get('grant_type') != 'client_credentials' or \
+                request.headers.get('Authorization') is None:
+            return web.json_response({'error': 'invalid_client'}, status=401)
+
+        self.tokens_issued += 1
+        token = f'mock-token-{self.tokens_issued}'
+        self.__tokens.add(token)
+
+        return web.json_response({'access_token': token,
+                                  'token_type': 'bearer',
+                                  'expires_in': self.token_expires_in,
+                                  'sub': 'mock'})
+
+    async def __handle_resource(self, request: web.Request) -> web.Response:
+        path = request.path
+        self.requests[path] += 1
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        authorization = request.headers.get('Authorization', '')
+        if authorization[len('Bearer '):] not in self.__tokens:
+            return web.json_response({'code': 401, 'type': 'BLZWEBAPI00000401',
+                                      'detail': 'Unauthorized'}, status=401)
+
+        error = self.__pick_error()
+        if error is not None:
+            return web.json_response({'code': error, 'detail': 'Injected'},
+                                     status=error)
+
+        if 'namespace' not in request.query or \
+                any(path.startswith(i) for i in self.__not_found):
+            return web.json_response({'code': 404, 'type': 'BLZWEBAPI00000404',
+                                      'detail': 'Not Found'}, status=404)
+
+        # Only compress when the client asked for it
+        encoding = self.compression if self.compression is not None and \
+            self.compression in request.headers.get('Accept-Encoding', '') \
+            else None
+
+        if path in self.__responses:
+            status, body, headers = self.__responses[path]
+
+            # Answer conditional requests like the real API does
+            if is_not_modified(request.headers.get('If-Modified-Since'),
+                               headers.get('Last-Modified')):
+                return web.Response(status=304, headers=headers)
+
+            if encoding is not None:
+                body = compress_body(body, encoding)
+        else:
+            status, headers = 200, {}
+            body = self.__synthetic_payload(path, encoding)
+
+        if encoding is not None:
+            headers = dict(headers, **{'Content-Encoding': encoding})
+
+        return web.Response(status=status, body=body, headers=headers,
+                            content_type='application/json')
+
+    def __synthetic_payload(self, path: str,
+                            encoding: Optional[str]) -> bytes:
+        # Synthetic payloads are cached by path, size & encoding, building
+        # a 50 MB body on every request would make the server the bottleneck
+        key = (path, self.payload_size, encoding)
+        if key not in self.__payload_cache:
+            body = build_payload(path, self.payload_size)
+            if encoding is not None:
+                body = compress_body(body, encoding)
+            self.__payload_cache[key] = body
+
+        return self.__payload_cache[key]
+
+
+def is_not_modified(if_modified_since: Optional[str],
+                    last_modified: Optional[str]) -> bool:
+    """Whether a conditional request should be answered with a 304
+
+    :param if_modified_since: The If-Modified-Since request header
+    :type if_modified_since: str, optional
+    :param last_modified: The Last-Modified header of the response
+    :type last_modified: str, optional
+    :rtype: bool
+    """
+    if if_modified_since is None or last_modified is None:
+        return False
+
+    try:
+        return parsedate_to_datetime(last_modified) <= \
+            parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    """Compresses a response body with the given Content-Encoding
+
+    :param body: The response body
+    :type body: bytes
+    :param encoding: gzip, deflate or br
+    :type encoding: str
+    :return: The compressed response body
+    :rtype: bytes
+    """
+    if encoding == 'gzip':
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return compressor.compress(body) + compressor.flush()
+    elif encoding == 'deflate':
+        return zlib.compress(body)
+    elif encoding == 'br' and brotli is not None:
+        return brotli.compress(body)
+
+    raise ValueError(f'Unsupported encoding {encoding}')
+
+
+def build_payload(path: str, size: int) -> bytes:
+    """Builds a synthetic JSON payload of roughly the given size, auction
+    endpoints get auction shaped entries
+
+    :param path: The API endpoint the payload is for
+    :type path: str
+    :param size: The approximate size of the payload in bytes
+    :type size: int
+    :return: The JSON encoded payload
+    :rtype: bytes
+    """
+    found = _ID_PATTERN.search(path)
+    resource_id = int(found.group(1)) if found else 1
+
+    if path.endswith('/auctions') or path.endswith('/commodities'):
+        key = 'auctions'
+        entry = ('{{"id":{0},"item":{{"id":{1}}},"buyout":{2},'
+                 '"quantity":{3},"time_left":"LONG"}}')
+    else:
+        key = 'entries'
+        entry = '{{"id":{0},"name":"Entry {0}","key":{{"id":{1}}},' \
+                '"value":{2},"count":{3}}}'
+
+    head = json.dumps({'_links': {'self': {'href': path}},
+                       'id': resource_id})[:-1] + f',"{key}":['
+    entries = []
+    total = len(head) + 2
+    i = 0
+    while total < size:
+        encoded = entry.format(i, 1000 + i % 5000, 10000 + i * 7, 1 + i % 20)
+        entries.append(encoded)
+        total += len(encoded) + 1
+        i += 1
+
+    return (head + ','.join(entries) + ']}').encode()
@@ -0,0 +1,193 @@
+import asyncio
+import sqlite3
+import time
+from typing import Optional, Dict, Tuple
+
+
+class TokenStore:
+    """Base class for stores sharing OAuth access tokens between API
+    instances, possibly in different processes.
+
+    Besides storing tokens, a store hands out short refresh leases so only
+    one of the instances sharing it fetches a new token at a time, while
+    the others wait for it to be stored.
+    """
+
+    async def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """Returns the token stored under a key
+
+        :param key: The token key, one per client id & region
+        :type key: str
+        :return: The token & the unix timestamp it expires at, None if
+            there's none
+        :rtype: Tuple[str, float], none
+        """
+        raise NotImplementedError
+
+    async def set(self, key: str, token: str, expires_at: float) -> None:
+        """Stores a token under a key, replacing any existing one
+
+        :param key: The token key, one per client id & region
+        :type key: str
+        :param token: The access token
+        :type token: str
+        :param expires_at: The unix timestamp the token expires at
+        :type expires_at: float
+        """
+        raise NotImplementedError
+
+    async def acquire_refresh(self, key: str, owner: str,
+                              lease: float) -> bool:
+        """Tries to become the one refreshing the token stored under a key
+
+        :param key: The token key, one per client id & region
+        :type key: str
+        :param owner: Identifies the caller
+        :type owner: str
+        :param lease: Seconds after which the lease lapses, should the owner
+            never release it
+        :type lease: float
+        :return: Whether the lease was acquired
+        :rtype: bool
+        """
+        raise NotImplementedError
+
+    async def release_refresh(self, key: str, owner: str) -> None:
+        """Gives up a refresh lease acquired with acquire_refresh
+
+        :param key: The token key, one per client id & region
+        :type key: str
+        :param owner: Identifies the caller
+        :type owner: str
+        """
+        raise NotImplementedError
+
+
+class MemoryTokenStore(TokenStore):
+    """Shares tokens between API instances in the same process
+    """
+
+    def __init__(self) -> None:
+        """Constructor method
+        """
+        self.__tokens: Dict[str, Tuple[str, float]] = {}
+        self.__leases: Dict[str, Tuple[str, float]] = {}
+
+    async def get(self, key: str) -> Optional[Tuple[str, float]]:
+        return self.__tokens.get(key)
+
+    async def set(self, key: str, token: str, expires_at: float) -> None:
+        self.__tokens[key] = (token, expires_at)
+
+    async def acquire_refresh(self, key: str, owner: str,
+                              lease: float) -> bool:
+        now = time.time()
+        holder = self.__leases.get(key)
+        if holder is not None and holder[0] != owner and holder[1] > now:
+            return False
+
+        self.__leases[key] = (owner, now + lease)
+        return True
+
+    async def release_refresh(self, key: str, owner: str) -> None:
+        holder = self.__leases.get(key)
+        if holder is not None and holder[0] == owner:
+            del self.__leases[key]
+
+
+class SQLiteTokenStore(TokenStore):
+    def __init__(self, path: str):
+        """Shares tokens between the processes of a node through an SQLite
+        database. Only tokens are stored, never client secrets.
+
+        :param path: The database file, created if it doesn't exist
+        :type path: str
+        """
+        self.path: str = path
+
+    def __connect(self) -> sqlite3.Connection:
+        # Token operations are rare, a connection per call keeps this
+        # usable from any thread
+        connection = sqlite3.connect(self.path, timeout=30,
+                                     isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS tokens ('
+            'key TEXT PRIMARY KEY, '
+            'token TEXT, '
+            'expires_at REAL NOT NULL DEFAULT 0, '
+            'lease_owner TEXT, '
+            'lease_until REAL NOT NULL DEFAULT 0)')
+
+        return connection
+
+    async def __run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(
+            None, function, *args)
+
+    def __get(self, key: str) -> Optional[Tuple[str, float]]:
+        connection = self.__connect()
+        try:
+            row = connection.execute(
+                'SELECT token, expires_at FROM tokens WHERE key = ?',
+                (key,)).fetchone()
+        finally:
+            connection.close()
+
+        if row is None or row[0] is None:
+            return None
+
+        return row[0], row[1]
+
+    def __set(self, key: str, token: str, expires_at: float) -> None:
+        connection = self.__connect()
+        try:
+            connection.execute(
+                'INSERT INTO tokens (key, token, expires_at) '
+                'VALUES (?, ?, ?) ON CONFLICT(key) DO UPDATE SET '
+                'token = excluded.token, expires_at = excluded.expires_at',
+                (key, token, expires_at))
+        finally:
+            connection.close()
+
+    def __acquire(self, key: str, owner: str, lease: float) -> bool:
+        connection = self.__connect()
+        try:
+            # BEGIN IMMEDIATE takes the write lock up front, so checking &
+            # taking the lease happens atomically across processes
+            connection.execute('BEGIN IMMEDIATE')
+            now = time.time()
+            connection.execute(
+                'INSERT OR IGNORE INTO tokens (key) VALUES (?)', (key,))
+            acquired = connection.execute(
+                'UPDATE tokens SET lease_owner = ?, lease_until = ? '
+                'WHERE key = ? AND (lease_owner IS NULL OR '
+                'lease_owner = ? OR lease_until <= ?)',
+                (owner, now + lease, key, owner, now)).rowcount == 1
+            connection.execute('COMMIT')
+        finally:
+            connection.close()
+
+        return acquired
+
+    def __release(self, key: str, owner: str) -> None:
+        connection = self.__connect()
+        try:
+            connection.execute(
+                'UPDATE tokens SET lease_owner = NULL, lease_until = 0 '
+                'WHERE key = ? AND lease_owner = ?', (key, owner))
+        finally:
+            connection.close()
+
+    async def get(self, key: str) -> Optional[Tuple[str, float]]:
+        return await self.__run(self.__get, key)
+
+    async def set(self, key: str, token: str, expires_at: float) -> None:
+        await self.__run(self.__set, key, token, expires_at)
+
+    async def acquire_refresh(self, key: str, owner: str,
+                              lease: float) -> bool:
+        return await self.__run(self.__acquire, key, owner, lease)
+
+    async def release_refresh(self, key: str, owner: str) -> None:
+        await self.__run(self.__release, key, owner)
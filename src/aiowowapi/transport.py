@@ -0,0 +1,408 @@
+import json
+import os
+import struct
+import zlib
+from http import HTTPStatus
+from typing import Optional, Dict, List, Tuple, Any, BinaryIO
+from urllib.parse import urlencode
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+try:
+    import brotli  # type: ignore
+except ImportError:
+    brotli = None
+
+
+# The content encodings we can decode, brotli is only offered when the
+# optional brotli package is installed
+ACCEPT_ENCODING = 'gzip, deflate, br' if brotli is not None \
+    else 'gzip, deflate'
+
+# Every cassette record starts with the length of its metadata & its body
+_RECORD_HEADER = struct.Struct('>IQ')
+_CASSETTE_MAGIC = b'AIOWOWAPI-CASSETTE-1\n'
+
+
+def decompress_body(body: bytes, content_encoding: Optional[str]) -> bytes:
+    """Decompresses a response body according to its Content-Encoding
+
+    :param body: The response body as received
+    :type body: bytes
+    :param content_encoding: The value of the Content-Encoding header
+    :type content_encoding: str, optional
+    :raises aiohttp.ClientPayloadError: Raised when the body can't be
+        decompressed
+    :return: The decompressed response body
+    :rtype: bytes
+    """
+    encoding = (content_encoding or '').strip().lower()
+
+    try:
+        if encoding in ('', 'identity'):
+            return body
+        elif encoding == 'gzip':
+            return zlib.decompress(body, 16 + zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            # Servers disagree on whether deflate means zlib wrapped or raw
+            try:
+                return zlib.decompress(body)
+            except zlib.error:
+                return zlib.decompress(body, -zlib.MAX_WBITS)
+        elif encoding == 'br' and brotli is not None:
+            return brotli.decompress(body)
+    except Exception as e:
+        raise aiohttp.ClientPayloadError(
+            f'Failed to decompress {encoding} response body') from e
+
+    raise aiohttp.ClientPayloadError(
+        f'Unsupported response Content-Encoding {encoding}')
+
+
+def request_key(method: str, url: str, params: Optional[dict] = None) -> str:
+    """Builds the key used to match a request with a recorded response,
+    headers (and so access tokens) are deliberately not part of it
+
+    :param method: The HTTP method of the request
+    :type method: str
+    :param url: The URL of the request
+    :type url: str
+    :param params: The query parameters of the request, defaults to None
+    :type params: dict, optional
+    :return: The request key
+    :rtype: str
+    """
+    query: List[Tuple[str, str]] = []
+    for name, value in (params or {}).items():
+        # Parts of the wrapper pass single item tuples as parameter values
+        if isinstance(value, (tuple, list)):
+            query.extend((name, str(i)) for i in value)
+        elif value is not None:
+            query.append((name, str(value)))
+
+    return f'{method.upper()} {url}?{urlencode(sorted(query))}'
+
+
+class TransportResponse:
+    """A fully read HTTP response as returned by a Transport
+
+    :param method: The HTTP method of the request
+    :type method: str
+    :param url: The URL of the request
+    :type url: str
+    :param status: The HTTP status of the response
+    :type status: int
+    :param headers: The response headers
+    :type headers: CIMultiDict
+    :param body: The response body
+    :type body: bytes
+    """
+
+    __slots__ = ('method', 'url', 'status', 'headers', 'body')
+
+    def __init__(self, method: str, url: str, status: int,
+                 headers: CIMultiDict, body: bytes):
+        """Constructor method
+        """
+        self.method: str = method
+        self.url: str = url
+        self.status: int = status
+        self.headers: CIMultiDict = headers
+        self.body: bytes = body
+
+    def raise_for_status(self) -> None:
+        """Raises an aiohttp.ClientResponseError for 4xx/5xx responses, the
+        same exception aiohttp itself would raise
+
+        :raises aiohttp.ClientResponseError: Raised for 4xx/5xx responses
+        """
+        if self.status >= 400:
+            url = URL(self.url)
+            try:
+                reason = HTTPStatus(self.status).phrase
+            except ValueError:
+                reason = ''
+
+            raise aiohttp.ClientResponseError(
+                aiohttp.RequestInfo(url=url, method=self.method,
+                                    headers=CIMultiDictProxy(CIMultiDict()),
+                                    real_url=url),
+                (),
+                status=self.status,
+                message=reason,
+                headers=self.headers)
+
+
+class Transport:
+    """Base class for the layer which actually sends requests for
+    API.get_resource, subclass it to change how responses are obtained
+    """
+
+    @property
+    def closed(self) -> bool:
+        """Whether the transport needs to be opened before use
+
+        :rtype: bool
+        """
+        return False
+
+    async def open(self) -> None:
+        """Prepares the transport for use
+        """
+
+    async def close(self) -> None:
+        """Releases any resources held by the transport
+        """
+
+    async def request(self, method: str, url: str,
+                      params: Optional[dict] = None,
+                      headers: Optional[dict] = None,
+                      auth: Optional[aiohttp.BasicAuth] = None
+                      ) -> TransportResponse:
+        """Sends a request and returns the fully read response
+
+        :param method: The HTTP method to use
+        :type method: str
+        :param url: The URL to send the request to
+        :type url: str
+        :param params: Query parameters, defaults to None
+        :type params: dict, optional
+        :param headers: Request headers, defaults to None
+        :type headers: dict, optional
+        :param auth: Basic auth credentials, defaults to None
+        :type auth: aiohttp.BasicAuth, optional
+        :raises aiohttp.ClientError: Raised when the request fails
+        :raises RuntimeError: Raised when the transport hasn't been opened
+        :return: The response
+        :rtype: TransportResponse
+        """
+        raise NotImplementedError
+
+
+class AiohttpTransport(Transport):
+    def __init__(self, **session_kwargs: Any):
+        """The default transport, sends requests using an
+        aiohttp.ClientSession.
+
+        Compressed responses are returned as received, along with their
+        Content-Encoding header, so the API class can decompress large
+        bodies off the event loop. Pass auto_decompress=True to have aiohttp
+        decompress them instead.
+
+        :param session_kwargs: Keyword arguments for aiohttp.ClientSession
+        """
+        self.__session_kwargs: Dict[str, Any] = session_kwargs
+        self.__session_kwargs.setdefault('auto_decompress', False)
+        self.__session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def closed(self) -> bool:
+        return self.__session is None or self.__session.closed
+
+    async def open(self) -> None:
+        if self.closed:
+            self.__session = aiohttp.ClientSession(**self.__session_kwargs)
+
+    async def close(self) -> None:
+        session = self.__session
+        if session is not None and not session.closed:
+            await session.close()
+
+    async def request(self, method: str, url: str,
+                      params: Optional[dict] = None,
+                      headers: Optional[dict] = None,
+                      auth: Optional[aiohttp.BasicAuth] = None
+                      ) -> TransportResponse:
+        session = self.__session
+        if session is None:
+            raise RuntimeError('Transport is closed')
+
+        # Explicitly negotiate the encodings we're able to decode
+        headers = dict(headers or {})
+        headers.setdefault('Accept-Encoding', ACCEPT_ENCODING)
+
+        async with session.request(method, url, params=params,
+                                   headers=headers,
+                                   auth=auth) as response:
+            body = await response.read()
+            response_headers = CIMultiDict(response.headers)
+
+            # If aiohttp already decompressed the body, make sure it isn't
+            # decompressed a second time
+            if self.__session_kwargs['auto_decompress']:
+                response_headers.popall('Content-Encoding', None)
+
+            return TransportResponse(method, url, response.status,
+                                     response_headers, body)
+
+
+class RecordingTransport(Transport):
+    def __init__(self, path: str,
+                 transport: Optional[Transport] = None,
+                 *,
+                 append: bool = False):
+        """Wraps another transport & records every response it returns to a
+        cassette file which ReplayTransport can serve back later.
+
+        Bodies are zlib compressed & appended as they arrive, so recording a
+        large crawl doesn't hold its responses in memory.
+
+        :param path: The cassette file to write to
+        :type path: str
+        :param transport: The transport to record, defaults to
+            AiohttpTransport()
+        :type transport: Transport, optional
+        :param append: Whether to add to an existing cassette instead of
+            replacing it (Default: False)
+        :type append: bool, optional
+        """
+        self.__path: str = path
+        self.__transport: Transport = transport if \
+            (transport is not None) else AiohttpTransport()
+        self.__append: bool = append
+        self.__file: Optional[BinaryIO] = None
+
+    @property
+    def closed(self) -> bool:
+        return self.__file is None or self.__transport.closed
+
+    async def open(self) -> None:
+        await self.__transport.open()
+
+        if self.__file is None:
+            if not self.__append or not os.path.exists(self.__path):
+                with open(self.__path, 'wb') as f:
+                    f.write(_CASSETTE_MAGIC)
+
+            # The client may open & close us several times, after the first
+            # time we always add to what we've already recorded
+            self.__append = True
+            self.__file = open(self.__path, 'ab')
+
+    async def close(self) -> None:
+        await self.__transport.close()
+
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+    async def request(self, method: str, url: str,
+                      params: Optional[dict] = None,
+                      headers: Optional[dict] = None,
+                      auth: Optional[aiohttp.BasicAuth] = None
+                      ) -> TransportResponse:
+        cassette = self.__file
+        if cassette is None:
+            raise RuntimeError('Transport is closed')
+
+        response = await self.__transport.request(method, url, params,
+                                                  headers, auth)
+
+        meta = json.dumps({
+            'key': request_key(method, url, params),
+            'status': response.status,
+            'headers': list(response.headers.items()),
+        }).encode()
+        body = zlib.compress(response.body)
+
+        cassette.write(_RECORD_HEADER.pack(len(meta), len(body)))
+        cassette.write(meta)
+        cassette.write(body)
+        cassette.flush()
+
+        return response
+
+
+class CassetteMissException(aiohttp.ClientConnectionError):
+    """Exception thrown when a ReplayTransport has no recorded response for
+    a request, it's treated like any other connection error by the client
+
+    :param message: Description of the occurring error
+    :type message: str, optional
+    """
+
+    def __init__(self, message: str = "No recorded response for request"):
+        super().__init__(message)
+
+
+class ReplayTransport(Transport):
+    def __init__(self, path: str):
+        """Serves the responses recorded by a RecordingTransport without
+        touching the network.
+
+        Only an index of the cassette is kept in memory, bodies are read from
+        disk when they're requested. If the same request was recorded several
+        times the responses are served in the order they were recorded, with
+        the last one being repeated once they run out.
+
+        :param path: The cassette file to replay
+        :type path: str
+        """
+        self.__path: str = path
+        self.__file: Optional[BinaryIO] = None
+        self.__index: Dict[str, List[Tuple[int, List[list], int, int]]] = {}
+        self.__served: Dict[str, int] = {}
+
+    @property
+    def closed(self) -> bool:
+        return self.__file is None
+
+    async def open(self) -> None:
+        if self.__file is not None:
+            return
+
+        self.__file = open(self.__path, 'rb')
+        if self.__file.read(len(_CASSETTE_MAGIC)) != _CASSETTE_MAGIC:
+            self.__file.close()
+            self.__file = None
+            raise ValueError(f'{self.__path} is not a cassette file')
+
+        # Build the index once, skipping over the bodies
+        if not self.__index:
+            while True:
+                header = self.__file.read(_RECORD_HEADER.size)
+                if len(header) < _RECORD_HEADER.size:
+                    break
+
+                meta_length, body_length = _RECORD_HEADER.unpack(header)
+                meta = json.loads(self.__file.read(meta_length))
+                offset = self.__file.tell()
+                self.__file.seek(body_length, os.SEEK_CUR)
+
+                self.__index.setdefault(meta['key'], []).append(
+                    (meta['status'], meta['headers'], offset, body_length))
+
+    async def close(self) -> None:
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+    async def request(self, method: str, url: str,
+                      params: Optional[dict] = None,
+                      headers: Optional[dict] = None,
+                      auth: Optional[aiohttp.BasicAuth] = None
+                      ) -> TransportResponse:
+        cassette = self.__file
+        if cassette is None:
+            raise RuntimeError('Transport is closed')
+
+        key = request_key(method, url, params)
+        if key not in self.__index:
+            raise CassetteMissException(
+                f'No recorded response for {key}')
+
+        recorded = self.__index[key]
+        served = self.__served.get(key, 0)
+        self.__served[key] = served + 1
+        status, response_headers, offset, length = \
+            recorded[min(served, len(recorded) - 1)]
+
+        cassette.seek(offset)
+        body = zlib.decompress(cassette.read(length))
+
+        return TransportResponse(
+            method, url, status,
+            CIMultiDict((name, value) for name, value in response_headers),
+            body)
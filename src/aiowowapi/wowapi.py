@@ -4,6 +4,9 @@ from urllib.parse import unquote
 
 from . import API
 from .classic.classic import ClassicApi
+from .retail.connected_realms import ConnectedRealmIndex, \
+    DEFAULT_CONNECTED_REALM_INDEX_TTL
+from .retail.realms import RealmResolver, DEFAULT_REALM_INDEX_TTL
 from .retail.retail import RetailApi
 
 
@@ -12,14 +15,27 @@ class WowApi(API):
         """This class contains some useful functions/QoL features for working
         with the World of Warcraft API.
 
-        For additional arguments see the API class documentation.
+        For additional arguments see the API class documentation, besides
+        those realm_index_ttl sets how long (in seconds) the realms index
+        used by get_realm_slug is kept before being fetched again
+        (Default: 1 day) and connected_realm_index_ttl how long the
+        connected realms index used by get_connected_realm_id is used before
+        being checked for changes (Default: 1 hour).
         """
+        realm_index_ttl = kwargs.pop('realm_index_ttl',
+                                     DEFAULT_REALM_INDEX_TTL)
+        connected_realm_index_ttl = kwargs.pop(
+            'connected_realm_index_ttl', DEFAULT_CONNECTED_REALM_INDEX_TTL)
+
         super().__init__(*args, **kwargs)
 
         self.Retail = RetailApi(super())
         self.Classic = ClassicApi(super())
 
-        self.__realms = None
+        self.__realm_resolver = RealmResolver(self.Retail.GameData,
+                                              realm_index_ttl)
+        self.__connected_realm_index = ConnectedRealmIndex(
+            self.Retail.GameData, connected_realm_index_ttl)
 
     @staticmethod
     async def parse_armory_link(url: str) -> Optional[Dict[str, str]]:
@@ -53,7 +69,9 @@ class WowApi(API):
         return None
 
     async def get_realm_slug(self, realm_name: str) -> Optional[str]:
-        """Attempts to match user input with a WoW realm and return its slug
+        """Attempts to match user input with a WoW realm and return its slug.
+        Exact matches (id, name, slug) are preferred, then realms starting
+        with the input, then realms containing it, then similar names.
 
         :param realm_name: A string to query the realms index with (
             full name, id, short name, etc)
@@ -61,32 +79,42 @@ class WowApi(API):
         :return: A matching realm's slug
         :rtype: str
         """
+        return await self.__realm_resolver.resolve(realm_name)
 
-        if self.__realms:
-            # If the realms index has already been queried, use the cached
-            # results to find a matching realm
-            for realm in self.__realms:
-                realm_name = str(realm_name).lower()
-                if (realm_name in str(realm['name']).lower() or
-                        realm_name in str(realm['fixed']).lower() or
-                        realm_name in str(realm['slug']).lower() or
-                        realm_name == str(realm['id']).lower()):
-                    return realm['slug']
-        else:
-            # If the realms index has not been cached, get it and try again
-            data = await self.Retail.GameData.get_realms_index()
-
-            if data:
-                self.__realms = []
-                for realm in data['realms']:
-                    self.__realms.append(
-                        {'name': realm['name'],
-                         'fixed': str(realm['name']).replace(" ", ""),
-                         'slug': realm['slug'],
-                         'id': realm['id']})
-                return await self.get_realm_slug(realm_name)
+    def get_realm_resolver(self) -> RealmResolver:
+        """Returns the per region realm index used by get_realm_slug
 
-        return None
+        :return: The realm resolver
+        :rtype: RealmResolver
+        """
+        return self.__realm_resolver
+
+    async def get_connected_realm_id(self, realm_name: str) -> Optional[int]:
+        """Attempts to match user input with a WoW realm and return the id
+        of the connected realm it belongs to, e.g. for
+        GameData.get_auctions
+
+        :param realm_name: A string to query the realms index with (
+            full name, id, short name, etc)
+        :type realm_name: str
+        :return: The id of the realm's connected realm
+        :rtype: int
+        """
+        realm_slug = await self.get_realm_slug(realm_name)
+        if realm_slug is None:
+            return None
+
+        return await self.__connected_realm_index.get_connected_realm_id(
+            realm_slug)
+
+    def get_connected_realm_index(self) -> ConnectedRealmIndex:
+        """Returns the per region realm to connected realm index used by
+        get_connected_realm_id
+
+        :return: The connected realm index
+        :rtype: ConnectedRealmIndex
+        """
+        return self.__connected_realm_index
 
     @staticmethod
     async def format_wow_gold(money: int) -> str:
@@ -1,6 +1,15 @@
-from aiowowapi import API
+from aiowowapi import API, WowApi, AuctionColumns, MetricsCollector, \
+    to_auction_columns
+from aiowowapi.retail import CharacterCache
+from aiowowapi.testing import MockBattleNetServer
 import pytest
 import asyncio
+import aiohttp
+import base64
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from aiowowapi import transport
 
 
 @pytest.fixture(scope="session")
@@ -22,3 +31,321 @@ async def test_get_resource():
         await client.get_resource("https://raider.io{api_endpoint}", "/api/v1/mythic-plus/affixes", params),
         dict
     )
+
+
+@pytest.mark.asyncio
+async def test_get_resource_offline():
+    async with MockBattleNetServer(payload_size=2048) as server:
+        async with WowApi("<client_id>", "<client_secret>", "us",
+                          **server.get_client_kwargs()) as client:
+            data = await client.Retail.GameData.get_item(19019)
+
+    assert data['id'] == 19019
+    assert len(data['entries']) > 0
+    assert server.tokens_issued == 1
+
+
+@pytest.mark.asyncio
+async def test_get_resource_retries():
+    async with MockBattleNetServer() as server:
+        client = WowApi("<client_id>", "<client_secret>", "us",
+                        request_retry_delay=0, request_debugging=False,
+                        **server.get_client_kwargs())
+
+        server.fail_next(503)
+        assert await client.Retail.GameData.get_wow_token_index() is not None
+        assert server.requests['/data/wow/token/index'] == 2
+
+        server.add_not_found('/profile/wow/character/illidan/nobody')
+        assert await client.Retail.Profile.get_character_profile_summary(
+            'illidan', 'nobody') is None
+
+
+@pytest.mark.asyncio
+async def test_decode_offload():
+    with ThreadPoolExecutor(1) as executor:
+        async with MockBattleNetServer(payload_size=64 * 1024) as server:
+            async with WowApi("<client_id>", "<client_secret>", "us",
+                              decode_offload_threshold=1024,
+                              decode_executor=executor,
+                              **server.get_client_kwargs()) as client:
+                columns = await client.Retail.GameData.get_auctions(
+                    1146, transform=to_auction_columns)
+                data = await client.Retail.GameData.get_auctions(1146)
+
+    assert isinstance(columns, AuctionColumns)
+    assert len(columns) == len(data['auctions'])
+    assert columns.get_row(0)['item_id'] == data['auctions'][0]['item']['id']
+    assert columns.get_row(0)['time_left'] == data['auctions'][0]['time_left']
+
+
+@pytest.mark.asyncio
+async def test_compressed_responses():
+    collector = MetricsCollector()
+
+    async with MockBattleNetServer(payload_size=64 * 1024,
+                                   compression='gzip') as server:
+        async with WowApi("<client_id>", "<client_secret>", "us",
+                          hooks=[collector],
+                          decompress_offload_threshold=1024,
+                          **server.get_client_kwargs()) as client:
+            data = await client.Retail.GameData.get_auctions(1146)
+
+    metrics = collector.endpoints['/data/wow/connected-realm/{id}/auctions']
+    assert len(data['auctions']) > 0
+    assert metrics.bytes_decompressed >= 64 * 1024
+    assert metrics.bytes_received < metrics.bytes_decompressed
+
+
+@pytest.mark.asyncio
+async def test_decompress_offload_threshold(monkeypatch):
+    threads = {}
+
+    def decompress_body(body, content_encoding):
+        if content_encoding:
+            threads[threshold].add(threading.current_thread())
+        return transport.decompress_body(body, content_encoding)
+
+    monkeypatch.setattr('aiowowapi.api.decompress_body', decompress_body)
+
+    async with MockBattleNetServer(compression='gzip') as server:
+        # Random data barely compresses, so the body is still over 1 MiB
+        server.set_response('/data/wow/token/index', {
+            'noise': base64.b64encode(os.urandom(1536 * 1024)).decode()})
+
+        for threshold in (None, 'default'):
+            threads[threshold] = set()
+            kwargs = {} if threshold == 'default' else \
+                {'decompress_offload_threshold': threshold}
+            async with WowApi("<client_id>", "<client_secret>", "us",
+                              **kwargs,
+                              **server.get_client_kwargs()) as client:
+                await client.Retail.GameData.get_wow_token_index()
+
+    # None keeps decompression inline, however large the body
+    assert threads[None] == {threading.main_thread()}
+    assert threading.main_thread() not in threads['default']
+
+
+@pytest.mark.asyncio
+async def test_not_found_cache():
+    async with MockBattleNetServer() as server:
+        server.add_not_found('/profile/wow/character/illidan/nobody')
+        server.add_not_found('/data/wow/guild/illidan/disbanded')
+
+        async with WowApi("<client_id>", "<client_secret>", "us",
+                          request_retry_delay=0,
+                          **server.get_client_kwargs()) as client:
+            profile = client.Retail.Profile
+
+            # Confirmed 404s aren't retried & are remembered
+            assert await profile.get_character_profile_summary(
+                'illidan', 'nobody') is None
+            assert profile.is_not_found('Illidan', 'Nobody')
+            assert await profile.get_character_equipment_summary(
+                'illidan', 'nobody') is None
+            assert await profile.get_guild('illidan', 'disbanded') is None
+            assert await profile.get_guild('illidan', 'disbanded') is None
+            assert profile.is_not_found('illidan', 'disbanded', 'guild')
+
+            # Transient failures aren't
+            server.fail_next(503, 3)
+            with pytest.raises(aiohttp.ClientResponseError):
+                await profile.get_character_profile_summary('illidan',
+                                                            'thrall')
+            assert not profile.is_not_found('illidan', 'thrall')
+
+    assert server.requests['/profile/wow/character/illidan/nobody'] == 1
+    assert server.requests[
+        '/profile/wow/character/illidan/nobody/equipment'] == 0
+    assert server.requests['/data/wow/guild/illidan/disbanded'] == 1
+
+
+@pytest.mark.asyncio
+async def test_not_found_debugging():
+    async with MockBattleNetServer() as server:
+        server.add_not_found('/profile/wow/character/illidan/nobody')
+        server.add_not_found('/data/wow/item/404')
+
+        async with WowApi("<client_id>", "<client_secret>", "us",
+                          request_retry_delay=0, request_debugging=True,
+                          **server.get_client_kwargs()) as client:
+            # Only lookups asking for 404s as a response get None back
+            assert await client.Retail.Profile.get_character_profile_summary(
+                'illidan', 'nobody') is None
+
+            with pytest.raises(aiohttp.ClientResponseError) as e:
+                await client.Retail.GameData.get_item(404)
+            assert e.value.status == 404
+
+    assert server.requests['/profile/wow/character/illidan/nobody'] == 1
+    assert server.requests['/data/wow/item/404'] == 3
+
+
+@pytest.mark.asyncio
+async def test_character_bundle():
+    async with MockBattleNetServer() as server:
+        server.add_not_found(
+            '/profile/wow/character/illidan/thrall/mythic-keystone-profile')
+        server.add_not_found('/profile/wow/character/illidan/nobody')
+
+        async with WowApi("<client_id>", "<client_secret>", "us",
+                          **server.get_client_kwargs()) as client:
+            profile = client.Retail.Profile
+
+            bundle = await profile.get_character_bundle(
+                'illidan', 'thrall',
+                parts=('profile', 'equipment', 'mythic_keystone_profile'))
+            assert bundle['profile'] is not None
+            assert bundle['equipment'] is not None
+            assert bundle['mythic_keystone_profile'] is None
+            assert list(bundle.errors) == ['mythic_keystone_profile']
+            assert not bundle.not_found and not bundle.complete
+
+            # Missing characters only cost the status request
+            missing = await profile.get_character_bundle('illidan', 'nobody')
+            assert missing.not_found
+            assert all(part is None for part in missing.parts.values())
+
+            with pytest.raises(ValueError):
+                await profile.get_character_bundle('illidan', 'thrall',
+                                                   parts=('gear',))
+
+    assert server.requests['/profile/wow/character/illidan/nobody/status'] \
+        == 1
+    assert server.requests['/profile/wow/character/illidan/nobody'] == 0
+
+
+@pytest.mark.asyncio
+async def test_guild_roster_crawl():
+    def member(name, level, realm='illidan'):
+        return {'character': {'name': name, 'level': level,
+                              'realm': {'slug': realm}}, 'rank': 1}
+
+    async with MockBattleNetServer() as server:
+        server.set_response('/data/wow/guild/illidan/method/roster', {
+            'members': [member('Thrall', 70), member('Jaina', 70),
+                        member('Alt', 10), member('Thrall', 70),
+                        member('Sylvanas', 70, 'stormrage')]})
+
+        async with WowApi("<client_id>", "<client_secret>", "us",
+                          **server.get_client_kwargs()) as client:
+            crawled = {}
+            seen = {('illidan', 'jaina')}
+            async for roster_member, bundle in \
+                    client.Retail.Profile.iter_guild_roster_bundles(
+                        'illidan', 'method', parts=('profile', 'equipment'),
+                        min_level=60, max_concurrency=2, seen=seen):
+                assert bundle.complete
+                crawled[bundle.character_name] = bundle.realm_slug
+
+    # Low level, duplicate & already seen members are skipped
+    assert crawled == {'thrall': 'illidan', 'sylvanas': 'stormrage'}
+    assert ('stormrage', 'sylvanas') in seen
+    assert server.requests['/profile/wow/character/illidan/thrall'] == 1
+
+
+@pytest.mark.asyncio
+async def test_guild_roster_crawl_failures(monkeypatch):
+    def member(name):
+        return {'character': {'name': name, 'level': 70,
+                              'realm': {'slug': 'illidan'}}, 'rank': 1}
+
+    async with MockBattleNetServer() as server:
+        server.set_response('/data/wow/guild/illidan/method/roster', {
+            'members': [member('Thrall'), member('Nobody'),
+                        member('Broken')]})
+        server.add_not_found('/profile/wow/character/illidan/nobody')
+
+        async with WowApi("<client_id>", "<client_secret>", "us",
+                          **server.get_client_kwargs()) as client:
+            profile = client.Retail.Profile
+            get_character_bundle = profile.get_character_bundle
+
+            async def failing_bundle(realm_slug, character_name, *args,
+                                     **kwargs):
+                if character_name == 'broken':
+                    raise aiohttp.ClientError('Connection reset')
+                return await get_character_bundle(
+                    realm_slug, character_name, *args, **kwargs)
+
+            monkeypatch.setattr(profile, 'get_character_bundle',
+                                failing_bundle)
+
+            crawled = {}
+            seen = set()
+            async for _, bundle in profile.iter_guild_roster_bundles(
+                    'illidan', 'method', parts=('profile',), seen=seen):
+                crawled[bundle.character_name] = bundle
+
+    # A failing member is yielded with its error rather than ending the
+    # crawl, only complete members are marked as seen
+    assert crawled['thrall'].complete
+    assert crawled['nobody'].not_found
+    assert crawled['broken']['profile'] is None
+    assert isinstance(crawled['broken'].errors['profile'],
+                      aiohttp.ClientError)
+    assert seen == {('illidan', 'thrall')}
+
+
+@pytest.mark.asyncio
+async def test_character_cache():
+    base = '/profile/wow/character/illidan/thrall'
+    async with MockBattleNetServer() as server:
+        server.set_response(base + '/status', {'id': 7, 'is_valid': True})
+
+        async with WowApi("<client_id>", "<client_secret>", "us",
+                          **server.get_client_kwargs()) as client:
+            cache = CharacterCache(client.Retail.Profile, parts=('profile',),
+                                   retention=0.1)
+
+            first = await cache.get('illidan', 'thrall')
+            assert first['profile'] is not None
+            assert cache.store['illidan/thrall']['id'] == 7
+            assert await cache.get('illidan', 'thrall') == first
+            assert server.requests[base] == 1
+
+            # Past retention only the status is requested
+            await asyncio.sleep(0.15)
+            assert await cache.revalidate_expired() == 1
+            assert server.requests[base] == 1
+            assert server.requests[base + '/status'] == 2
+
+            # A new id means a new character, which is refetched
+            server.set_response(base + '/status', {'id': 8, 'is_valid': True})
+            await asyncio.sleep(0.15)
+            await cache.get('illidan', 'thrall')
+            assert cache.store['illidan/thrall']['id'] == 8
+            assert server.requests[base] == 2
+
+            # Invalid characters are evicted
+            server.set_response(base + '/status', {'id': 8, 'is_valid': False})
+            await asyncio.sleep(0.15)
+            assert await cache.get('illidan', 'thrall') is None
+            assert 'illidan/thrall' not in cache.store
+
+
+@pytest.mark.asyncio
+async def test_character_cache_failed_revalidation():
+    base = '/profile/wow/character/illidan/'
+    async with MockBattleNetServer() as server:
+        for name, character_id in (('thrall', 7), ('jaina', 8)):
+            server.set_response(base + name + '/status',
+                                {'id': character_id, 'is_valid': True})
+
+        async with WowApi("<client_id>", "<client_secret>", "us",
+                          request_retry_delay=0,
+                          **server.get_client_kwargs()) as client:
+            cache = CharacterCache(client.Retail.Profile, parts=('profile',),
+                                   retention=0.1)
+            first = await cache.get('illidan', 'thrall')
+            await cache.get('illidan', 'jaina')
+            await asyncio.sleep(0.15)
+
+            # A failed status check keeps serving what we have, and doesn't
+            # stop the other characters from being revalidated
+            server.fail_next(503, 3)
+            assert await cache.revalidate_expired() == 2
+            assert await cache.get('illidan', 'thrall') == first
+            assert server.requests[base + 'jaina/status'] == 2
+            assert 'illidan/thrall' in cache.store
@@ -0,0 +1,161 @@
+from aiowowapi import WowApi
+from aiowowapi.retail import AuctionPoller, ItemEnricher, \
+    parse_connected_realm_ids
+from aiowowapi.testing import MockBattleNetServer
+from email.utils import formatdate
+import pytest
+import asyncio
+import time
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    policy = asyncio.get_event_loop_policy()
+    loop = policy.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def test_parse_connected_realm_ids():
+    index = {'connected_realms': [
+        {'href': 'https://us.api.blizzard.com/data/wow/connected-realm/11'
+                 '?namespace=dynamic-us'},
+        {'href': 'https://us.api.blizzard.com/data/wow/connected-realm/57'
+                 '?namespace=dynamic-us'},
+    ]}
+
+    assert parse_connected_realm_ids(index) == [11, 57]
+
+
+@pytest.mark.asyncio
+async def test_auction_poller_conditional_fetch():
+    modified = int(time.time()) - 600
+    async with MockBattleNetServer() as server:
+        server.set_response('/data/wow/connected-realm/11/auctions',
+                            {'auctions': [{'id': 1, 'item': {'id': 2}}]},
+                            headers={'Last-Modified': formatdate(
+                                modified, usegmt=True)})
+
+        async with WowApi("<client_id>", "<client_secret>", "us",
+                          **server.get_client_kwargs()) as client:
+            poller = AuctionPoller(client.Retail.GameData, [11],
+                                   update_delay=30, retry_delay=60)
+
+            data = await poller.fetch(11)
+            assert data['auctions'][0]['id'] == 1
+            # Next fetch is scheduled just after the expected refresh
+            assert poller.get_schedule()[11] == modified + 3600 + 30
+
+            # Unchanged since, so we get a 304 & back off
+            before = time.time()
+            assert await poller.fetch(11) is None
+            assert poller.get_schedule()[11] >= before + 60
+
+            # Once refreshed, the observed interval is learned
+            server.set_response('/data/wow/connected-realm/11/auctions',
+                                {'auctions': []},
+                                headers={'Last-Modified': formatdate(
+                                    modified + 1200, usegmt=True)})
+            assert await poller.fetch(11) == {'auctions': []}
+            assert poller.get_update_interval(11) == 1200
+
+    assert server.requests['/data/wow/connected-realm/11/auctions'] == 3
+
+
+@pytest.mark.asyncio
+async def test_auction_poller_poll():
+    async with MockBattleNetServer() as server:
+        server.set_response('/data/wow/connected-realm/index', {
+            'connected_realms': [
+                {'href': f'http://localhost/data/wow/connected-realm/{i}'}
+                for i in (1, 2, 3)]})
+
+        async with WowApi("<client_id>", "<client_secret>", "us",
+                          **server.get_client_kwargs()) as client:
+            poller = AuctionPoller(client.Retail.GameData,
+                                   max_requests_per_second=100)
+
+            seen = set()
+            async for connected_realm_id, data in poller.poll():
+                assert 'auctions' in data
+                seen.add(connected_realm_id)
+                if len(seen) == 3:
+                    poller.stop()
+
+    assert seen == {1, 2, 3}
+
+
+@pytest.mark.asyncio
+async def test_auction_poller_failing_realm():
+    async with MockBattleNetServer() as server:
+        server.add_not_found('/data/wow/connected-realm/4/')
+
+        async with WowApi("<client_id>", "<client_secret>", "us",
+                          request_retry_delay=0,
+                          **server.get_client_kwargs()) as client:
+            poller = AuctionPoller(client.Retail.GameData, [1, 4],
+                                   max_requests_per_second=20,
+                                   retry_delay=60)
+
+            async def stop_later():
+                await asyncio.sleep(0.5)
+                poller.stop()
+
+            stopper = asyncio.ensure_future(stop_later())
+            seen = [connected_realm_id
+                    async for connected_realm_id, _ in poller.poll()]
+            await stopper
+
+            # The failed realm backs off instead of being polled again
+            assert poller.get_schedule()[4] >= time.time() + 50
+
+    assert seen == [1]
+    assert server.requests['/data/wow/connected-realm/4/auctions'] == 3
+
+
+@pytest.mark.asyncio
+async def test_iter_all_auctions():
+    async with MockBattleNetServer(payload_size=4096) as server:
+        server.add_not_found('/data/wow/connected-realm/4/')
+
+        async with WowApi("<client_id>", "<client_secret>", "us",
+                          request_retry_delay=0,
+                          **server.get_client_kwargs()) as client:
+            seen = []
+            async for connected_realm_id, data in \
+                    client.Retail.GameData.iter_all_auctions(
+                        range(1, 9), max_concurrency=3):
+                assert len(data['auctions']) > 0
+                seen.append(connected_realm_id)
+
+    # Realms that failed are skipped
+    assert sorted(seen) == [1, 2, 3, 5, 6, 7, 8]
+
+
+@pytest.mark.asyncio
+async def test_item_enricher():
+    async with MockBattleNetServer() as server:
+        server.set_response('/data/wow/item/1000', {
+            'id': 1000, 'name': 'Thunderfury',
+            'quality': {'type': 'LEGENDARY', 'name': 'Legendary'},
+            'item_class': {'id': 2, 'name': 'Weapon'},
+            'item_subclass': {'id': 7, 'name': 'Sword'}, 'level': 80})
+
+        async with WowApi("<client_id>", "<client_secret>", "us",
+                          **server.get_client_kwargs()) as client:
+            store = {}
+            enricher = ItemEnricher(client.Retail.GameData, store)
+            snapshot = {'auctions': [
+                {'id': i, 'item': {'id': 1000 + i % 3}} for i in range(10)]}
+
+            items = await enricher.enrich(snapshot)
+            assert set(items) == {1000, 1001, 1002}
+            assert snapshot['auctions'][0]['item']['name'] == 'Thunderfury'
+            assert snapshot['auctions'][0]['item']['quality'] == 'LEGENDARY'
+            assert store['1000']['item_class'] == 2
+
+            # A second pass is served entirely from the store
+            await enricher.enrich(snapshot)
+
+    assert server.requests['/data/wow/item/1000'] == 1
+    assert server.requests['/data/wow/item/1001'] == 1
@@ -0,0 +1,119 @@
+from aiowowapi import WowApi, CacheEntry, MemoryCache, SQLiteCache, \
+    MetricsCollector, cache_key, get_cache_ttl
+from aiowowapi.testing import MockBattleNetServer
+import pytest
+import asyncio
+import time
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    policy = asyncio.get_event_loop_policy()
+    loop = policy.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def test_cache_key():
+    assert cache_key('/data/wow/item/19019',
+                     {'namespace': ('static-us',), 'locale': ('en_US',)}) \
+        == 'static-us:en_US:/data/wow/item/19019'
+    assert cache_key('/data/wow/search/item',
+                     {'namespace': 'static-us', 'locale': 'en_US',
+                      'name.en_US': 'Thunderfury', '_page': 2}) \
+        == 'static-us:en_US:/data/wow/search/item' \
+           '?_page=2&name.en_US=Thunderfury'
+
+
+def test_get_cache_ttl():
+    ttl = {'static-': 100, 'static-classic-': 0, 'dynamic-': 10}
+    assert get_cache_ttl({'namespace': ('static-us',)}, ttl) == 100
+    assert get_cache_ttl({'namespace': 'static-classic-us'}, ttl) == 0
+    assert get_cache_ttl({'namespace': 'profile-us'}, ttl) == 0
+    assert get_cache_ttl(None, ttl) == 0
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_eviction():
+    cache = MemoryCache(max_entries=2)
+    for key in ('a', 'b', 'c'):
+        await cache.set(key, CacheEntry(key.encode(), {}, time.time() + 60))
+
+    assert len(cache) == 2
+    assert await cache.get('a') is None
+    assert (await cache.get('c')).body == b'c'
+
+
+@pytest.mark.asyncio
+async def test_sqlite_cache(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = SQLiteCache(path, batch_size=2, flush_interval=60)
+
+    await cache.set('a', CacheEntry(b'{"a": 1}', {}, time.time() + 60))
+    # Buffered writes are visible before they're committed
+    assert (await cache.get('a')).body == b'{"a": 1}'
+
+    await cache.set('b', CacheEntry(b'gzip', {'Content-Encoding': 'gzip'},
+                                    time.time() - 1))
+    await cache.close()
+
+    # A second instance (e.g. another process) sees the committed entries
+    other = SQLiteCache(path)
+    assert (await other.get('a')).body == b'{"a": 1}'
+    entry = await other.get('b')
+    assert entry.expired and entry.headers == {'Content-Encoding': 'gzip'}
+    assert await other.purge() == 1
+    assert await other.get('b') is None
+    await other.close()
+
+
+@pytest.mark.asyncio
+async def test_cached_requests(tmp_path):
+    metrics = MetricsCollector()
+    cache = SQLiteCache(str(tmp_path / 'cache.db'))
+
+    async with MockBattleNetServer(compression='gzip') as server:
+        async with WowApi("<client_id>", "<client_secret>", "us",
+                          cache=cache, hooks=[metrics],
+                          **server.get_client_kwargs()) as client:
+            first = await client.Retail.GameData.get_item(19019)
+            assert await client.Retail.GameData.get_item(19019) == first
+
+            # Dynamic namespaces aren't cached by default
+            await client.Retail.GameData.get_wow_token_index()
+            await client.Retail.GameData.get_wow_token_index()
+
+    await cache.close()
+
+    assert server.requests['/data/wow/item/19019'] == 1
+    assert server.requests['/data/wow/token/index'] == 2
+    assert metrics.get_endpoint('/data/wow/item/{id}').cache_hits == 1
+    # Only the request which took a request slot waited for one
+    assert metrics.get_endpoint('/data/wow/item/{id}').queue_wait.count == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_while_revalidate():
+    async with MockBattleNetServer(latency=0.2) as server:
+        endpoint = '/profile/wow/character/illidan/thrall'
+        async with WowApi("<client_id>", "<client_secret>", "us",
+                          cache=MemoryCache(),
+                          cache_ttl={'profile-': 0.1},
+                          stale_while_revalidate=60,
+                          **server.get_client_kwargs()) as client:
+            profile = client.Retail.Profile
+            first = await profile.get_character_profile_summary(
+                'illidan', 'thrall')
+            await asyncio.sleep(0.15)
+
+            # Stale entries are served without waiting on the network, with
+            # a single background refresh however many callers asked
+            started = time.monotonic()
+            results = await asyncio.gather(
+                *(profile.get_character_profile_summary('illidan', 'thrall')
+                  for _ in range(5)))
+            assert time.monotonic() - started < 0.1
+            assert all(result == first for result in results)
+
+        # Leaving the client waits for the refresh
+        assert server.requests[endpoint] == 2
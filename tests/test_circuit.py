@@ -0,0 +1,88 @@
+from aiowowapi import WowApi, CircuitBreaker, CircuitOpenException, \
+    MemoryCache, get_circuit_key
+from aiowowapi.testing import MockBattleNetServer
+import aiohttp
+import pytest
+import asyncio
+import time
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    policy = asyncio.get_event_loop_policy()
+    loop = policy.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def test_get_circuit_key():
+    hostname = 'https://us.api.blizzard.com{api_endpoint}'
+    assert get_circuit_key(hostname, '/data/wow/item/19019',
+                           {'namespace': ('static-us',)}) == \
+        ('us.api.blizzard.com', 'static')
+    assert get_circuit_key(hostname, '/profile/wow/character/a/b',
+                           {'namespace': 'profile-us'}) == \
+        ('us.api.blizzard.com', 'profile')
+    assert get_circuit_key('https://us.battle.net{api_endpoint}',
+                           '/oauth/token') == ('us.battle.net', 'oauth')
+
+
+def test_circuit_breaker():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    key = ('us.api.blizzard.com', 'dynamic')
+
+    breaker.record_failure(key)
+    assert breaker.allow(key)
+    breaker.record_failure(key)
+    assert breaker.get_state(key) == 'open' and not breaker.allow(key)
+
+    # Half-open after the timeout, with a single probe let through
+    time.sleep(0.06)
+    assert breaker.allow(key) and not breaker.allow(key)
+    assert breaker.get_state(key) == 'half-open'
+
+    # A failed probe opens the circuit again, a successful one closes it
+    breaker.record_failure(key)
+    assert breaker.is_open(key)
+    time.sleep(0.06)
+    assert breaker.allow(key)
+    breaker.record_success(key)
+    assert breaker.get_state(key) == 'closed' and breaker.allow(key)
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_requests():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.2)
+
+    async with MockBattleNetServer() as server:
+        async with WowApi("<client_id>", "<client_secret>", "us",
+                          max_request_retries=5, request_retry_delay=0,
+                          cache=MemoryCache(), cache_ttl={'static-': 0.05},
+                          circuit_breaker=breaker,
+                          **server.get_client_kwargs()) as client:
+            game_data = client.Retail.GameData
+            item = await game_data.get_item(19019)
+            await asyncio.sleep(0.06)
+
+            # Retries stop as soon as the circuit opens
+            server.fail_next(503, times=2)
+            with pytest.raises(aiohttp.ClientResponseError):
+                await game_data.get_item(19019)
+            assert server.requests['/data/wow/item/19019'] == 3
+
+            # While open, cached responses are served however stale they
+            # are & anything else fails without a request
+            assert await game_data.get_item(19019) == item
+            with pytest.raises(CircuitOpenException):
+                await game_data.get_item(1)
+            assert server.requests['/data/wow/item/1'] == 0
+
+            # Other endpoint families aren't affected
+            assert await client.Retail.Profile.get_character_profile_summary(
+                'illidan', 'thrall') is not None
+
+            # Once the timeout passes a probe closes the circuit again
+            await asyncio.sleep(0.2)
+            assert await game_data.get_item(1) is not None
+            assert breaker.get_state(('127.0.0.1:{}'.format(server.port),
+                                      'static')) == 'closed'
@@ -0,0 +1,65 @@
+from aiowowapi import API, endpoint_template, Histogram, MetricsCollector, \
+    RequestContext, render_prometheus
+
+
+def test_endpoint_template() -> None:
+    assert endpoint_template('/data/wow/item/19019') == '/data/wow/item/{id}'
+    assert endpoint_template(
+        '/data/wow/connected-realm/11/mythic-leaderboard/197/period/641'
+    ) == '/data/wow/connected-realm/{id}/mythic-leaderboard/{id}/period/{id}'
+    assert endpoint_template(
+        '/profile/wow/character/illidan/adalyia/equipment'
+    ) == '/profile/wow/character/{realm}/{name}/equipment'
+    assert endpoint_template('/data/wow/realm/index') == \
+        '/data/wow/realm/index'
+
+
+def test_histogram_quantile() -> None:
+    histogram = Histogram((0.1, 0.5, 1.0))
+    for value in (0.05, 0.05, 0.3, 0.7):
+        histogram.observe(value)
+
+    assert histogram.count == 4
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(0.99) == 1.0
+
+
+def test_metrics_collector() -> None:
+    collector = MetricsCollector()
+    context = RequestContext('GET', '', '/data/wow/item/25')
+
+    collector.on_request_start(context)
+    assert collector.in_flight == 1
+
+    context.status = 200
+    context.bytes_received = 512
+    collector.on_response(context)
+    collector.on_request_end(context)
+
+    summary = collector.summary()['/data/wow/item/{id}']
+    assert collector.in_flight == 0
+    assert summary['requests'] == 1
+    assert summary['statuses'] == {200: 1}
+    assert summary['bytes_received'] == 512
+
+
+def test_render_prometheus() -> None:
+    collector = MetricsCollector()
+    context = RequestContext('POST', '', '/oauth/token')
+    collector.on_request_start(context)
+    context.status = 200
+    context.latency = 0.2
+    collector.on_response(context)
+    collector.on_request_end(context)
+
+    output = render_prometheus(
+        collector, API("<client_id>", "<client_secret>", "us"))
+
+    assert 'aiowowapi_responses_total{endpoint="/oauth/token",' \
+        'status="200"} 1' in output
+    assert 'aiowowapi_latency_seconds_bucket{endpoint="/oauth/token",' \
+        'le="0.25"} 1' in output
+    assert 'aiowowapi_request_slots_available 50' in output
+    # Without a rate limiter there are no tokens to report
+    assert 'aiowowapi_rate_limiter_tokens_remaining' not in output
+    assert 'aiowowapi_token_refreshes_total 1' in output
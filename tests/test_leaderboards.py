@@ -0,0 +1,157 @@
+from aiowowapi import WowApi, PvPLeaderboardColumns, \
+    to_pvp_leaderboard_columns, diff_pvp_leaderboards
+from aiowowapi.retail import MythicLeaderboardCrawler, LeaderboardIndex
+from aiowowapi.testing import MockBattleNetServer
+from email.utils import formatdate
+import pytest
+import asyncio
+import time
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    policy = asyncio.get_event_loop_policy()
+    loop = policy.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def set_mythic_keystone_responses(server: MockBattleNetServer) -> None:
+    server.set_response('/data/wow/mythic-keystone/period/index', {
+        'periods': [{'id': 640}, {'id': 641}],
+        'current_period': {'id': 641}})
+    server.set_response('/data/wow/mythic-keystone/period/641', {
+        'id': 641, 'end_timestamp': int(time.time() + 3600) * 1000})
+    server.set_response('/data/wow/connected-realm/index', {
+        'connected_realms': [
+            {'href': 'https://us.api.blizzard.com/data/wow/connected-realm/'
+                     f'{i}?namespace=dynamic-us'} for i in (11, 57)]})
+    for connected_realm_id in (11, 57):
+        server.set_response(
+            f'/data/wow/connected-realm/{connected_realm_id}'
+            '/mythic-leaderboard/index',
+            {'current_leaderboards': [{'id': 197}, {'id': 198}]})
+
+
+@pytest.mark.asyncio
+async def test_mythic_leaderboard_crawler():
+    async with MockBattleNetServer() as server:
+        set_mythic_keystone_responses(server)
+        current = '/data/wow/connected-realm/11/mythic-leaderboard/197' \
+                  '/period/641'
+        server.set_response(current, {'leading_groups': []}, headers={
+            'Last-Modified': formatdate(time.time() - 60, usegmt=True)})
+        finished = '/data/wow/connected-realm/11/mythic-leaderboard/197' \
+                   '/period/640'
+
+        async with WowApi("<client_id>", "<client_secret>", "us",
+                          **server.get_client_kwargs()) as client:
+            crawler = MythicLeaderboardCrawler(client.Retail.GameData,
+                                               max_concurrency=2)
+
+            leaderboards = [i async for i in crawler.crawl()]
+            assert sorted(i[:2] for i in leaderboards) == [
+                (11, 197), (11, 198), (57, 197), (57, 198)]
+            assert crawler.stats['fetches'] == 4
+
+            # The current period is refetched, conditionally
+            assert len([i async for i in crawler.crawl()]) == 4
+            assert server.requests[current] == 2
+            assert crawler.stats['not_modified'] == 1
+            assert server.requests[
+                '/data/wow/mythic-keystone/period/index'] == 1
+
+            # Finished periods are fetched once & then kept for good
+            for _ in range(2):
+                assert len([i async for i in crawler.crawl(640)]) == 4
+            assert server.requests[finished] == 1
+            assert crawler.stats['hits'] == 4
+            assert server.requests[
+                '/data/wow/connected-realm/11/mythic-leaderboard/index'] == 3
+
+
+def character(realm: str, name: str, character_id: int) -> dict:
+    return {'name': name, 'id': character_id,
+            'realm': {'id': 1, 'slug': realm}}
+
+
+def test_leaderboard_index():
+    index = LeaderboardIndex()
+    thrall = character('illidan', 'Thrall', 1)
+    jaina = character('area-52', 'Jaina', 2)
+
+    assert index.add_mythic_keystone_leaderboard(11, 197, 641, {
+        'leading_groups': [
+            {'ranking': 1, 'keystone_level': 20, 'members': [
+                {'profile': thrall}, {'profile': jaina}]},
+            {'ranking': 2, 'keystone_level': 18, 'members': [
+                {'profile': jaina}]}]}) == 2
+    assert index.add_pvp_leaderboard(33, '3v3', {'entries': [
+        {'rank': 5, 'rating': 2400, 'character': thrall}]}) == 1
+    assert index.add_mythic_raid_leaderboard('nyalotha', 'horde', {
+        'entries': [{'rank': 1, 'timestamp': 1580000000000,
+                     'guild': {'name': 'Method', 'id': 9,
+                               'realm': {'slug': 'tarren-mill'}}}]}) == 1
+    assert len(index) == 3
+
+    entries = index.find_character('Illidan', 'thrall')
+    assert sorted((i.leaderboard[0], i.rank, i.value) for i in entries) == [
+        ('mythic-keystone', 1, 20), ('pvp', 5, 2400)]
+    assert entries[0].members[0][1:] == ('illidan', 'Thrall', 1)
+    assert len(index.find_character_id(2)) == 2
+    assert index.find_guild('tarren-mill', 'method')[0].rank == 1
+    assert index.find_character('illidan', 'nobody') == []
+
+    # Re-adding a leaderboard replaces its previous entries
+    index.add_mythic_keystone_leaderboard(11, 197, 641, {
+        'leading_groups': [{'ranking': 1, 'keystone_level': 21,
+                            'members': [{'profile': jaina}]}]})
+    assert [i.leaderboard[0] for i in
+            index.find_character('illidan', 'thrall')] == ['pvp']
+    assert [i.value for i in index.find_character_id(2)] == [21]
+
+    assert index.remove_leaderboard(('pvp', 33, '3v3'))
+    assert index.find_character('illidan', 'thrall') == []
+
+
+def pvp_leaderboard(*rows) -> dict:
+    return {'entries': [
+        {'character': character('illidan', f'Player{i}', i),
+         'faction': {'type': faction}, 'rank': rank, 'rating': rating,
+         'season_match_statistics': {'played': won + lost, 'won': won,
+                                     'lost': lost}}
+        for i, faction, rank, rating, won, lost in rows]}
+
+
+@pytest.mark.asyncio
+async def test_pvp_leaderboard_columns():
+    endpoint = '/data/wow/pvp-season/33/pvp-leaderboard/3v3'
+    async with MockBattleNetServer() as server:
+        async with WowApi("<client_id>", "<client_secret>", "us",
+                          **server.get_client_kwargs()) as client:
+            server.set_response(endpoint, pvp_leaderboard(
+                (1, 'HORDE', 1, 2500, 10, 2),
+                (2, 'ALLIANCE', 2, 2400, 8, 4),
+                (3, 'HORDE', 3, 2300, 5, 5)))
+            old = await client.Retail.GameData.get_pvp_leaderboard(
+                33, '3v3', transform=to_pvp_leaderboard_columns)
+
+            server.set_response(endpoint, pvp_leaderboard(
+                (2, 'ALLIANCE', 1, 2520, 9, 4),
+                (1, 'HORDE', 2, 2500, 10, 2),
+                (4, 'HORDE', 3, 2350, 3, 0)))
+            new = await client.Retail.GameData.get_pvp_leaderboard(
+                33, '3v3', transform=to_pvp_leaderboard_columns)
+
+    assert isinstance(old, PvPLeaderboardColumns) and len(old) == 3
+    assert old.get_row(1) == {'character_id': 2, 'rating': 2400, 'rank': 2,
+                              'wins': 8, 'losses': 4, 'faction': 'ALLIANCE'}
+
+    diff = diff_pvp_leaderboards(old, new)
+    # Character 1 moved down a rank without playing, which isn't a change
+    assert list(diff.character_id) == [2]
+    assert list(diff.rating_delta) == [120]
+    assert list(diff.rank_delta) == [-1]
+    assert list(diff.wins_delta) == [1]
+    assert list(diff.joined) == [4]
+    assert list(diff.dropped) == [3]
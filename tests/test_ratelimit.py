@@ -0,0 +1,70 @@
+from aiowowapi import WowApi, LocalRateLimiter, SQLiteRateLimiter, \
+    MetricsCollector, render_prometheus
+from aiowowapi.testing import MockBattleNetServer
+import pytest
+import asyncio
+import time
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    policy = asyncio.get_event_loop_policy()
+    loop = policy.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.mark.asyncio
+async def test_local_rate_limiter():
+    limiter = LocalRateLimiter(per_second=20, per_hour=1000)
+
+    started = time.monotonic()
+    await asyncio.gather(*(limiter.acquire() for _ in range(30)))
+
+    # The first 20 go out in a burst, the next 10 at 20 per second
+    assert time.monotonic() - started >= 0.45
+    assert limiter.get_tokens_remaining() < 1
+
+
+@pytest.mark.asyncio
+async def test_shared_rate_limiter(tmp_path):
+    path = str(tmp_path / 'ratelimit.db')
+    limiters = [SQLiteRateLimiter(path, '<client_id>', per_second=100,
+                                  per_hour=10) for _ in range(2)]
+
+    # Both limiters draw from the same hourly budget
+    for limiter in limiters:
+        for _ in range(5):
+            await limiter.acquire()
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(limiters[0].acquire(), 0.2)
+
+    # Other credentials have their own budget
+    other = SQLiteRateLimiter(path, '<other_client_id>', per_hour=10)
+    await asyncio.wait_for(other.acquire(), 1)
+
+    for limiter in limiters + [other]:
+        await limiter.close()
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_requests(tmp_path):
+    limiter = SQLiteRateLimiter(str(tmp_path / 'ratelimit.db'),
+                                '<client_id>', per_second=10)
+    metrics = MetricsCollector()
+
+    async with MockBattleNetServer() as server:
+        async with WowApi("<client_id>", "<client_secret>", "us",
+                          rate_limiter=limiter, hooks=[metrics],
+                          **server.get_client_kwargs()) as client:
+            started = time.monotonic()
+            await asyncio.gather(*(client.Retail.GameData.get_item(i)
+                                   for i in range(15)))
+
+            # OAuth requests don't count, 10 go out in a burst then 10/s
+            assert time.monotonic() - started >= 0.45
+            assert 'aiowowapi_rate_limiter_tokens_remaining 0' in \
+                render_prometheus(metrics, client)
+
+    await limiter.close()
@@ -0,0 +1,70 @@
+from aiowowapi import WowApi
+from aiowowapi.retail import TokenSeries, TokenPoller
+from aiowowapi.testing import MockBattleNetServer
+from email.utils import formatdate
+import pytest
+import asyncio
+import time
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    policy = asyncio.get_event_loop_policy()
+    loop = policy.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def test_token_series():
+    series = TokenSeries(keyframe_interval=4)
+    samples = [(1000 + i * 1200, 2500000000 + (i % 7) * 1000000)
+               for i in range(10)]
+    for timestamp, price in samples:
+        assert series.append(timestamp, price)
+
+    # Samples must move forward in time
+    assert not series.append(1000, 1)
+    assert len(series) == 10 and series.last == samples[-1]
+
+    assert series.range() == samples
+    assert series.range(samples[5][0], samples[8][0]) == samples[5:8]
+    assert series.range(samples[5][0] + 1) == samples[6:]
+    assert series.get_price(samples[6][0] + 10) == samples[6][1]
+    assert series.get_price(0) is None
+
+    candles = series.downsample(3600, end=samples[6][0])
+    assert candles[0] == (0, samples[0][1], samples[2][1], samples[0][1],
+                          samples[2][1])
+    assert [i[0] for i in candles] == [0, 3600]
+
+
+@pytest.mark.asyncio
+async def test_token_poller():
+    async with MockBattleNetServer() as server:
+        def set_price(updated: float, price: int) -> None:
+            server.set_response(
+                '/data/wow/token/index',
+                {'last_updated_timestamp': int(updated * 1000),
+                 'price': price},
+                headers={'Last-Modified': formatdate(updated, usegmt=True)})
+
+        updated = time.time() - 60
+        set_price(updated, 2500000000)
+
+        async with WowApi("<client_id>", "<client_secret>", "us",
+                          **server.get_client_kwargs()) as client:
+            poller = TokenPoller(client.Retail.GameData, interval=0.05)
+
+            samples = []
+            async for sample in poller.poll():
+                samples.append(sample)
+                if len(samples) == 1:
+                    # Unchanged polls are answered with a 304
+                    await asyncio.sleep(0.2)
+                    set_price(updated + 1, 2510000000)
+                else:
+                    poller.stop()
+
+    assert samples == [('US', int(updated), 2500000000),
+                       ('US', int(updated) + 1, 2510000000)]
+    assert len(poller.series['US']) == 2
@@ -0,0 +1,48 @@
+from aiowowapi import WowApi, MemoryTokenStore, SQLiteTokenStore
+from aiowowapi.testing import MockBattleNetServer
+import pytest
+import asyncio
+import time
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    policy = asyncio.get_event_loop_policy()
+    loop = policy.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.mark.asyncio
+async def test_refresh_lease(tmp_path):
+    for store in (MemoryTokenStore(),
+                  SQLiteTokenStore(str(tmp_path / 'tokens.db'))):
+        assert await store.get('id:us') is None
+        assert await store.acquire_refresh('id:us', 'a', 30)
+        assert not await store.acquire_refresh('id:us', 'b', 30)
+
+        await store.set('id:us', 'token', time.time() + 3600)
+        await store.release_refresh('id:us', 'a')
+        assert await store.acquire_refresh('id:us', 'b', 30)
+        assert (await store.get('id:us'))[0] == 'token'
+
+        # Leases lapse if never released
+        assert await store.acquire_refresh('id:eu', 'a', 0)
+        assert await store.acquire_refresh('id:eu', 'b', 30)
+
+
+@pytest.mark.asyncio
+async def test_shared_access_token(tmp_path):
+    store = SQLiteTokenStore(str(tmp_path / 'tokens.db'))
+
+    async with MockBattleNetServer() as server:
+        clients = [WowApi("<client_id>", "<client_secret>", "us",
+                          token_store=store, **server.get_client_kwargs())
+                   for _ in range(4)]
+
+        # A burst of requests across several clients fetches a single token
+        await asyncio.gather(*(client.Retail.GameData.get_wow_token_index()
+                               for client in clients for _ in range(5)))
+
+    assert server.tokens_issued == 1
+    assert server.requests['/data/wow/token/index'] == 20
@@ -0,0 +1,25 @@
+from aiowowapi import WowApi, RecordingTransport, ReplayTransport
+from aiowowapi.testing import MockBattleNetServer
+import aiohttp
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_record_and_replay(tmp_path) -> None:
+    cassette = str(tmp_path / "crawl.cassette")
+
+    async with MockBattleNetServer(payload_size=4096) as server:
+        async with WowApi("<client_id>", "<client_secret>", "us",
+                          transport=RecordingTransport(cassette),
+                          **server.get_client_kwargs()) as client:
+            recorded = await client.Retail.GameData.get_auctions(1146)
+
+    # The server is gone, everything has to come from the cassette
+    async with WowApi("<client_id>", "<client_secret>", "us",
+                      transport=ReplayTransport(cassette),
+                      request_retry_delay=0,
+                      **server.get_client_kwargs()) as client:
+        assert await client.Retail.GameData.get_auctions(1146) == recorded
+
+        with pytest.raises(aiohttp.ClientConnectionError):
+            await client.Retail.GameData.get_auctions(1147)
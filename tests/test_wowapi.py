@@ -1,4 +1,6 @@
 from aiowowapi import WowApi
+from aiowowapi.retail import RealmIndex
+from aiowowapi.testing import MockBattleNetServer
 import pytest
 import asyncio
 
@@ -34,3 +36,108 @@ async def test_format_wow_gold() -> None:
     assert await WowApi.format_wow_gold(9999999) == '999g 99s 99c'
     assert await WowApi.format_wow_gold(9999998) == '999g 99s 98c'
     assert await WowApi.format_wow_gold(8999999) == '899g 99s 99c'
+
+
+def test_realm_index() -> None:
+    index = RealmIndex([
+        {'id': 57, 'name': 'Illidan', 'slug': 'illidan'},
+        {'id': 3676, 'name': 'Area 52', 'slug': 'area-52'},
+        {'id': 1138, 'name': "Azjol-Nerub", 'slug': 'azjolnerub'},
+        {'id': 1128, 'name': "Azshara", 'slug': 'azshara'},
+        {'id': 121, 'name': "Kel'Thuzad", 'slug': 'kelthuzad'},
+        {'id': 1129, 'name': 'Agamaggan', 'slug': 'agamaggan'},
+    ])
+
+    assert index.resolve('57') == 'illidan'
+    assert index.resolve('Area52') == 'area-52'
+    assert index.resolve('area 52') == 'area-52'
+    assert index.resolve("kel'thuzad") == 'kelthuzad'
+    assert index.resolve('Azjol Nerub') == 'azjolnerub'
+    assert index.search('az') == ['azshara', 'azjolnerub']
+    assert index.resolve('thuz') == 'kelthuzad'
+    assert index.resolve('ilidan') == 'illidan'
+    assert index.resolve('stormrage') is None
+
+
+@pytest.mark.asyncio
+async def test_get_realm_slug() -> None:
+    async with MockBattleNetServer() as server:
+        server.set_response('/data/wow/realm/index', {'realms': [
+            {'id': 57, 'name': 'Illidan', 'slug': 'illidan'},
+            {'id': 3676, 'name': 'Area 52', 'slug': 'area-52'}]})
+
+        async with WowApi("<client_id>", "<client_secret>", "us",
+                          realm_index_ttl=0.1,
+                          **server.get_client_kwargs()) as client:
+            assert await client.get_realm_slug('Area 52') == 'area-52'
+            assert await client.get_realm_slug('illi') == 'illidan'
+            assert server.requests['/data/wow/realm/index'] == 1
+
+            # The index is refreshed once its TTL passes
+            await asyncio.sleep(0.15)
+            await asyncio.gather(client.get_realm_slug('57'),
+                                 client.get_realm_slug('52'))
+            assert server.requests['/data/wow/realm/index'] == 2
+
+
+@pytest.mark.asyncio
+async def test_connected_realm_index() -> None:
+    async with MockBattleNetServer() as server:
+        server.set_response('/data/wow/realm/index', {'realms': [
+            {'id': 57, 'name': 'Illidan', 'slug': 'illidan'},
+            {'id': 3676, 'name': 'Area 52', 'slug': 'area-52'}]})
+        server.set_response('/data/wow/search/connected-realm', {
+            'page': 1, 'pageSize': 100, 'pageCount': 1, 'results': [
+                {'data': {'id': 57, 'realms': [
+                    {'id': 57, 'slug': 'illidan'}]}},
+                {'data': {'id': 3676, 'realms': [
+                    {'id': 3676, 'slug': 'area-52'},
+                    {'id': 3675, 'slug': 'hakkar'}]}}]},
+            headers={'Last-Modified': 'Tue, 01 Oct 2024 00:00:00 GMT'})
+
+        async with WowApi("<client_id>", "<client_secret>", "us",
+                          connected_realm_index_ttl=0.1,
+                          request_retry_delay=0,
+                          **server.get_client_kwargs()) as client:
+            index = client.get_connected_realm_index()
+            assert await client.get_connected_realm_id('Area 52') == 3676
+            assert await index.get_connected_realm_id('3675') == 3676
+            assert await index.get_connected_realm_id('Hakkar') == 3676
+            assert await index.get_sibling_realms('area-52') == ['hakkar']
+            assert await index.get_sibling_realms(57) == []
+            assert await index.get_connected_realm_id('nowhere') is None
+            assert server.requests['/data/wow/search/connected-realm'] == 1
+
+            # Once ttl passes the pages are checked, unchanged ones are
+            # answered with a 304 & the index is kept
+            await asyncio.sleep(0.15)
+            assert await index.refresh() is False
+            assert await index.get_connected_realm_id('illidan') == 57
+            assert server.requests['/data/wow/search/connected-realm'] == 2
+
+            # Should a refresh fail, the previous index keeps being used
+            await asyncio.sleep(0.15)
+            server.fail_next(503, 3)
+            assert await index.get_connected_realm_id('hakkar') == 3676
+            assert await index.get_connected_realm_id('illidan') == 57
+            assert server.requests['/data/wow/search/connected-realm'] == 5
+
+
+@pytest.mark.asyncio
+async def test_get_realm_slug_failed_refresh() -> None:
+    async with MockBattleNetServer() as server:
+        server.set_response('/data/wow/realm/index', {'realms': [
+            {'id': 57, 'name': 'Illidan', 'slug': 'illidan'}]})
+
+        async with WowApi("<client_id>", "<client_secret>", "us",
+                          realm_index_ttl=0.05, request_retry_delay=0,
+                          **server.get_client_kwargs()) as client:
+            assert await client.get_realm_slug('illidan') == 'illidan'
+            await asyncio.sleep(0.1)
+
+            # The stale index is served & the refresh isn't retried on every
+            # lookup while the API is down
+            server.fail_next(503, 3)
+            for _ in range(3):
+                assert await client.get_realm_slug('illidan') == 'illidan'
+            assert server.requests['/data/wow/realm/index'] == 4